@@ -1,374 +1,678 @@
+import json
+import os
+import time
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from io import BytesIO
 
 # Import our modules
 # Note: Credentials are loaded in their respective config files
-# - Source (PostgreSQL): config/postgresql_config.py loads from credentials/.env.source
+# - Source (PostgreSQL or SQL Server): config/postgresql_config.py and
+#   config/sqlserver_config.py load from credentials/.env.source
 # - Target (Snowflake): config/snowflake_config.py loads from credentials/.env.target
-from config.postgresql_config import get_postgresql_connection
-from config.snowflake_config import get_snowflake_connection
-from scripts import data_fetcher, comparator, quality_checks
+# Connections come from process-wide pools, so reruns reuse open sessions
+from config.snowflake_config import get_snowflake_pool
+from scripts import data_fetcher, comparator, quality_checks, summary_report, tracing, jobs
+from scripts.dialects import get_dialect, source_types
+from scripts.report_writer import ExcelReportWriter, ResultsFileWriter
+from scripts.results_store import ResultsStore
 
-# Title and description
-st.title("Data Migration Assist")
-st.markdown("This app compares table data between the source (PostgreSQL) and target (Snowflake) databases during cloud migration.")
+# Summary reports are streamed here (git-ignored) instead of being built in memory
+REPORT_DIR = os.getenv("REPORT_DIR", "reports")
 
-# Sidebar: Database and Schema Selection
-with st.sidebar:
-    st.image("Logo1.png", width=120)
-    st.markdown("---")
+# Sections of the single-table view; only the selected one is computed
+TABLE_SECTIONS = ["Row Counts", "Schema", "Content & Row Diff", "Samples", "Data Quality", "Summary"]
 
-    # PostgreSQL Connection Section
-    st.markdown("## 🔍 PostgreSQL Connection")
+# Seconds single-table section results are reused before being recomputed
+SECTION_CACHE_TTL = int(os.getenv("SECTION_CACHE_TTL", "600"))
 
-    # Fetch all PostgreSQL databases
-    conn_master = get_postgresql_connection(database="postgres")
-    pg_db_list = data_fetcher.get_postgresql_databases(conn_master)
-    conn_master.close()
+# Seconds between automatic refreshes while a background job is running
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
 
-    selected_pg_db = st.selectbox("Select PostgreSQL Database", pg_db_list, key="pg_db")
+# Most recent background jobs listed
+JOB_LIST_LIMIT = 10
 
-    # Connect to selected PostgreSQL database
-    conn_postgresql = get_postgresql_connection(database=selected_pg_db)
 
-    # Fetch schemas for selected PostgreSQL database
-    pg_schemas = data_fetcher.get_postgresql_schemas(conn_postgresql)
-    selected_pg_schema = st.selectbox("Select PostgreSQL Schema", pg_schemas, key="pg_schema")
+# Single-table section results, memoized per (connection target, schema,
+# table) and options. Connections are not hashed (leading underscore).
+@st.cache_data(ttl=SECTION_CACHE_TTL, show_spinner=False)
+def load_row_count(_conn, target, source, schema, table):
+    return int(data_fetcher.get_table_row_count(_conn, table, source=source, schema=schema))
 
-    # Fetch tables for selected PostgreSQL schema
-    tables_postgresql = data_fetcher.get_table_list(conn_postgresql, source='postgresql', schema=selected_pg_schema)
 
-    st.markdown("---")
+@st.cache_data(ttl=SECTION_CACHE_TTL, show_spinner=False)
+def load_table_schema(_conn, target, source, schema, table):
+    return data_fetcher.get_table_schema(_conn, table, source=source, schema=schema)
 
-    # Snowflake Connection Section
-    st.markdown("## ❄️ Snowflake Connection")
 
-    conn_snowflake = None
-    sf_db_list = []
-    sf_schemas = []
-    tables_snowflake = []
+@st.cache_data(ttl=SECTION_CACHE_TTL, show_spinner=False)
+def load_schema_drift(_conn_source, _conn_target, source_target, target_target, source, source_schema, target_schema):
+    """Column definition drift of every table of the schema pair (one catalog query per side)."""
+    return comparator.compare_schema_columns(
+        data_fetcher.get_schema_columns(_conn_source, source, source_schema),
+        data_fetcher.get_schema_columns(_conn_target, 'snowflake', target_schema),
+        source=source
+    )
 
-    try:
-        # Initial Snowflake connection to fetch databases
-        conn_snowflake_temp = get_snowflake_connection()
-        sf_db_list = data_fetcher.get_snowflake_databases(conn_snowflake_temp)
-        conn_snowflake_temp.close()
 
-        selected_sf_db = st.selectbox("Select Snowflake Database", sf_db_list, key="sf_db")
+@st.cache_data(ttl=SECTION_CACHE_TTL, show_spinner=False)
+def load_sample(_conn, target, source, schema, table, n, method, row_count):
+    return data_fetcher.get_sample_data(_conn, table, n=n, source=source, schema=schema, method=method, row_count=row_count)
 
-        # Connect to selected Snowflake database
-        conn_snowflake = get_snowflake_connection(database=selected_sf_db)
 
-        # Fetch schemas for selected Snowflake database
-        sf_schemas = data_fetcher.get_snowflake_schemas(conn_snowflake)
-        selected_sf_schema = st.selectbox("Select Snowflake Schema", sf_schemas, key="sf_schema")
+@st.cache_data(ttl=SECTION_CACHE_TTL, show_spinner=False)
+def load_quality(_conn, target, source, schema, table, full_table, n, method, row_count):
+    """Duplicate count, null percentages and (full-table only) distinct counts of one side."""
+    if full_table:
+        # One aggregate scan instead of estimating from the sample
+        profile = quality_checks.get_table_profile(_conn, table, source, schema)
+        return {"duplicates": profile["duplicate_rows"], "nulls": profile["columns"]["null_percentage"],
+                "distinct": profile["columns"]["distinct_count"]}
+    sample = load_sample(_conn, target, source, schema, table, n, method, row_count)
+    return {"duplicates": quality_checks.check_duplicates(sample), "nulls": quality_checks.check_nulls(sample), "distinct": None}
 
-        # Fetch tables for selected Snowflake schema
-        tables_snowflake = data_fetcher.get_table_list(conn_snowflake, source='snowflake', schema=selected_sf_schema)
 
-    except Exception as e:
-        st.warning(f"Snowflake connection error: {e}")
-        selected_sf_schema = None
+# Every query and check of this rerun is timed into one trace (see the Performance panel)
+run_trace = tracing.Trace("app")
+trace_token = tracing.activate(run_trace)
 
-    st.markdown("---")
+# Title and description
+st.title("Data Migration Assist")
+st.markdown("This app compares table data between the source (PostgreSQL or SQL Server) and target (Snowflake) databases during cloud migration.")
+
+# Pooled connections of this rerun; returned in the finally block below, also
+# when a widget raises or Streamlit interrupts the run
+conn_source = None
+conn_snowflake = None
+try:
+    # Sidebar: Database and Schema Selection
+    with st.sidebar:
+        st.image("Logo1.png", width=120)
+
+        # Database/schema/table listings and table sections are cached; this forces them to be re-read
+        if st.button("🔄 Refresh Metadata"):
+            data_fetcher.metadata_cache.invalidate()
+            st.cache_data.clear()
 
-    # Table Selection (from PostgreSQL tables)
-    st.markdown("## 📊 Table Selection")
-    selected_table = st.selectbox("Select a Table to Compare", tables_postgresql, key="table_select")
+        st.markdown("---")
 
-    st.markdown("---")
+        # Source Connection Section (see scripts/dialects.py for the supported databases)
+        source_type = st.selectbox("Source Database Type", source_types(), key="source_type",
+                                   format_func=lambda name: get_dialect(name).label)
+        source_dialect = get_dialect(source_type)
+        source_label = source_dialect.label
+        st.markdown(f"## 🔍 {source_label} Connection")
 
-    # Sidebar button to trigger full summary generation
-    if st.button("📋 Generate Full Summary Report"):
-        st.session_state.generate_summary = True
-    else:
-        st.session_state.generate_summary = False
-
-# --- Table Comparison Section ---
-st.markdown("---")
-st.markdown("### 📁 Table Presence Comparison")
-
-# Case-insensitive comparison for table names
-# PostgreSQL uses lowercase, Snowflake uses uppercase
-tables_postgresql_upper = [t.upper() for t in tables_postgresql]
-tables_snowflake_upper = [t.upper() for t in tables_snowflake]
-
-# Find common tables (case-insensitive)
-common_tables_upper = list(set(tables_postgresql_upper) & set(tables_snowflake_upper))
-common_tables = [t for t in tables_postgresql if t.upper() in common_tables_upper]
-
-# Find tables only in PostgreSQL (case-insensitive)
-postgresql_only_upper = list(set(tables_postgresql_upper) - set(tables_snowflake_upper))
-postgresql_only = [t for t in tables_postgresql if t.upper() in postgresql_only_upper]
-
-# Find tables only in Snowflake (case-insensitive)
-snowflake_only_upper = list(set(tables_snowflake_upper) - set(tables_postgresql_upper))
-snowflake_only = [t for t in tables_snowflake if t.upper() in snowflake_only_upper]
-
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown("#### ✅ Common Tables")
-    st.write(common_tables)
-
-with col2:
-    st.markdown("#### ❌ Tables only in PostgreSQL")
-    st.write(postgresql_only)
-    st.markdown("#### ❌ Tables only in Snowflake")
-    st.write(snowflake_only)
-
-# --- Full Summary Section ---
-if st.session_state.get("generate_summary", False):
-    st.header("📄 Full Schema-Level Summary Report")
-    output = BytesIO()
-    with st.expander("Table's Summary"):
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            for table in common_tables:
-                # st.write(f"Processing: {table}")
-                row_source = data_fetcher.get_table_row_count(conn_postgresql, table, 'postgresql', selected_pg_schema)
-                row_target = data_fetcher.get_table_row_count(conn_snowflake, table, 'snowflake', selected_sf_schema)
-                match, count_source, count_target = comparator.compare_row_counts(row_source, row_target)
-
-                schema_source = data_fetcher.get_table_schema(conn_postgresql, table, 'postgresql', selected_pg_schema)
-                schema_target = data_fetcher.get_table_schema(conn_snowflake, table, 'snowflake', selected_sf_schema)
-                column_match = schema_source.shape[0] == schema_target.shape[0]
-
-                sample_source = data_fetcher.get_sample_data(conn_postgresql, table, 120, 'postgresql', selected_pg_schema)
-                sample_target = data_fetcher.get_sample_data(conn_snowflake, table, 120, 'snowflake', selected_sf_schema)
-                dup_sql = quality_checks.check_duplicates(sample_source)
-                dup_sf = quality_checks.check_duplicates(sample_target)
-                null_sql = quality_checks.check_nulls(sample_source).round(0)
-                null_sf = quality_checks.check_nulls(sample_target).round(0)
-
-                null_sql.index = null_sql.index.str.upper()
-                null_sf.index = null_sf.index.str.upper()
-                null_df = pd.concat([null_sql, null_sf], axis=1).fillna(0)
-                null_df.columns = ["PostgreSQL (%)", "Snowflake (%)"]
-                null_df["Difference"] = (null_df["PostgreSQL (%)"] - null_df["Snowflake (%)"]).abs().astype(int)
-                null_df = null_df.astype(int).reset_index().rename(columns={"index": "Column Name"})
-
-                ## View Data
-                st.markdown("---") 
-                st.subheader(f"📊 Summary Report - {table}")
-
-                sample_source = data_fetcher.get_sample_data(conn_postgresql, table, n=120, source='postgresql',schema=selected_pg_schema)
-                sample_target = data_fetcher.get_sample_data(conn_snowflake, table, n=120, source='snowflake',schema=selected_sf_schema)
-                duplicates_sql = quality_checks.check_duplicates(sample_source)
-                duplicates_snowflake = quality_checks.check_duplicates(sample_target)
-
-                summary_data = {
-                    "Check": [
-                        "Table Presence in Both DBs",
-                        "Row Count Match",
-                        "Column Count Match",
-                        "Duplicate Rows (PostgreSQL)",
-                        "Duplicate Rows (Snowflake)"
-                    ],
-                    "Result": [
-                        "✅ Present in both" if table in common_tables else "❌ Missing in one",
-                        "✅ Match" if match else "❌ Mismatch",
-                        "✅ Match" if schema_source.shape[0] == schema_target.shape[0] else "❌ Mismatch",
-                        f"{duplicates_sql} duplicates",
-                        f"{duplicates_snowflake} duplicates"
-                    ]
-                }
-                summary_df = pd.DataFrame(summary_data)
-                st.dataframe(summary_df, use_container_width=True)
+        # Fetch all source databases from the server's default database
+        with source_dialect.get_pool().connection() as conn_master:
+            pg_db_list = data_fetcher.get_databases(conn_master, source_type)
 
-                st.markdown("##### 🧪 Null Value Comparison (Source vs Target)")
-                # Get null percentages and round to 0 decimals
-                nulls_sqlserver = quality_checks.check_nulls(sample_source).round(0)
-                nulls_snowflake = quality_checks.check_nulls(sample_target).round(0)
+        selected_pg_db = st.selectbox(f"Select {source_label} Database", pg_db_list, key="pg_db")
 
-                    # Standardize column names to uppercase
-                nulls_sqlserver.index = nulls_sqlserver.index.str.upper()
-                nulls_snowflake.index = nulls_snowflake.index.str.upper()
+        # Connect to selected source database
+        pool_source = source_dialect.get_pool(selected_pg_db)
+        conn_source = pool_source.getconn()
 
-                    # Combine and compare
-                null_comparison = pd.concat([nulls_sqlserver, nulls_snowflake], axis=1)
-                null_comparison.columns = ['PostgreSQL (%)', 'Snowflake (%)']
+        # Fetch schemas for selected source database
+        pg_schemas = data_fetcher.get_schemas(conn_source, source_type)
+        selected_pg_schema = st.selectbox(f"Select {source_label} Schema", pg_schemas, key="pg_schema")
 
-                    # Replace NaN with 0 before calculating difference
-                null_comparison.fillna(0, inplace=True)
+        # Fetch tables for selected source schema
+        tables_source = data_fetcher.get_table_list(conn_source, source=source_type, schema=selected_pg_schema)
 
-                    # Calculate and cast
-                null_comparison['Difference'] = (null_comparison['PostgreSQL (%)'] - null_comparison['Snowflake (%)']).abs().astype(int)
-                null_comparison[['PostgreSQL (%)', 'Snowflake (%)']] = null_comparison[['PostgreSQL (%)', 'Snowflake (%)']].astype(int)
+        st.markdown("---")
 
-                    # Prepare for display
-                null_comparison.reset_index(inplace=True)
-                null_comparison.rename(columns={'index': 'Column Name'}, inplace=True)
+        # Snowflake Connection Section
+        st.markdown("## ❄️ Snowflake Connection")
 
-                    # Highlight differences
-                def highlight_diff(val):
-                    return 'background-color: red' if val > 0 else ''
+        conn_snowflake = None
+        pool_snowflake = None
+        sf_db_list = []
+        sf_schemas = []
+        tables_snowflake = []
 
-                # Display with highlighting
-                st.dataframe(null_comparison.style.applymap(highlight_diff, subset=['Difference']), use_container_width=True)
+        try:
+            # Initial Snowflake connection to fetch databases
+            with get_snowflake_pool().connection() as conn_snowflake_temp:
+                sf_db_list = data_fetcher.get_snowflake_databases(conn_snowflake_temp)
 
-                summary_df = pd.DataFrame({
-                    "Metric": [
-                        "Row Count Source", "Row Count Target", "Row Count Match",
-                        "Column Count Match", "Duplicates PostgreSQL", "Duplicates Snowflake"
-                    ],
-                    "Value": [
-                        count_source, count_target, match, column_match, dup_sql, dup_sf
-                    ]
-                })
-                summary_df.to_excel(writer, sheet_name=table[:31], index=False, startrow=0)
-                null_df.to_excel(writer, sheet_name=table[:31], index=False, startrow=10)
+            selected_sf_db = st.selectbox("Select Snowflake Database", sf_db_list, key="sf_db")
 
-    output.seek(0)
+            # Connect to selected Snowflake database
+            pool_snowflake = get_snowflake_pool(database=selected_sf_db)
+            conn_snowflake = pool_snowflake.getconn()
 
-    st.markdown("---")
-    st.download_button(
-        label="📅 Download Full Summary Report (Excel)",
-        data=output,
-        file_name=f"{selected_pg_db}_{selected_pg_schema}_vs_{selected_sf_db}_{selected_sf_schema}_summary.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-else:
-    st.markdown("---")
+            # Fetch schemas for selected Snowflake database
+            sf_schemas = data_fetcher.get_snowflake_schemas(conn_snowflake)
+            selected_sf_schema = st.selectbox("Select Snowflake Schema", sf_schemas, key="sf_schema")
 
-    # Proceed with comparison only if a valid table is selected
-    if selected_table and selected_table != "None" and len(tables_postgresql) > 0:
-        st.header(f"Comparison for Table: **{selected_table}**")
+            # Fetch tables for selected Snowflake schema
+            tables_snowflake = data_fetcher.get_table_list(conn_snowflake, source='snowflake', schema=selected_sf_schema)
 
-        row_count_source = data_fetcher.get_table_row_count(conn_postgresql, selected_table, source='postgresql',schema = selected_pg_schema)
-        row_count_target = data_fetcher.get_table_row_count(conn_snowflake, selected_table, source='snowflake',schema = selected_sf_schema)
-        match, count_source, count_target = comparator.compare_row_counts(row_count_source, row_count_target)
+        except Exception as e:
+            st.warning(f"Snowflake connection error: {e}")
+            selected_sf_schema = None
 
-        st.subheader("Row Count Comparison")
-        st.write(f"**Source (PostgreSQL):** {count_source} rows")
-        st.write(f"**Target (Snowflake):** {count_target} rows")
-        if match:
-            st.success("Row counts match!")
-        else:
-            st.error("Row counts do NOT match!")
+        st.markdown("---")
 
-        df_counts = pd.DataFrame({"Source": [count_source], "Target": [count_target]}, index=["Row Count"])
-        df_counts = df_counts.reset_index().melt(id_vars='index', value_vars=["Source", "Target"], var_name="Database", value_name="Rows")
-        fig = px.bar(df_counts, x='Database', y='Rows', color='Database', title="Row Count Comparison")
-        st.plotly_chart(fig)
+        # Table Selection (from source tables)
+        st.markdown("## 📊 Table Selection")
+        selected_table = st.selectbox("Select a Table to Compare", tables_source, key="table_select")
 
         st.markdown("---")
 
-        st.subheader("Column Count Comparison")
-        schema_source = data_fetcher.get_table_schema(conn_postgresql, selected_table, source='postgresql',schema=selected_pg_schema)
-        schema_target = data_fetcher.get_table_schema(conn_snowflake, selected_table, source='snowflake',schema=selected_sf_schema)
-        st.write(f"**Source (PostgreSQL):** {schema_source.shape[0]} columns")
-        st.write(f"**Target (Snowflake):** {schema_target.shape[0]} columns")
-        if schema_source.shape[0] == schema_target.shape[0]:
-            st.success("Column counts match!")
-        else:
-            st.error("Column counts do NOT match!")
-
-        st.markdown("**Source Schema (PostgreSQL):**")
-        st.dataframe(schema_source[['column_name', 'data_type']])
-        st.markdown("**Target Schema (Snowflake):**")
-        st.dataframe(schema_target[['COLUMN_NAME','DATA_TYPE']])
+        # Sampling used for sample data, duplicate and null checks
+        st.markdown("## 🎲 Sampling")
+        sample_method = st.selectbox(
+            "Sampling Method", data_fetcher.SAMPLE_METHODS, key="sample_method",
+            format_func=lambda m: {
+                'limit': "First rows (fastest)",
+                'system': "Random blocks (cheap on huge tables)",
+                'bernoulli': "Random rows (full scan)",
+                'key_hash': "Same rows on both sides (full scan)"
+            }[m]
+        )
+        sample_confidence = st.selectbox(
+            "Sample Size", [None, 0.90, 0.95, 0.99], key="sample_confidence",
+            format_func=lambda c: "Fixed 120 rows" if c is None else f"{int(c * 100)}% confidence, ±5%"
+        )
+
+        # Full-table profiles scan (and group) every row on both sides, so they are opt-in
+        full_table_quality = st.checkbox("Full-table null/duplicate checks (pushdown)", value=False, key="full_table_quality")
 
         st.markdown("---")
 
-        st.subheader("Sample Data Comparison")
-        sample_source = data_fetcher.get_sample_data(conn_postgresql, selected_table, n=120, source='postgresql',schema=selected_pg_schema)
-        sample_target = data_fetcher.get_sample_data(conn_snowflake, selected_table, n=120, source='snowflake',schema=selected_sf_schema)
+        # Full-content checksums scan every row on both sides, so they are opt-in
+        include_checksums = st.checkbox("Include full-content checksums in summary", value=False, key="include_checksums")
 
-        st.markdown("**Source Sample Data (PostgreSQL):**")
-        st.dataframe(sample_source)
+        report_workers = st.number_input("Concurrent queries per database", min_value=1, max_value=32, value=4, key="report_workers")
+        exact_row_counts = st.checkbox(f"Exact {source_label} row counts (uncheck for catalog estimates)", value=True, key="exact_row_counts")
+        incremental = st.checkbox("Only re-check tables changed since the last report", value=False, key="incremental")
 
-        st.markdown("**Target Sample Data (Snowflake):**")
-        st.dataframe(sample_target)
+        # Sidebar button to trigger full summary generation
+        if st.button("📋 Generate Full Summary Report"):
+            st.session_state.generate_summary = True
+        else:
+            st.session_state.generate_summary = False
+
+        # The same report in a detached worker: it survives reruns, reconnects and
+        # app restarts, and an interrupted run resumes from its last finished table
+        if pool_snowflake and st.button("🧾 Run Summary as Background Job"):
+            job_args = [
+                "--source", source_type, "--pair", f"{selected_pg_db}.{selected_pg_schema}={selected_sf_db}.{selected_sf_schema}",
+                "--workers", str(report_workers), "--format", "json", "csv", "xlsx", "--sample-method", sample_method,
+            ]
+            if sample_confidence:
+                job_args += ["--sample-confidence", str(sample_confidence)]
+            if include_checksums:
+                job_args.append("--checksums")
+            if not exact_row_counts:
+                job_args.append("--estimated-row-counts")
+            if not full_table_quality:
+                job_args.append("--sample-quality")
+            if incremental:
+                job_args.append("--incremental")
+            job_dir = jobs.create_job(job_args, label=f"{selected_pg_db}.{selected_pg_schema} -> {selected_sf_db}.{selected_sf_schema}")
+            jobs.start_job(job_dir)
+            st.success(f"Started job {os.path.basename(job_dir)}; follow it under Background Jobs.")
+
+    # --- Table Comparison Section ---
+    st.markdown("---")
+    st.markdown("### 📁 Table Presence Comparison")
+
+    # Case-insensitive comparison for table names
+    # PostgreSQL uses lowercase, Snowflake uses uppercase
+    common_tables, source_only, snowflake_only = comparator.compare_table_lists(tables_source, tables_snowflake)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### ✅ Common Tables")
+        st.write(common_tables)
+
+    with col2:
+        st.markdown(f"#### ❌ Tables only in {source_label}")
+        st.write(source_only)
+        st.markdown("#### ❌ Tables only in Snowflake")
+        st.write(snowflake_only)
+
+    if conn_snowflake and st.button("🧬 Compare Column Definitions"):
+        with st.spinner("Reading both catalogs..."):
+            schema_drift = load_schema_drift(
+                conn_source, conn_snowflake, data_fetcher.get_connection_target(conn_source),
+                data_fetcher.get_connection_target(conn_snowflake), source_type, selected_pg_schema, selected_sf_schema
+            )
+        drift_tables = schema_drift["tables"]
+        if drift_tables["match"].all() and schema_drift["drift"].empty:
+            st.success(f"Column definitions of all {len(drift_tables)} common tables match!")
+        else:
+            st.error(f"{int((~drift_tables['match']).sum())} of {len(drift_tables)} common tables have column differences")
+            st.dataframe(drift_tables[(drift_tables["errors"] > 0) | (drift_tables["warnings"] > 0)], use_container_width=True)
+            st.dataframe(schema_drift["drift"], use_container_width=True)
+
+    # --- Background Jobs ---
+    # Status is read from each job's directory, so it is the same for every session and after restarts
+    job_statuses = jobs.list_jobs()[:JOB_LIST_LIMIT]
+    jobs_running = any(job["state"] == 'running' for job in job_statuses)
+    if job_statuses:
+        with st.expander("🗂️ Background Jobs", expanded=jobs_running):
+            for job in job_statuses:
+                created_at = pd.Timestamp(job["created_at"], unit="s").strftime("%Y-%m-%d %H:%M UTC")
+                st.markdown(f"**{job['label']}** · {job['state']} · started {created_at} · `{job['id']}`")
+                if job["tables_total"]:
+                    st.progress(min(job["tables_done"] / job["tables_total"], 1.0),
+                                text=f"{job['tables_done']} of {job['tables_total']} tables checked")
+                if job["state"] == 'running':
+                    if st.button("⏹️ Stop", key=f"stop_{job['id']}"):
+                        jobs.cancel_job(job["dir"])
+                elif job["state"] == 'interrupted':
+                    if job["failures"]:
+                        st.warning(f"Checks failed for {job['failures']} tables; see worker.log in {job['dir']}")
+                    if st.button("▶️ Resume", key=f"resume_{job['id']}"):
+                        jobs.start_job(job["dir"])
+                        jobs_running = True
+                elif job["mismatches"]:
+                    st.error(f"{job['mismatches']} tables do not match")
+                else:
+                    st.success("All tables match!")
+                for name in job["outputs"]:
+                    with open(os.path.join(job["dir"], name), "rb") as f:
+                        st.download_button(label=f"📅 {name}", data=f, file_name=name, key=f"download_{job['id']}_{name}")
+            if jobs_running:
+                st.checkbox("Refresh job status automatically", value=True, key="auto_refresh_jobs")
+
+    # --- Full Summary Section ---
+    if st.session_state.get("generate_summary", False):
+        st.header("📄 Full Schema-Level Summary Report")
+        # Sheets and result rows are written to disk as each table finishes
+        report_stem = f"{selected_pg_db}_{selected_pg_schema}_vs_{selected_sf_db}_{selected_sf_schema}_summary"
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        excel_path = os.path.join(REPORT_DIR, report_stem + ".xlsx")
+        csv_path = os.path.join(REPORT_DIR, report_stem + ".csv")
+        progress = st.progress(0.0, text="Checking tables...")
+        with st.expander("Table's Summary"):
+            with ExcelReportWriter(excel_path, source=source_type) as excel_writer, ResultsFileWriter(csv_path, 'csv', extra={"source": source_type}) as results_writer, summary_report.ReportExecutor(
+                pool_source, pool_snowflake, selected_pg_schema, selected_sf_schema,
+                workers_per_database=report_workers, include_checksums=include_checksums,
+                exact_row_counts=exact_row_counts, sample_method=sample_method, sample_confidence=sample_confidence,
+                profile_quality=full_table_quality,
+                store=ResultsStore() if incremental else None,
+                store_key=f"{selected_pg_db}.{selected_pg_schema} -> {selected_sf_db}.{selected_sf_schema}",
+                source=source_type
+            ) as executor:
+                # Results arrive in completion order, while other tables are still running
+                for done, result in enumerate(executor.iter_results(common_tables), start=1):
+                    table = result["table"]
+                    with tracing.span("write_results", table=table):
+                        results_writer.write_table(result)
+                        excel_writer.write_table(result)
+                    progress.progress(done / len(common_tables), text=f"Checked {done} of {len(common_tables)} tables")
+
+                    ## View Data
+                    st.markdown("---")
+                    st.subheader(f"📊 Summary Report - {table}")
+
+                    if "error" in result:
+                        st.error(f"Checks failed for {table}: {result['error']}")
+                        continue
+                    if result.get("reused"):
+                        checked_at = pd.Timestamp(result["checked_at"], unit="s").strftime("%Y-%m-%d %H:%M UTC")
+                        st.caption(f"Unchanged since {checked_at}; showing the stored result.")
+
+                    st.dataframe(summary_report.build_summary_checks(result, table in common_tables, source=source_type), use_container_width=True)
+
+                    st.markdown("##### 🧪 Null Value Comparison (Source vs Target)")
+                    null_comparison = result["null_comparison"]
 
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("**Duplicate Row Count (PostgreSQL):**")
-            duplicates_sql = quality_checks.check_duplicates(sample_source)
-            st.write(f'🔁 {duplicates_sql}')
+                    # Highlight differences
+                    def highlight_diff(val):
+                        return 'background-color: red' if val > 0 else ''
 
-        with col2:
-            st.markdown("**Duplicate Row Count (Snowflake):**")
-            duplicates_snowflake = quality_checks.check_duplicates(sample_target)
-            st.write(f'🔁 {duplicates_snowflake}')
+                    # Display with highlighting
+                    st.dataframe(null_comparison.style.applymap(highlight_diff, subset=['Difference']), use_container_width=True)
 
         st.markdown("---")
-        # Data Quality Checks on source
-        st.subheader("Data Quality Checks")
-
-        # PostgreSQL nulls
-        st.markdown("**Null Value Percentage per Column (PostgreSQL):**")
-        nulls_sql = quality_checks.check_nulls(sample_source)
-        nulls_df_sql = nulls_sql.reset_index()
-        nulls_df_sql.columns = ['Column Name', 'Percentage (%)']
-        nulls_df_sql['Column Name'] = nulls_df_sql['Column Name'].str.upper()  # Convert values to uppercase
-        st.dataframe(nulls_df_sql, use_container_width=True)
-
-        # Snowflake nulls
-        st.markdown("**Null Value Percentage per Column (Snowflake):**")
-        nulls_sf = quality_checks.check_nulls(sample_target)
-        nulls_df_sf = nulls_sf.reset_index()
-        nulls_df_sf.columns = ['Column Name', 'Percentage (%)']
-        nulls_df_sf['Column Name'] = nulls_df_sf['Column Name'].str.upper()  # Convert values to uppercase
-        st.dataframe(nulls_df_sf, use_container_width=True)
-
+        with open(excel_path, "rb") as f:
+            st.download_button(
+                label="📅 Download Full Summary Report (Excel)",
+                data=f,
+                file_name=report_stem + ".xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+        with open(csv_path, "rb") as f:
+            st.download_button(
+                label="📅 Download Table Results (CSV)",
+                data=f,
+                file_name=report_stem + ".csv",
+                mime="text/csv"
+            )
+    else:
         st.markdown("---")
-        st.subheader(f"📊 Summary Report - {selected_table}")
-
-        summary_data = {
-            "Check": [
-                "Table Presence in Both DBs",
-                "Row Count Match",
-                "Column Count Match",
-                "Duplicate Rows (PostgreSQL)",
-                "Duplicate Rows (Snowflake)"
-            ],
-            "Result": [
-                "✅ Present in both" if selected_table in common_tables else "❌ Missing in one",
-                "✅ Match" if match else "❌ Mismatch",
-                "✅ Match" if schema_source.shape[0] == schema_target.shape[0] else "❌ Mismatch",
-                f"{duplicates_sql} duplicates",
-                f"{duplicates_snowflake} duplicates"
-            ]
-        }
-        summary_df = pd.DataFrame(summary_data)
-        st.dataframe(summary_df, use_container_width=True)
-
-        st.markdown("##### 🧪 Null Value Comparison (Source vs Target)")
-        # Get null percentages and round to 0 decimals
-        nulls_sqlserver = quality_checks.check_nulls(sample_source).round(0)
-        nulls_snowflake = quality_checks.check_nulls(sample_target).round(0)
 
-        # Standardize column names to uppercase
-        nulls_sqlserver.index = nulls_sqlserver.index.str.upper()
-        nulls_snowflake.index = nulls_snowflake.index.str.upper()
-
-        # Combine and compare
-        null_comparison = pd.concat([nulls_sqlserver, nulls_snowflake], axis=1)
-        null_comparison.columns = ['PostgreSQL (%)', 'Snowflake (%)']
-
-        # Replace NaN with 0 before calculating difference
-        null_comparison.fillna(0, inplace=True)
+        # Proceed with comparison only if a valid table is selected
+        if selected_table and selected_table != "None" and len(tables_source) > 0:
+            st.header(f"Comparison for Table: **{selected_table}**")
+
+            # Only the chosen section runs its queries; results are memoized per
+            # (connection, schema, table), so switching back and forth is instant
+            sides = {
+                source_type: (conn_source, data_fetcher.get_connection_target(conn_source), selected_pg_schema),
+                'snowflake': (conn_snowflake, data_fetcher.get_connection_target(conn_snowflake), selected_sf_schema),
+            }
+            section = st.radio("Section", TABLE_SECTIONS, horizontal=True, key="table_section", label_visibility="collapsed")
+
+            def row_counts():
+                with st.spinner("Counting rows..."):
+                    counts = {source: load_row_count(conn, target, source, schema, selected_table) for source, (conn, target, schema) in sides.items()}
+                return comparator.compare_row_counts(counts[source_type], counts['snowflake'])
+
+            def table_schemas():
+                with st.spinner("Reading column definitions..."):
+                    return [load_table_schema(conn, target, source, schema, selected_table) for source, (conn, target, schema) in sides.items()]
+
+            def table_drift():
+                with st.spinner("Comparing column definitions..."):
+                    drift = load_schema_drift(conn_source, conn_snowflake, sides[source_type][1], sides['snowflake'][1],
+                                              source_type, selected_pg_schema, selected_sf_schema)["drift"]
+                return drift[drift["table"].str.upper() == selected_table.upper()].drop(columns="table")
+
+            def table_quality():
+                row_count = {source_type: None, 'snowflake': None}
+                sample_size = None
+                if not full_table_quality:
+                    # Same arguments as the Samples section, so the samples are shared
+                    _, row_count[source_type], row_count['snowflake'] = row_counts()
+                    sample_size = data_fetcher.get_sample_size(row_count[source_type], sample_confidence) if sample_confidence else 120
+                message = "Profiling full tables..." if full_table_quality else "Checking samples..."
+                with st.spinner(message):
+                    return [
+                        load_quality(conn, target, source, schema, selected_table, full_table_quality, sample_size,
+                                     sample_method if sample_size else None, row_count[source])
+                        for source, (conn, target, schema) in sides.items()
+                    ]
 
-        # Calculate and cast
-        null_comparison['Difference'] = (null_comparison['PostgreSQL (%)'] - null_comparison['Snowflake (%)']).abs().astype(int)
-        null_comparison[['PostgreSQL (%)', 'Snowflake (%)']] = null_comparison[['PostgreSQL (%)', 'Snowflake (%)']].astype(int)
+            if section == "Row Counts":
+                match, count_source, count_target = row_counts()
+                st.subheader("Row Count Comparison")
+                st.write(f"**Source ({source_label}):** {count_source} rows")
+                st.write(f"**Target (Snowflake):** {count_target} rows")
+                if match:
+                    st.success("Row counts match!")
+                else:
+                    st.error("Row counts do NOT match!")
+
+                df_counts = pd.DataFrame({"Source": [count_source], "Target": [count_target]}, index=["Row Count"])
+                df_counts = df_counts.reset_index().melt(id_vars='index', value_vars=["Source", "Target"], var_name="Database", value_name="Rows")
+                fig = px.bar(df_counts, x='Database', y='Rows', color='Database', title="Row Count Comparison")
+                st.plotly_chart(fig)
+
+            elif section == "Schema":
+                schema_source, schema_target = table_schemas()
+                st.subheader("Column Count Comparison")
+                st.write(f"**Source ({source_label}):** {schema_source.shape[0]} columns")
+                st.write(f"**Target (Snowflake):** {schema_target.shape[0]} columns")
+                if schema_source.shape[0] == schema_target.shape[0]:
+                    st.success("Column counts match!")
+                else:
+                    st.error("Column counts do NOT match!")
+
+                st.markdown(f"**Source Schema ({source_label}):**")
+                st.dataframe(schema_source[['column_name', 'data_type']])
+                st.markdown("**Target Schema (Snowflake):**")
+                st.dataframe(schema_target[['COLUMN_NAME','DATA_TYPE']])
+
+                st.subheader("Column Definition Drift")
+                st.caption("Names, types, precision/scale, length, nullability, defaults and order, aligned by column name.")
+                drift = table_drift()
+                if drift.empty:
+                    st.success("Column definitions match!")
+                elif (drift["severity"] == "error").any():
+                    st.error("Column definitions differ!")
+                    st.dataframe(drift, use_container_width=True)
+                else:
+                    st.warning("Column definitions differ in nullability, defaults or order only")
+                    st.dataframe(drift, use_container_width=True)
+
+            elif section == "Content & Row Diff":
+                st.subheader("Full-Content Checksum")
+                st.caption("Scans every row once on each side and compares order-independent hashes, counts and min/max per column.")
+                if st.button("🔐 Run Full-Content Checksum"):
+                    with st.spinner("Computing checksums on both databases..."):
+                        content_match, checksum_comparison = comparator.compare_table_checksums(
+                            conn_source, conn_snowflake, selected_table, selected_pg_schema, selected_sf_schema,
+                            source=source_type
+                        )
+                    if content_match:
+                        st.success("Table contents match!")
+                    else:
+                        st.error("Table contents do NOT match!")
+                    st.dataframe(checksum_comparison, use_container_width=True)
+
+                primary_key = data_fetcher.get_primary_key(conn_source, selected_table, source_type, selected_pg_schema)
+                diff_keys = st.text_input("Key columns for row-level diff (comma separated, blank = all columns)",
+                                          value=", ".join(primary_key), key=f"diff_keys_{selected_pg_schema}_{selected_table}")
+                if st.button("🔎 Locate Differing Rows"):
+                    key_columns = [k.strip() for k in diff_keys.split(",") if k.strip()] or None
+                    with st.spinner("Drilling down into mismatching buckets..."):
+                        diff = comparator.find_mismatched_rows(
+                            conn_source, conn_snowflake, selected_table, selected_pg_schema, selected_sf_schema,
+                            key_columns=key_columns, source=source_type
+                        )
+                    st.dataframe(diff["levels"], use_container_width=True)
+                    if not diff["complete"]:
+                        st.warning("Too many differences to isolate individual rows; the tables differ in most buckets.")
+                    elif diff["differences"].empty:
+                        st.success("No differing rows found!")
+                    else:
+                        st.error(f"{len(diff['differences'])} differing rows found")
+                        st.dataframe(diff["differences"], use_container_width=True)
+                        st.markdown(f"**Differing Rows ({source_label}):**")
+                        st.dataframe(diff["source_rows"])
+                        st.markdown("**Differing Rows (Snowflake):**")
+                        st.dataframe(diff["target_rows"])
+
+                if st.button("🔀 Merge-Compare by Key"):
+                    key_columns = [k.strip() for k in diff_keys.split(",") if k.strip()] or None
+                    try:
+                        with st.spinner("Streaming both tables in key order..."):
+                            merge_diff = comparator.merge_compare_tables(
+                                conn_source, conn_snowflake, selected_table, selected_pg_schema, selected_sf_schema,
+                                key_columns=key_columns, source=source_type
+                            )
+                    except ValueError as e:
+                        st.warning(str(e))
+                    else:
+                        counts = merge_diff["counts"]
+                        st.write(f"Missing in Snowflake: {counts['missing_in_target']}, only in Snowflake: {counts['extra_in_target']}, "
+                                 f"changed: {counts['changed']}")
+                        if merge_diff["differences"].empty:
+                            st.success("No differing rows found!")
+                        else:
+                            st.dataframe(merge_diff["differences"], use_container_width=True)
+
+                # Large tables: fetch key-aligned chunks concurrently instead of one ordered stream per side
+                if st.button("⚡ Parallel Compare by Key"):
+                    key_columns = [k.strip() for k in diff_keys.split(",") if k.strip()] or None
+                    # Finished chunks are checkpointed, so an interrupted compare picks up where it stopped
+                    diff_checkpoint = jobs.JobCheckpoint(os.path.join(
+                        jobs.JOBS_DIR, "diffs",
+                        f"{source_type}-{selected_pg_db}.{selected_pg_schema}-{selected_sf_db}.{selected_sf_schema}-{selected_table}.jsonl"
+                    ))
+                    try:
+                        with st.spinner(f"Comparing in chunks, {report_workers} queries per database..."):
+                            parallel_diff = comparator.parallel_compare_tables(
+                                pool_source, pool_snowflake, selected_table, selected_pg_schema, selected_sf_schema,
+                                key_columns=key_columns, workers_per_database=report_workers, checkpoint=diff_checkpoint,
+                                source=source_type
+                            )
+                    except ValueError as e:
+                        st.warning(str(e))
+                    else:
+                        diff_checkpoint.clear()
+                        counts = parallel_diff["counts"]
+                        st.write(f"Chunks compared: {parallel_diff['chunks']}, missing in Snowflake: {counts['missing_in_target']}, "
+                                 f"only in Snowflake: {counts['extra_in_target']}, changed: {counts['changed']}")
+                        if parallel_diff["differences"].empty:
+                            st.success("No differing rows found!")
+                        else:
+                            st.dataframe(parallel_diff["differences"], use_container_width=True)
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    compare_trim = st.checkbox("Ignore leading/trailing whitespace", value=False)
+                with col2:
+                    compare_ignore_case = st.checkbox("Ignore case in text columns", value=False)
+                if st.button("🧮 Compare Column Values"):
+                    key_columns = [k.strip() for k in diff_keys.split(",") if k.strip()]
+                    if not key_columns:
+                        st.warning("Enter the key columns above to align rows for a column-level comparison.")
+                    else:
+                        with st.spinner("Comparing every value column by column..."):
+                            column_diff = comparator.compare_column_values(
+                                conn_source, conn_snowflake, selected_table, key_columns, selected_pg_schema, selected_sf_schema,
+                                trim=compare_trim, ignore_case=compare_ignore_case, source=source_type
+                            )
+                        st.write(f"Rows compared: {column_diff['compared_rows']}, missing in Snowflake: {column_diff['missing_in_target']}, "
+                                 f"only in Snowflake: {column_diff['extra_in_target']}")
+                        if column_diff["columns"]["Mismatches"].sum() == 0:
+                            st.success("All compared column values match!")
+                        else:
+                            st.error(f"Some column values differ between {source_label} and Snowflake")
+                        st.dataframe(column_diff["columns"], use_container_width=True)
+
+            elif section == "Samples":
+                _, count_source, count_target = row_counts()
+                sample_size = data_fetcher.get_sample_size(count_source, sample_confidence) if sample_confidence else 120
+                with st.spinner("Fetching samples..."):
+                    sample_source = load_sample(conn_source, sides[source_type][1], source_type, selected_pg_schema, selected_table,
+                                                sample_size, sample_method, count_source)
+                    sample_target = load_sample(conn_snowflake, sides['snowflake'][1], 'snowflake', selected_sf_schema, selected_table,
+                                                sample_size, sample_method, count_target)
+
+                st.subheader("Sample Data Comparison")
+                st.markdown(f"**Source Sample Data ({source_label}):**")
+                st.dataframe(sample_source)
+
+                st.markdown("**Target Sample Data (Snowflake):**")
+                st.dataframe(sample_target)
+
+            elif section == "Data Quality":
+                quality_source, quality_target = table_quality()
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.markdown(f"**Duplicate Row Count ({source_label}):**")
+                    st.write(f'🔁 {quality_source["duplicates"]}')
+
+                with col2:
+                    st.markdown("**Duplicate Row Count (Snowflake):**")
+                    st.write(f'🔁 {quality_target["duplicates"]}')
+
+                st.markdown("---")
+                # Data Quality Checks on source
+                st.subheader("Data Quality Checks")
+
+                # Source nulls
+                st.markdown(f"**Null Value Percentage per Column ({source_label}):**")
+                nulls_df_sql = quality_source["nulls"].reset_index()
+                nulls_df_sql.columns = ['Column Name', 'Percentage (%)']
+                nulls_df_sql['Column Name'] = nulls_df_sql['Column Name'].str.upper()  # Convert values to uppercase
+                st.dataframe(nulls_df_sql, use_container_width=True)
+
+                # Snowflake nulls
+                st.markdown("**Null Value Percentage per Column (Snowflake):**")
+                nulls_df_sf = quality_target["nulls"].reset_index()
+                nulls_df_sf.columns = ['Column Name', 'Percentage (%)']
+                nulls_df_sf['Column Name'] = nulls_df_sf['Column Name'].str.upper()  # Convert values to uppercase
+                st.dataframe(nulls_df_sf, use_container_width=True)
+
+                if quality_source["distinct"] is not None:
+                    st.markdown("**Distinct Values per Column:**")
+                    distinct_comparison = pd.concat([quality_source["distinct"], quality_target["distinct"]], axis=1)
+                    distinct_comparison.columns = [source_label, 'Snowflake']
+                    st.dataframe(distinct_comparison.reset_index().rename(columns={'column_name': 'Column Name'}), use_container_width=True)
+
+            elif section == "Summary":
+                match, count_source, count_target = row_counts()
+                schema_source, schema_target = table_schemas()
+                quality_source, quality_target = table_quality()
+                drift = table_drift()
+
+                st.subheader(f"📊 Summary Report - {selected_table}")
+                result = {
+                    "row_count_match": match,
+                    "column_match": schema_source.shape[0] == schema_target.shape[0] and not (drift["severity"] == "error").any(),
+                    "schema_drift": drift.to_dict(orient="records"),
+                    "duplicates_source": quality_source["duplicates"],
+                    "duplicates_target": quality_target["duplicates"],
+                    "content_match": None,
+                }
+                st.dataframe(summary_report.build_summary_checks(result, selected_table in common_tables, source=source_type), use_container_width=True)
 
-        # Prepare for display
-        null_comparison.reset_index(inplace=True)
-        null_comparison.rename(columns={'index': 'Column Name'}, inplace=True)
+                st.markdown("##### 🧪 Null Value Comparison (Source vs Target)")
+                null_comparison = comparator.compare_null_percentages(quality_source["nulls"], quality_target["nulls"], source=source_type)
 
-        # Highlight differences
-        def highlight_diff(val):
-            return 'background-color: red' if val > 0 else ''
+                # Highlight differences
+                def highlight_diff(val):
+                    return 'background-color: red' if val > 0 else ''
 
-        # Display with highlighting
-        st.dataframe(null_comparison.style.applymap(highlight_diff, subset=['Difference']), use_container_width=True)
+                # Display with highlighting
+                st.dataframe(null_comparison.style.applymap(highlight_diff, subset=['Difference']), use_container_width=True)
+        else:
+            st.info("👆 Please select a table from the dropdown above to view comparison details.")
+finally:
+    # Return connections to their pools for the next rerun
+    if conn_source is not None:
+        pool_source.putconn(conn_source)
+    if conn_snowflake is not None:
+        pool_snowflake.putconn(conn_snowflake)
+
+# --- Performance of this rerun ---
+tracing.deactivate(trace_token)
+with st.expander("⏱️ Performance"):
+    spans = pd.DataFrame(run_trace.to_records())
+    if spans.empty:
+        st.write("No queries were run.")
     else:
-        st.info("👆 Please select a table from the dropdown above to view comparison details.")
-
-
-# Close connections
-conn_postgresql.close()
-if conn_snowflake:
-    conn_snowflake.close()
\ No newline at end of file
+        queries = spans[spans["kind"] == "query"]
+        if not queries.empty:
+            st.markdown("##### Time by database")
+            st.dataframe(
+                queries.groupby("db.target").agg(
+                    queries=("span_id", "count"), total_ms=("duration_ms", "sum"),
+                    rows=("rows", "sum"), bytes=("bytes", "sum")
+                ).sort_values("total_ms", ascending=False),
+                use_container_width=True
+            )
+            st.markdown("##### Slowest queries")
+            st.dataframe(
+                queries.sort_values("duration_ms", ascending=False)[
+                    ["db.target", "duration_ms", "rows", "bytes", "query_id", "db.statement", "error"]
+                ].head(50),
+                use_container_width=True
+            )
+        checks = spans[spans["kind"] == "internal"]
+        if not checks.empty:
+            st.markdown("##### Checks and steps")
+            st.dataframe(
+                checks.groupby("name").agg(count=("span_id", "count"), total_ms=("duration_ms", "sum"), max_ms=("duration_ms", "max"))
+                .sort_values("total_ms", ascending=False),
+                use_container_width=True
+            )
+        st.download_button(
+            label="Download Trace (JSON)",
+            data=json.dumps(run_trace.to_records(), default=str),
+            file_name="trace.json",
+            mime="application/json"
+        )
+        st.download_button(
+            label="Download Trace (OpenTelemetry OTLP/JSON)",
+            data=json.dumps(run_trace.to_otlp()),
+            file_name="trace.otlp.json",
+            mime="application/json"
+        )
+
+# Poll running background jobs by rerunning the script
+if jobs_running and st.session_state.get("auto_refresh_jobs", True):
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
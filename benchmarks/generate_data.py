@@ -0,0 +1,203 @@
+"""
+Synthetic benchmark data for the comparison paths.
+
+Creates the customers/accounts/transactions/loans schema of
+scripts/setup_postgresql.sql and scripts/setup_snowflake.sql at a chosen
+scale in one schema on both sides, optionally with many copies of the
+transactions table and a wide table, then injects drift into the target.
+
+Rows are generated inside the databases (generate_series on PostgreSQL,
+GENERATOR on Snowflake and the local stand-in) from deterministic
+functions of the row number, so both sides hold identical data before
+drift is applied and nothing is transferred through Python.
+
+Usage (credentials as for the app; SNOWFLAKE_BACKEND=local for offline runs):
+
+    python -m benchmarks.generate_data --rows 1000000 --copies 20 \\
+        --wide-columns 200 --drift 0.001 \\
+        --pg-database migration_test_db --sf-database MIGRATION_TEST_DB --schema bench
+"""
+import argparse
+import sys
+import time
+
+from config.postgresql_config import get_postgresql_connection
+from config.snowflake_config import get_snowflake_connection
+
+# Rows generated per INSERT statement
+CHUNK_ROWS = 10000000
+
+# Keys of rows only inserted into the target start above this
+EXTRA_ROW_OFFSET = 10 ** 12
+
+# Table sizes relative to --rows (the transactions table)
+TABLE_RATIOS = {"CUSTOMERS": 20, "ACCOUNTS": 10, "LOANS": 40}
+
+TABLES = {
+    "CUSTOMERS": (
+        "CUSTOMER_ID BIGINT PRIMARY KEY, NAME VARCHAR(100) NOT NULL, EMAIL VARCHAR(100), PHONE VARCHAR(20)",
+        """i, 'Customer ' || CAST(i AS VARCHAR),
+           CASE WHEN MOD(i, 17) = 0 THEN NULL ELSE 'customer' || CAST(i AS VARCHAR) || '@example.com' END,
+           '555-' || CAST(MOD(i * 31, 10000) AS VARCHAR)""",
+    ),
+    "ACCOUNTS": (
+        "ACCOUNT_ID BIGINT PRIMARY KEY, CUSTOMER_ID BIGINT, ACCOUNT_TYPE VARCHAR(50), BALANCE NUMERIC(12, 2)",
+        """i, MOD(i - 1, {customers}) + 1,
+           CASE MOD(i, 3) WHEN 0 THEN 'Checking' WHEN 1 THEN 'Savings' ELSE 'Business' END,
+           CAST(MOD(i * 7919, 10000000) / 100.0 AS DECIMAL(12, 2))""",
+    ),
+    "TRANSACTIONS": (
+        "TRANSACTION_ID BIGINT PRIMARY KEY, ACCOUNT_ID BIGINT, TRANSACTION_DATE DATE, AMOUNT NUMERIC(12, 2), TYPE VARCHAR(20)",
+        """i, MOD(i - 1, {accounts}) + 1, CAST('2020-01-01' AS DATE) + CAST(MOD(i, 1500) AS INTEGER),
+           CAST(MOD(i * 104729, 1000000) / 100.0 AS DECIMAL(12, 2)),
+           CASE WHEN MOD(i, 2) = 0 THEN 'Deposit' ELSE 'Withdrawal' END""",
+    ),
+    "LOANS": (
+        "LOAN_ID BIGINT PRIMARY KEY, CUSTOMER_ID BIGINT, LOAN_AMOUNT NUMERIC(12, 2), INTEREST_RATE NUMERIC(4, 2), "
+        "START_DATE DATE, END_DATE DATE",
+        """i, MOD(i - 1, {customers}) + 1, CAST(MOD(i * 6151, 100000000) / 100.0 AS DECIMAL(12, 2)),
+           CAST(MOD(i, 1500) / 100.0 AS DECIMAL(4, 2)), CAST('2018-01-01' AS DATE) + CAST(MOD(i, 2000) AS INTEGER),
+           CAST('2018-01-01' AS DATE) + CAST(MOD(i, 2000) + 365 * (1 + MOD(i, 10)) AS INTEGER)""",
+    ),
+}
+
+
+def row_source(start, count, source):
+    """FROM clause producing column i = start .. start + count - 1."""
+    if source == 'postgresql':
+        return f"generate_series(CAST({start} AS BIGINT), {start + count - 1}) AS g(i)"
+    elif source == 'snowflake':
+        return f"(SELECT ROW_NUMBER() OVER (ORDER BY SEQ8()) + {start - 1} AS i FROM TABLE(GENERATOR(ROWCOUNT => {count}))) g"
+    else:
+        raise ValueError("Unsupported source. Use 'postgresql' or 'snowflake'.")
+
+
+def wide_table_definition(columns):
+    """Column definitions and value expressions of WIDE_EVENTS, cycling number/text/date columns."""
+    definitions, values = ["EVENT_ID BIGINT PRIMARY KEY"], ["i"]
+    for c in range(1, columns + 1):
+        kind = c % 3
+        if kind == 0:
+            definitions.append(f"N{c:04d} NUMERIC(18, 4)")
+            values.append(f"CAST(MOD(i * {c + 7}, 1000000007) / 10000.0 AS DECIMAL(18, 4))")
+        elif kind == 1:
+            definitions.append(f"T{c:04d} VARCHAR(40)")
+            values.append(f"CASE WHEN MOD(i + {c}, 23) = 0 THEN NULL ELSE 'v' || CAST(MOD(i * {c}, 99991) AS VARCHAR) END")
+        else:
+            definitions.append(f"D{c:04d} DATE")
+            values.append(f"CAST('2000-01-01' AS DATE) + CAST(MOD(i + {c}, 9000) AS INTEGER)")
+    return ", ".join(definitions), ",\n           ".join(values)
+
+
+def plan_tables(rows, copies=1, wide_columns=0):
+    """Returns (table_name, column_definitions, value_expressions, row_count) for a scale."""
+    customers = max(rows // TABLE_RATIOS["CUSTOMERS"], 1)
+    accounts = max(rows // TABLE_RATIOS["ACCOUNTS"], 1)
+    sizes = {"CUSTOMERS": customers, "ACCOUNTS": accounts, "TRANSACTIONS": rows, "LOANS": max(rows // TABLE_RATIOS["LOANS"], 1)}
+
+    plan = []
+    for table, (definitions, values) in TABLES.items():
+        values = values.format(customers=customers, accounts=accounts)
+        plan.append((table, definitions, values, sizes[table]))
+        if table == "TRANSACTIONS":
+            for copy in range(2, copies + 1):
+                plan.append((f"TRANSACTIONS_{copy:03d}", definitions, values, rows))
+    if wide_columns:
+        definitions, values = wide_table_definition(wide_columns)
+        plan.append(("WIDE_EVENTS", definitions, values, rows))
+    return plan
+
+
+def drift_statements(plan, drift):
+    """
+    Statements run on the target only: a `drift` fraction of rows changed,
+    the same fraction deleted, extra NULLs, a few extra rows and one added
+    column.
+    """
+    if not drift:
+        return []
+    every = max(int(round(1 / drift)), 2)
+    names = {table for table, _, _, _ in plan}
+    statements = [
+        f"UPDATE TRANSACTIONS SET AMOUNT = AMOUNT + 1 WHERE MOD(TRANSACTION_ID, {every}) = 0",
+        f"DELETE FROM TRANSACTIONS WHERE MOD(TRANSACTION_ID, {every}) = 1",
+        f"UPDATE CUSTOMERS SET PHONE = NULL WHERE MOD(CUSTOMER_ID, {every}) = 2",
+        f"UPDATE ACCOUNTS SET ACCOUNT_TYPE = UPPER(ACCOUNT_TYPE) WHERE MOD(ACCOUNT_ID, {every}) = 3",
+        f"""INSERT INTO TRANSACTIONS (TRANSACTION_ID, ACCOUNT_ID, TRANSACTION_DATE, AMOUNT, TYPE)
+            SELECT TRANSACTION_ID + {EXTRA_ROW_OFFSET}, ACCOUNT_ID, TRANSACTION_DATE, AMOUNT, TYPE
+            FROM TRANSACTIONS WHERE MOD(TRANSACTION_ID, {every}) = 5""",
+        "ALTER TABLE LOANS ADD COLUMN MIGRATED_AT TIMESTAMP",
+    ]
+    if "WIDE_EVENTS" in names:
+        statements.append(f"UPDATE WIDE_EVENTS SET T0001 = T0001 || ' ' WHERE MOD(EVENT_ID, {every}) = 4")
+    return statements
+
+
+def _execute(conn, statement):
+    cur = conn.cursor()
+    try:
+        cur.execute(statement)
+    finally:
+        cur.close()
+    conn.commit()
+
+
+def generate(conn, source, schema, plan, chunk_rows=CHUNK_ROWS, log=None):
+    """Creates (replacing) the planned tables in `schema` and fills them."""
+    schema = schema.lower() if source == 'postgresql' else schema.upper()
+    _execute(conn, f"CREATE SCHEMA IF NOT EXISTS {schema}")
+    for table, definitions, values, count in plan:
+        started = time.time()
+        _execute(conn, f"DROP TABLE IF EXISTS {schema}.{table}")
+        _execute(conn, f"CREATE TABLE {schema}.{table} ({definitions})")
+        for start in range(1, count + 1, chunk_rows):
+            chunk = min(chunk_rows, count - start + 1)
+            _execute(conn, f"INSERT INTO {schema}.{table} SELECT {values} FROM {row_source(start, chunk, source)}")
+        if source == 'postgresql':
+            # Fresh statistics, so catalog row estimates are realistic
+            _execute(conn, f"ANALYZE {schema}.{table}")
+        if log:
+            log(f"  {source}: {schema}.{table} {count} rows in {time.time() - started:.1f}s")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.generate_data", description="Generate synthetic benchmark data.")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows in TRANSACTIONS; other tables scale from it (default: 100000)")
+    parser.add_argument("--copies", type=int, default=1, help="Number of TRANSACTIONS tables, for many-table runs (default: 1)")
+    parser.add_argument("--wide-columns", type=int, default=0, help="Also create WIDE_EVENTS with this many columns")
+    parser.add_argument("--drift", type=float, default=0.0, help="Fraction of target rows to change/delete (default: 0)")
+    parser.add_argument("--pg-database", default="migration_test_db")
+    parser.add_argument("--sf-database", default="MIGRATION_TEST_DB")
+    parser.add_argument("--schema", default="bench", help="Schema created on both sides (default: bench)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows per INSERT statement")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    plan = plan_tables(args.rows, args.copies, args.wide_columns)
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    conn_source = get_postgresql_connection(args.pg_database)
+    conn_target = get_snowflake_connection(args.sf_database)
+    try:
+        generate(conn_source, 'postgresql', args.schema, plan, args.chunk_rows, log)
+        generate(conn_target, 'snowflake', args.schema, plan, args.chunk_rows, log)
+        cur = conn_target.cursor()
+        try:
+            cur.execute(f"USE SCHEMA {args.schema.upper()}")
+        finally:
+            cur.close()
+        for statement in drift_statements(plan, args.drift):
+            _execute(conn_target, statement)
+            log(f"  drift: {statement}")
+    finally:
+        conn_source.close()
+        conn_target.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
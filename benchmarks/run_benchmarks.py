@@ -0,0 +1,313 @@
+"""
+Benchmarks the comparison paths against a schema produced by
+benchmarks.generate_data and appends the measurements to a results file,
+so runs of different versions can be compared.
+
+Measured per path: wall time, queries issued, rows and bytes returned
+(decoded result size as seen by the client), peak Python heap
+(tracemalloc, includes pandas/NumPy buffers but not Arrow's) and the
+process peak RSS.
+
+Usage:
+
+    python -m benchmarks.run_benchmarks --pg-database migration_test_db \\
+        --sf-database MIGRATION_TEST_DB --schema bench --repeat 3
+
+    # Latest result of every path against the previous git revision
+    python -m benchmarks.run_benchmarks --history
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+
+from config.postgresql_config import get_postgresql_connection
+from config.snowflake_config import get_snowflake_connection
+from scripts import data_fetcher, comparator, quality_checks
+
+DEFAULT_RESULTS_PATH = os.getenv("BENCHMARK_RESULTS_PATH", ".validation/benchmark_results.jsonl")
+
+
+class MeteredConnection:
+    """
+    Wraps a DBAPI connection and counts the queries issued and the rows and
+    bytes fetched through it. Attribute access and assignment (e.g.
+    autocommit) pass through to the wrapped connection.
+    """
+
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "queries", 0)
+        object.__setattr__(self, "rows", 0)
+        object.__setattr__(self, "bytes", 0)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        if name in ("queries", "rows", "bytes"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+    def cursor(self, *args, **kwargs):
+        return _MeteredCursor(self, self._conn.cursor(*args, **kwargs))
+
+    def reset(self):
+        self.queries = self.rows = self.bytes = 0
+
+
+class _MeteredCursor:
+    def __init__(self, meter, cur):
+        self._meter = meter
+        self._cur = cur
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __setattr__(self, name, value):
+        if name in ("_meter", "_cur"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cur, name, value)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def execute(self, *args, **kwargs):
+        self._meter.queries += 1
+        return self._cur.execute(*args, **kwargs)
+
+    def _count_rows(self, rows):
+        self._meter.rows += len(rows)
+        self._meter.bytes += sum(len(str(value)) for row in rows for value in row if value is not None)
+        return rows
+
+    def fetchall(self):
+        return self._count_rows(self._cur.fetchall())
+
+    def fetchmany(self, *args, **kwargs):
+        return self._count_rows(self._cur.fetchmany(*args, **kwargs))
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        if row is not None:
+            self._count_rows([row])
+        return row
+
+    def fetch_arrow_batches(self):
+        for table in self._cur.fetch_arrow_batches():
+            self._meter.rows += table.num_rows
+            self._meter.bytes += table.nbytes
+            yield table
+
+
+def _tables(conn_source, conn_target, pg_schema, sf_schema):
+    tables_source = data_fetcher.get_table_list(conn_source, 'postgresql', pg_schema, use_cache=False)
+    tables_target = data_fetcher.get_table_list(conn_target, 'snowflake', sf_schema, use_cache=False)
+    return comparator.compare_table_lists(tables_source, tables_target)[0]
+
+
+def _row_counts(conn_source, conn_target, tables, pg_schema, sf_schema):
+    counts_source = data_fetcher.get_schema_row_counts(conn_source, 'postgresql', pg_schema, exact=True, tables=tables)
+    counts_target = data_fetcher.get_schema_row_counts(conn_target, 'snowflake', sf_schema, tables=tables)
+    merged = counts_source.assign(key=counts_source["table_name"].str.upper()).merge(
+        counts_target.assign(key=counts_target["table_name"].str.upper()), on="key", suffixes=("_source", "_target"))
+    return {"mismatched_tables": int((merged["row_count_source"] != merged["row_count_target"]).sum())}
+
+
+def _schema_diff(conn_source, conn_target, tables, pg_schema, sf_schema):
+    columns_source = data_fetcher.get_schema_columns(conn_source, 'postgresql', pg_schema)
+    columns_target = data_fetcher.get_schema_columns(conn_target, 'snowflake', sf_schema)
+    drift = comparator.compare_schema_columns(columns_source, columns_target)["drift"]
+    return {"drift_errors": int((drift["severity"] == "error").sum()), "drift_warnings": int((drift["severity"] == "warning").sum())}
+
+
+def _profiling(conn_source, conn_target, tables, pg_schema, sf_schema):
+    duplicate_differences = 0
+    for table in tables:
+        profile_source = quality_checks.get_table_profile(conn_source, table, 'postgresql', pg_schema)
+        profile_target = quality_checks.get_table_profile(conn_target, table, 'snowflake', sf_schema)
+        duplicate_differences += profile_source["duplicate_rows"] != profile_target["duplicate_rows"]
+    return {"duplicate_differences": int(duplicate_differences)}
+
+
+def _checksums(conn_source, conn_target, tables, pg_schema, sf_schema):
+    mismatched = 0
+    for table in tables:
+        match, _ = comparator.compare_table_checksums(conn_source, conn_target, table, pg_schema, sf_schema)
+        mismatched += not match
+    return {"mismatched_tables": mismatched}
+
+
+def _bucket_diff(conn_source, conn_target, tables, pg_schema, sf_schema):
+    differences = 0
+    for table in tables:
+        key = data_fetcher.get_primary_key(conn_source, table, 'postgresql', pg_schema)
+        diff = comparator.find_mismatched_rows(conn_source, conn_target, table, pg_schema, sf_schema, key_columns=key or None)
+        differences += len(diff["differences"])
+    return {"differing_rows": differences}
+
+
+def _merge_diff(conn_source, conn_target, tables, pg_schema, sf_schema):
+    differences = 0
+    for table in tables:
+        counts = comparator.merge_compare_tables(conn_source, conn_target, table, pg_schema, sf_schema, max_differences=0)["counts"]
+        differences += sum(counts.values())
+    return {"differing_rows": differences}
+
+
+# Comparison paths, roughly from cheapest to most expensive
+PATHS = {
+    "row_counts": _row_counts,
+    "schema_diff": _schema_diff,
+    "profiling": _profiling,
+    "checksums": _checksums,
+    "bucket_diff": _bucket_diff,
+    "merge_diff": _merge_diff,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(path, conn_source, conn_target, tables, pg_schema, sf_schema):
+    """Runs one comparison path and returns its measurements."""
+    conn_source.reset()
+    conn_target.reset()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        outcome = PATHS[path](conn_source, conn_target, tables, pg_schema, sf_schema)
+    finally:
+        wall = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "path": path,
+        "wall_seconds": round(wall, 4),
+        "queries": conn_source.queries + conn_target.queries,
+        "rows_returned": conn_source.rows + conn_target.rows,
+        "bytes_returned": conn_source.bytes + conn_target.bytes,
+        "peak_python_mb": round(peak / 2 ** 20, 2),
+        "max_rss_mb": round(max_rss / 2 ** 20, 2),
+        "outcome": outcome,
+    }
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_results(path, records):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def compare_revisions(records):
+    """
+    For every (scenario, path), compares the latest revision's best wall
+    time with the previous revision's. Returns a list of dicts.
+    """
+    best = {}
+    for record in records:
+        key = (record["scenario_key"], record["path"])
+        by_revision = best.setdefault(key, {})
+        revision = record.get("git_revision") or "unknown"
+        current = by_revision.get(revision)
+        if current is None or record["wall_seconds"] < current["wall_seconds"]:
+            # Dicts keep insertion order, so revisions stay in run order
+            by_revision.pop(revision, None)
+            by_revision[revision] = record
+
+    comparisons = []
+    for (scenario_key, path), by_revision in best.items():
+        revisions = list(by_revision)
+        latest = by_revision[revisions[-1]]
+        previous = by_revision[revisions[-2]] if len(revisions) > 1 else None
+        row = {"scenario": scenario_key, "path": path, "revision": revisions[-1], "wall_seconds": latest["wall_seconds"],
+               "queries": latest["queries"], "bytes_returned": latest["bytes_returned"], "peak_python_mb": latest["peak_python_mb"]}
+        if previous:
+            row["previous_revision"] = revisions[-2]
+            row["previous_wall_seconds"] = previous["wall_seconds"]
+            row["change_pct"] = round(100 * (latest["wall_seconds"] - previous["wall_seconds"]) / previous["wall_seconds"], 1) \
+                if previous["wall_seconds"] else None
+        comparisons.append(row)
+    return comparisons
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run_benchmarks", description="Benchmark the comparison paths.")
+    parser.add_argument("--pg-database", default="migration_test_db")
+    parser.add_argument("--sf-database", default="MIGRATION_TEST_DB")
+    parser.add_argument("--schema", default="bench", help="Schema generated by benchmarks.generate_data (default: bench)")
+    parser.add_argument("--paths", nargs="+", choices=list(PATHS), default=list(PATHS))
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per path; all are stored (default: 1)")
+    parser.add_argument("--label", help="Free-form label stored with the results, e.g. the machine")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH, help=f"Results file (default: {DEFAULT_RESULTS_PATH})")
+    parser.add_argument("--history", action="store_true", help="Only print latest vs previous revision from the results file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.history:
+        for row in compare_revisions(load_results(args.results)):
+            print(json.dumps(row))
+        return 0
+
+    pg_schema, sf_schema = args.schema.lower(), args.schema.upper()
+    conn_source = MeteredConnection(get_postgresql_connection(args.pg_database))
+    conn_target = MeteredConnection(get_snowflake_connection(args.sf_database))
+    try:
+        tables = _tables(conn_source, conn_target, pg_schema, sf_schema)
+        counts = data_fetcher.get_schema_row_counts(conn_source, 'postgresql', pg_schema, tables=tables)
+        scenario = {
+            "tables": len(tables),
+            "source_rows": int(counts["row_count"].sum()),
+            "target_backend": os.getenv("SNOWFLAKE_BACKEND", "snowflake"),
+        }
+        scenario_key = f"{scenario['tables']} tables/{scenario['source_rows']} rows/{scenario['target_backend']}"
+
+        run_id = uuid.uuid4().hex
+        revision = git_revision()
+        records = []
+        for path in args.paths:
+            for attempt in range(1, args.repeat + 1):
+                result = measure(path, conn_source, conn_target, tables, pg_schema, sf_schema)
+                record = dict(result, run_id=run_id, attempt=attempt, timestamp=time.time(), git_revision=revision,
+                              label=args.label, scenario=scenario, scenario_key=scenario_key)
+                records.append(record)
+                print(f"{path:12s} #{attempt}: {result['wall_seconds']:9.3f}s  {result['queries']:6d} queries  "
+                      f"{result['bytes_returned'] / 2 ** 20:9.2f} MB  peak {result['peak_python_mb']:8.2f} MB  "
+                      f"{result['outcome']}", file=sys.stderr)
+    finally:
+        conn_source.close()
+        conn_target.close()
+
+    append_results(args.results, records)
+    print(f"Appended {len(records)} results to {args.results}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """
+    Keeps idle connections to a single database open so they can be reused
+    instead of paying connection setup on every Streamlit rerun.
+
+    Pools are created by the get_*_pool functions in the config modules and
+    kept in a module-level registry, which lives for the whole process and
+    therefore survives reruns and is shared by all sessions.
+
+    Parameters:
+    - connect (callable): Opens a new DBAPI connection.
+    - ping (callable): Takes a connection and raises if it is no longer usable.
+    - reset (callable): Optional. Takes a connection being returned to the pool
+      and clears any per-use state (e.g. an open transaction).
+    - max_idle (int): Maximum number of idle connections kept open.
+    - idle_timeout (float): Seconds after which an idle connection is closed.
+    - ping_interval (float): Connections idle for longer than this are pinged
+      before being handed out.
+
+    The pool does not cap the number of connections in use: if none is idle a
+    new one is opened, and surplus connections are closed when returned.
+    """
+
+    def __init__(self, connect, ping, reset=None, max_idle=4, idle_timeout=600, ping_interval=30):
+        self._connect = connect
+        self._ping = ping
+        self._reset = reset
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self._idle = []  # (connection, returned_at), most recently returned last
+        self._lock = threading.Lock()
+
+    def getconn(self):
+        while True:
+            with self._lock:
+                self._evict_idle_locked()
+                if not self._idle:
+                    break
+                conn, returned_at = self._idle.pop()
+
+            if time.monotonic() - returned_at < self.ping_interval:
+                return conn
+            try:
+                self._ping(conn)
+                return conn
+            except Exception:
+                _close_quietly(conn)
+
+        return self._connect()
+
+    def putconn(self, conn):
+        try:
+            if self._reset:
+                self._reset(conn)
+        except Exception:
+            _close_quietly(conn)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((conn, time.monotonic()))
+                return
+        _close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_idle_locked()
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        expired = [conn for conn, returned_at in self._idle if now - returned_at > self.idle_timeout]
+        self._idle = [(conn, returned_at) for conn, returned_at in self._idle if now - returned_at <= self.idle_timeout]
+        for conn in expired:
+            _close_quietly(conn)
+
+    def closeall(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            _close_quietly(conn)
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
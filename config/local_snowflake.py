@@ -0,0 +1,466 @@
+"""
+Local stand-in for a Snowflake account, backed by DuckDB.
+
+Used instead of snowflake.connector when SNOWFLAKE_BACKEND=local, so the app,
+the headless runner and benchmarks can run offline (CI, air-gapped boxes).
+Connections mimic the subset of the snowflake.connector API the project uses
+(cursor/execute/fetch*, fetch_pandas_all, fetch_arrow_batches, sfqid,
+execute_async and get_results_from_sfqid) and
+translate the Snowflake-specific SQL the project issues:
+
+- SHOW DATABASES / SCHEMAS / TABLES and SHOW PRIMARY KEYS / UNIQUE KEYS
+- INFORMATION_SCHEMA.TABLES (ROW_COUNT, BYTES, LAST_ALTERED) and
+  INFORMATION_SCHEMA.COLUMNS (Snowflake DATA_TYPE names)
+- TO_NUMBER(<hex>, 'XX..'), TO_CHAR/TO_VARCHAR with Snowflake formats,
+  CONVERT_TIMEZONE, COLLATE(<column>, '<spec>')
+- SAMPLE ROW/BERNOULLI/BLOCK/SYSTEM (...) [SEED (...)]
+- TABLE(GENERATOR(ROWCOUNT => n)) with SEQ4()/SEQ8() (synthetic data)
+- NUMBER/VARIANT/TIMESTAMP_* column types and CREATE/USE DATABASE in scripts
+
+Every Snowflake database is a DuckDB file <DATABASE>.duckdb in one directory
+(SNOWFLAKE_LOCAL_PATH), attached to a single in-process DuckDB instance.
+Identifiers are matched case-insensitively, as DuckDB does; create objects
+with upper-case names, as Snowflake stores unquoted identifiers.
+
+Load a Snowflake setup script with:
+
+    python -m config.local_snowflake scripts/setup_snowflake.sql
+"""
+import glob
+import os
+import re
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+
+import duckdb
+import pyarrow as pa
+
+DEFAULT_PATH = ".validation/local_snowflake"
+
+# Snowflake format elements and their strftime equivalents, longest first.
+# DuckDB timestamps have microsecond precision, so FF9 pads FF6 with zeros.
+_FORMAT_ELEMENTS = (
+    ("HH24", "%H"), ("YYYY", "%Y"), ("FF9", "%f000"), ("FF6", "%f"), ("FF3", "%g"), ("TZH:TZM", "%z"),
+    ("MM", "%m"), ("DD", "%d"), ("MI", "%M"), ("SS", "%S"),
+)
+
+_MACROS = [
+    # Only the hexadecimal format used for hashing is supported
+    "CREATE OR REPLACE MACRO to_number(s, fmt) AS CAST('0x' || s AS BIGINT)",
+    "CREATE OR REPLACE MACRO convert_timezone(tz, x) AS timezone(tz, x)",
+    "CREATE OR REPLACE MACRO sf_format(fmt) AS "
+    + "".join("replace(" for _ in _FORMAT_ELEMENTS) + "fmt"
+    + "".join(f", '{element}', '{strftime}')" for element, strftime in _FORMAT_ELEMENTS),
+    "CREATE OR REPLACE MACRO to_char(x) AS CAST(x AS VARCHAR), (x, fmt) AS strftime(x, sf_format(fmt))",
+    "CREATE OR REPLACE MACRO to_varchar(x) AS CAST(x AS VARCHAR), (x, fmt) AS strftime(x, sf_format(fmt))",
+]
+
+_TYPE_REWRITES = (
+    (re.compile(r"\bNUMBER\s*\(", re.I), "DECIMAL("),
+    (re.compile(r"\bNUMBER\b", re.I), "DECIMAL(38, 0)"),
+    (re.compile(r"\bTIMESTAMP_NTZ\b", re.I), "TIMESTAMP"),
+    (re.compile(r"\bTIMESTAMP_(TZ|LTZ)\b", re.I), "TIMESTAMPTZ"),
+    (re.compile(r"\b(VARIANT|OBJECT)\b", re.I), "JSON"),
+    # Every Snowflake floating point type is 64-bit; DuckDB FLOAT and REAL are 32-bit
+    (re.compile(r"\b(FLOAT[48]?|REAL|DOUBLE(\s+PRECISION)?)\b", re.I), "DOUBLE"),
+)
+
+# DuckDB information_schema.columns DATA_TYPE -> Snowflake DATA_TYPE
+_SNOWFLAKE_DATA_TYPE = """
+CASE
+    WHEN data_type LIKE 'DECIMAL%' OR data_type IN ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT') THEN 'NUMBER'
+    WHEN data_type IN ('FLOAT', 'DOUBLE', 'REAL') THEN 'FLOAT'
+    WHEN data_type = 'VARCHAR' THEN 'TEXT'
+    WHEN data_type = 'TIMESTAMP' THEN 'TIMESTAMP_NTZ'
+    WHEN data_type = 'TIMESTAMP WITH TIME ZONE' THEN 'TIMESTAMP_TZ'
+    WHEN data_type = 'BLOB' THEN 'BINARY'
+    WHEN data_type = 'JSON' THEN 'VARIANT'
+    ELSE data_type
+END"""
+
+_SHOW = re.compile(r"^\s*SHOW\s+(DATABASES|SCHEMAS|TABLES|PRIMARY\s+KEYS|UNIQUE\s+KEYS)(?:\s+IN\s+(?:DATABASE|SCHEMA|TABLE)\s+(.+?))?\s*$", re.I | re.S)
+_USE = re.compile(r"^\s*USE\s+(DATABASE|SCHEMA|WAREHOUSE|ROLE)\s+(.+?)\s*$", re.I | re.S)
+_CREATE_DATABASE = re.compile(r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?DATABASE\s+(?:IF\s+NOT\s+EXISTS\s+)?(.+?)\s*$", re.I | re.S)
+_SESSION = re.compile(r"^\s*ALTER\s+(SESSION|WAREHOUSE)\b", re.I)
+_INFORMATION_SCHEMA = re.compile(r"\bINFORMATION_SCHEMA\s*\.\s*(TABLES|COLUMNS)\b", re.I)
+_COLLATE_CALL = re.compile(r"\bCOLLATE\s*\(\s*([^,()]+?)\s*,\s*'[^']*'\s*\)", re.I)
+_GENERATOR = re.compile(r"\bTABLE\s*\(\s*GENERATOR\s*\(\s*ROWCOUNT\s*=>\s*(\d+)\s*\)\s*\)", re.I)
+_SEQUENCE = re.compile(r"\bSEQ[1248]\s*\(\s*\)", re.I)
+_SAMPLE = re.compile(
+    r"\b(?:SAMPLE|TABLESAMPLE)\s+(ROW|BERNOULLI|BLOCK|SYSTEM)?\s*\(\s*([\d.]+)\s*(ROWS)?\s*\)(?:\s+(?:SEED|REPEATABLE)\s*\(\s*(\d+)\s*\))?",
+    re.I
+)
+
+# One DuckDB instance per directory, shared by all connections of the process
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def _unquote(identifier):
+    identifier = identifier.strip()
+    if identifier.startswith('"') and identifier.endswith('"'):
+        return identifier[1:-1].replace('""', '"')
+    return identifier.upper()
+
+
+def _split_identifier(name):
+    return [_unquote(part) for part in re.findall(r'"(?:[^"]|"")*"|[^.]+', name)]
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class _Instance:
+    """The DuckDB instance holding every database file of one directory."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.db = duckdb.connect()
+        self.lock = threading.Lock()
+        for statement in _MACROS:
+            self.db.execute(statement)
+        for file in sorted(glob.glob(os.path.join(path, "*.duckdb"))):
+            self.attach(os.path.splitext(os.path.basename(file))[0])
+
+    def databases(self):
+        rows = self.db.execute(
+            "SELECT database_name FROM duckdb_databases() WHERE NOT internal AND database_name <> 'memory' ORDER BY 1"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def attach(self, database):
+        with self.lock:
+            if database.upper() not in {d.upper() for d in self.databases()}:
+                file = os.path.join(self.path, f"{database}.duckdb")
+                self.db.execute(f"ATTACH {_literal(file)} AS \"{database}\"")
+
+    def last_altered(self, database):
+        # DuckDB keeps no modification time per table; the database file's
+        # mtime changes whenever any table of that database is written
+        file = os.path.join(self.path, f"{database}.duckdb")
+        try:
+            return datetime.fromtimestamp(os.path.getmtime(file), timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f+00")
+        except OSError:
+            return None
+
+
+def _get_instance(path):
+    path = os.path.abspath(path)
+    with _instances_lock:
+        instance = _instances.get(path)
+        if instance is None:
+            instance = _Instance(path)
+            _instances[path] = instance
+    return instance
+
+
+class LocalSnowflakeConnection:
+    """
+    A snowflake.connector-like connection to a local DuckDB stand-in.
+
+    Parameters:
+    - path (str): Directory holding one <DATABASE>.duckdb file per database.
+    - database (str): Optional. Current database; created if missing.
+    - schema (str): Optional. Current schema.
+    - session_parameters (dict): Optional. Kept for inspection only; like
+      ALTER SESSION, they have no effect on the stand-in.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, database=None, schema=None, session_parameters=None):
+        self._instance = _get_instance(path)
+        self.user = "local"
+        self.account = f"local:{self._instance.path}"
+        self.database = database.upper() if database else None
+        self.schema = schema.upper() if schema else None
+        self.session_parameters = dict(session_parameters or {})
+        if self.database:
+            self._instance.attach(self.database)
+        self._closed = False
+        # Results of execute_async, by query id, until fetched
+        self._async_results = {}
+
+    def cursor(self):
+        if self._closed:
+            raise duckdb.ConnectionException("connection already closed")
+        return LocalSnowflakeCursor(self)
+
+    def _context(self, duck):
+        # Each cursor is its own DuckDB connection with the session's context;
+        # memory.main stays on the search path for the Snowflake function macros
+        if not self.database:
+            return
+        schema = self.schema or "main"
+        try:
+            duck.execute(f'USE "{self.database}"."{schema}"')
+        except duckdb.CatalogException:
+            schema = "main"
+            duck.execute(f'USE "{self.database}"')
+        duck.execute(f"SET search_path = {_literal(f'{self.database}.{schema},memory.main')}")
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def get_query_status_throw_if_error(self, sfqid):
+        # Asynchronous statements finish (or raise) inside execute_async
+        if sfqid not in self._async_results:
+            raise duckdb.InvalidInputException(f"No asynchronous result for query {sfqid}")
+        return "SUCCESS"
+
+    def is_still_running(self, status):
+        return False
+
+    def is_closed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+
+class LocalSnowflakeCursor:
+    """A snowflake.connector-like cursor; see LocalSnowflakeConnection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._duck = connection._instance.db.cursor()
+        connection._context(self._duck)
+        self._result = None
+        self.sfqid = None
+        self.rowcount = -1
+
+    @property
+    def description(self):
+        return self._duck.description
+
+    def execute(self, command, params=None):
+        self.sfqid = str(uuid.uuid4())
+        statement = command.strip().rstrip(";").strip()
+
+        use = _USE.match(statement)
+        create_database = _CREATE_DATABASE.match(statement)
+        if use:
+            kind, name = use.group(1).upper(), _split_identifier(use.group(2))
+            if kind == 'DATABASE':
+                self.connection._instance.attach(name[-1])
+                self.connection.database, self.connection.schema = name[-1], None
+            elif kind == 'SCHEMA':
+                if len(name) > 1:
+                    self.connection.database = name[0]
+                self.connection.schema = name[-1]
+            self.connection._context(self._duck)
+            statement = "SELECT 'Statement executed successfully.' AS \"status\""
+        elif create_database:
+            name = _split_identifier(create_database.group(1))[-1]
+            self.connection._instance.attach(name)
+            self.connection.database, self.connection.schema = name, None
+            self.connection._context(self._duck)
+            statement = f"SELECT 'Database {name} successfully created.' AS \"status\""
+        elif _SESSION.match(statement):
+            statement = "SELECT 'Statement executed successfully.' AS \"status\""
+        else:
+            statement = self._translate(statement)
+
+        self._duck.execute(statement, params)
+        self._result = self._duck
+        return self
+
+    def execute_async(self, command, params=None):
+        # Runs at once; the open result is handed to get_results_from_sfqid
+        self.execute(command, params)
+        self.connection._async_results[self.sfqid] = self._duck
+        self._duck = self.connection._instance.db.cursor()
+        self.connection._context(self._duck)
+        self._result = None
+        return {"queryId": self.sfqid}
+
+    def get_results_from_sfqid(self, sfqid):
+        duck = self.connection._async_results.pop(sfqid)
+        self._duck.close()
+        self._duck = self._result = duck
+        self.sfqid = sfqid
+
+    def _translate(self, statement):
+        show = _SHOW.match(statement)
+        if show:
+            return self._show(re.sub(r"\s+", " ", show.group(1).upper()), show.group(2))
+
+        if re.match(r"^\s*(CREATE|ALTER)\b", statement, re.I):
+            for pattern, replacement in _TYPE_REWRITES:
+                statement = pattern.sub(replacement, statement)
+            return statement
+
+        statement = _INFORMATION_SCHEMA.sub(lambda m: self._information_schema(m.group(1).upper()), statement)
+        statement = _COLLATE_CALL.sub(r"\1", statement)
+        statement = _GENERATOR.sub(r"range(\1) AS generator(seq)", statement)
+        statement = _SEQUENCE.sub("seq", statement)
+        return _SAMPLE.sub(self._sample, statement)
+
+    def _show(self, what, scope):
+        database = self.connection.database
+        if what == 'DATABASES':
+            return (
+                'SELECT NULL AS "created_on", database_name AS "name" FROM duckdb_databases() '
+                "WHERE NOT internal AND database_name <> 'memory' ORDER BY database_name"
+            )
+        if what == 'SCHEMAS':
+            if scope:
+                database = _split_identifier(scope)[-1]
+            return (
+                'SELECT NULL AS "created_on", schema_name AS "name", database_name AS "database_name" '
+                f"FROM duckdb_schemas() WHERE NOT internal AND database_name = {_literal(database)} ORDER BY schema_name"
+            )
+        if what == 'TABLES':
+            parts = _split_identifier(scope) if scope else [self.connection.schema]
+            schema_filter = f" AND upper(schema_name) = upper({_literal(parts[-1])})" if parts[-1] else ""
+            database = parts[0] if len(parts) > 1 else database
+            return (
+                'SELECT NULL AS "created_on", table_name AS "name", database_name AS "database_name", '
+                'schema_name AS "schema_name", estimated_size AS "rows" '
+                f"FROM duckdb_tables() WHERE database_name = {_literal(database)}{schema_filter} ORDER BY table_name"
+            )
+        # PRIMARY KEYS / UNIQUE KEYS IN TABLE [schema.]table
+        parts = _split_identifier(scope)
+        table = parts[-1]
+        schema = parts[-2] if len(parts) > 1 else self.connection.schema
+        constraint_type = 'PRIMARY KEY' if what == 'PRIMARY KEYS' else 'UNIQUE'
+        return (
+            'SELECT NULL AS "created_on", database_name AS "database_name", schema_name AS "schema_name", '
+            'table_name AS "table_name", constraint_column_names[i] AS "column_name", i AS "key_sequence", '
+            'constraint_name AS "constraint_name" '
+            "FROM duckdb_constraints(), range(1, len(constraint_column_names) + 1) AS r(i) "
+            f"WHERE constraint_type = {_literal(constraint_type)} AND database_name = {_literal(database)} "
+            f"AND upper(schema_name) = upper({_literal(schema)}) AND upper(table_name) = upper({_literal(table)}) "
+            "ORDER BY constraint_name, i"
+        )
+
+    def _information_schema(self, view):
+        database = _literal(self.connection.database)
+        if view == 'TABLES':
+            last_altered = self.connection._instance.last_altered(self.connection.database)
+            last_altered = f"CAST({_literal(last_altered)} AS TIMESTAMPTZ)" if last_altered else "CAST(NULL AS TIMESTAMPTZ)"
+            return (
+                "(SELECT t.database_name AS TABLE_CATALOG, t.schema_name AS TABLE_SCHEMA, t.table_name AS TABLE_NAME, "
+                "'BASE TABLE' AS TABLE_TYPE, c.row_count AS ROW_COUNT, CAST(NULL AS BIGINT) AS BYTES, "
+                f"{last_altered} AS LAST_ALTERED FROM duckdb_tables() t "
+                f"LEFT JOIN {self._row_counts()} c ON c.schema_name = t.schema_name AND c.table_name = t.table_name "
+                f"WHERE t.database_name = {database})"
+            )
+        return (
+            "(SELECT table_catalog AS TABLE_CATALOG, table_schema AS TABLE_SCHEMA, table_name AS TABLE_NAME, "
+            f"column_name AS COLUMN_NAME, ordinal_position AS ORDINAL_POSITION, {_SNOWFLAKE_DATA_TYPE} AS DATA_TYPE, "
+            "character_maximum_length AS CHARACTER_MAXIMUM_LENGTH, numeric_precision AS NUMERIC_PRECISION, "
+            "numeric_scale AS NUMERIC_SCALE, is_nullable AS IS_NULLABLE, column_default AS COLUMN_DEFAULT "
+            f"FROM information_schema.columns WHERE table_catalog = {database})"
+        )
+
+    def _row_counts(self):
+        # Snowflake's ROW_COUNT is exact, while DuckDB's estimated_size still
+        # includes deleted rows; count every table of the current database
+        tables = self._duck.execute(
+            f"SELECT schema_name, table_name FROM duckdb_tables() WHERE database_name = {_literal(self.connection.database)}"
+        ).fetchall()
+        if not tables:
+            return "(SELECT NULL AS schema_name, NULL AS table_name, CAST(NULL AS BIGINT) AS row_count WHERE FALSE)"
+        counts = " UNION ALL ".join(
+            f'SELECT {_literal(schema)} AS schema_name, {_literal(table)} AS table_name, COUNT(*) AS row_count '
+            f'FROM "{self.connection.database}"."{schema}"."{table}"'
+            for schema, table in tables
+        )
+        return f"({counts})"
+
+    @staticmethod
+    def _sample(match):
+        method, size, rows, seed = match.groups()
+        if rows:
+            return f"TABLESAMPLE {size} ROWS"
+        method = 'system' if (method or '').upper() in ('BLOCK', 'SYSTEM') else 'bernoulli'
+        seeded = f", {seed}" if seed else ""
+        return f"TABLESAMPLE {size}% ({method}{seeded})"
+
+    def fetchone(self):
+        return self._result.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._result.fetchmany(size or 1)
+
+    def fetchall(self):
+        return self._result.fetchall()
+
+    def fetch_pandas_all(self):
+        return self._result.df()
+
+    def fetch_arrow_all(self):
+        table = self._result.arrow()
+        return table if table.num_rows else None
+
+    def fetch_arrow_batches(self):
+        reader = self._result.to_arrow_reader()
+        for batch in reader:
+            if batch.num_rows:
+                yield pa.Table.from_batches([batch])
+
+    def close(self):
+        self._duck.close()
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+def connect(database=None, schema=None, path=None, session_parameters=None):
+    """Opens a connection to the local stand-in at `path` (default SNOWFLAKE_LOCAL_PATH)."""
+    return LocalSnowflakeConnection(path or os.getenv("SNOWFLAKE_LOCAL_PATH", DEFAULT_PATH), database, schema, session_parameters)
+
+
+def split_statements(script):
+    """Splits a SQL script on semicolons outside quotes and comments."""
+    statements, current = [], []
+    i, quote = 0, None
+    while i < len(script):
+        char = script[i]
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+            current.append(char)
+        elif script.startswith("--", i):
+            end = script.find("\n", i)
+            i = len(script) if end == -1 else end
+            continue
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statements.append("".join(current).strip())
+    return [s for s in statements if s]
+
+
+def load_script(path, connection=None):
+    """Runs a Snowflake SQL script (e.g. scripts/setup_snowflake.sql) against the stand-in."""
+    connection = connection or connect()
+    with open(path) as f:
+        statements = split_statements(f.read())
+    cur = connection.cursor()
+    try:
+        for statement in statements:
+            cur.execute(statement)
+    finally:
+        cur.close()
+    return len(statements)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m config.local_snowflake <script.sql> [...]")
+    for script in sys.argv[1:]:
+        count = load_script(script)
+        print(f"Ran {count} statements from {script}", file=sys.stderr)
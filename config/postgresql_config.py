@@ -1,10 +1,17 @@
 import psycopg2
 import os
+import threading
 from dotenv import load_dotenv
 
+from config.connection_pool import ConnectionPool
+
 # Load source database credentials from credentials/.env.source
 load_dotenv('credentials/.env.source')
 
+# Process-wide registry of pools, one per database
+_pools = {}
+_pools_lock = threading.Lock()
+
 def get_postgresql_connection(database=None):
     """
     Returns a connection to the source PostgreSQL database (on-premises).
@@ -26,22 +33,58 @@ def get_postgresql_connection(database=None):
     if not user or not password:
         raise ValueError("PostgreSQL credentials not found. Please ensure credentials/.env.source file exists with PG_USER and PG_PASSWORD.")
 
-    if database:
-        conn = psycopg2.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=database,
-            port=port
-        )
-    else:
+    # TCP keepalives stop firewalls/NAT from silently dropping pooled idle connections
+    conn = psycopg2.connect(
+        host=host,
+        user=user,
+        password=password,
         # Default to postgres system database if no DB specified
-        conn = psycopg2.connect(
-            host=host,
-            user=user,
-            password=password,
-            database="postgres",
-            port=port
-        )
+        database=database or "postgres",
+        port=port,
+        keepalives=1,
+        keepalives_idle=60,
+        keepalives_interval=10,
+        keepalives_count=5
+    )
 
     return conn
+
+def get_postgresql_pool(database=None):
+    """
+    Returns the process-wide connection pool for a PostgreSQL database,
+    creating it on first use.
+
+    Parameters:
+    - database (str): Optional. Defaults to the postgres system database.
+
+    Optional Environment Variables (from credentials/.env.source):
+    - PG_POOL_MAX_IDLE (default: 4): idle connections kept per database
+    - PG_POOL_IDLE_TIMEOUT (default: 600): seconds before an idle connection is closed
+    """
+    database = database or "postgres"
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None:
+            pool = ConnectionPool(
+                connect=lambda: get_postgresql_connection(database),
+                ping=_ping,
+                reset=_reset,
+                max_idle=int(os.getenv("PG_POOL_MAX_IDLE", "4")),
+                idle_timeout=float(os.getenv("PG_POOL_IDLE_TIMEOUT", "600"))
+            )
+            _pools[database] = pool
+    return pool
+
+def _ping(conn):
+    if conn.closed:
+        raise psycopg2.InterfaceError("connection already closed")
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1")
+    conn.rollback()
+
+def _reset(conn):
+    # Queries leave a transaction open; end it so pooled connections
+    # are not left idle in transaction holding a snapshot
+    if conn.closed:
+        raise psycopg2.InterfaceError("connection already closed")
+    conn.rollback()
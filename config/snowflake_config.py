@@ -1,10 +1,110 @@
-import snowflake.connector
 import os
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from config import local_snowflake
+from config.connection_pool import ConnectionPool
+
 # Load target database credentials from credentials/.env.target
 load_dotenv('credentials/.env.target')
 
+# Process-wide registry of pools, one per (database, schema)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ExecutionPolicy:
+    """
+    How the tool spends Snowflake warehouse time. Applied to every session
+    opened by get_snowflake_connection and to every statement sent through
+    scripts/data_fetcher.py.
+
+    Parameters:
+    - query_tag (str): QUERY_TAG of every session, so validation queries can
+      be found (and billed) in QUERY_HISTORY.
+    - statement_timeout (int): STATEMENT_TIMEOUT_IN_SECONDS; Snowflake
+      cancels statements running longer. 0 disables the timeout.
+    - queued_timeout (int): STATEMENT_QUEUED_TIMEOUT_IN_SECONDS; statements
+      queued on a busy warehouse for longer are cancelled. 0 disables it.
+    - max_concurrent_statements (int): Statements the process has in flight
+      at once, across all connections and threads. Statements beyond a
+      warehouse's MAX_CONCURRENCY_LEVEL (8 by default) only queue there.
+    - use_cached_result (bool): USE_CACHED_RESULT; repeated identical
+      queries on unchanged tables are answered from the result cache.
+    - poll_interval (float): First wait between status checks of
+      asynchronous statements; doubles up to max_poll_interval.
+    - max_poll_interval (float): Longest wait between status checks.
+
+    Count, MIN/MAX and INFORMATION_SCHEMA queries are issued without
+    predicates or expressions wherever possible, so Snowflake answers them
+    from micro-partition metadata instead of scanning.
+    """
+
+    def __init__(self, query_tag="data-migration-assist", statement_timeout=1800, queued_timeout=600,
+                 max_concurrent_statements=8, use_cached_result=True, poll_interval=0.1, max_poll_interval=2.0):
+        self.query_tag = query_tag
+        self.statement_timeout = statement_timeout
+        self.queued_timeout = queued_timeout
+        self.max_concurrent_statements = max_concurrent_statements
+        self.use_cached_result = use_cached_result
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._slots = threading.BoundedSemaphore(max_concurrent_statements)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds the policy from the environment (credentials/.env.target).
+
+        Optional Environment Variables:
+        - SNOWFLAKE_QUERY_TAG (default: data-migration-assist)
+        - SNOWFLAKE_STATEMENT_TIMEOUT (default: 1800)
+        - SNOWFLAKE_QUEUED_TIMEOUT (default: 600)
+        - SNOWFLAKE_MAX_CONCURRENT_STATEMENTS (default: 8)
+        - SNOWFLAKE_USE_CACHED_RESULT (default: true)
+        """
+        return cls(
+            query_tag=os.getenv("SNOWFLAKE_QUERY_TAG", "data-migration-assist"),
+            statement_timeout=int(os.getenv("SNOWFLAKE_STATEMENT_TIMEOUT", "1800")),
+            queued_timeout=int(os.getenv("SNOWFLAKE_QUEUED_TIMEOUT", "600")),
+            max_concurrent_statements=max(int(os.getenv("SNOWFLAKE_MAX_CONCURRENT_STATEMENTS", "8")), 1),
+            use_cached_result=os.getenv("SNOWFLAKE_USE_CACHED_RESULT", "true").lower() not in ("0", "false", "no")
+        )
+
+    def session_parameters(self):
+        """Session parameters set on every new connection."""
+        return {
+            "QUERY_TAG": self.query_tag,
+            "STATEMENT_TIMEOUT_IN_SECONDS": self.statement_timeout,
+            "STATEMENT_QUEUED_TIMEOUT_IN_SECONDS": self.queued_timeout,
+            "USE_CACHED_RESULT": self.use_cached_result,
+        }
+
+    def acquire_slot(self, blocking=True):
+        """
+        Takes one statement slot, waiting until fewer than
+        max_concurrent_statements statements are in flight. Returns False
+        instead of waiting when `blocking` is False and none is free.
+        """
+        return self._slots.acquire(blocking)
+
+    def release_slot(self):
+        self._slots.release()
+
+    @contextmanager
+    def statement_slot(self):
+        """Holds one statement slot for the duration of the block."""
+        self.acquire_slot()
+        try:
+            yield
+        finally:
+            self.release_slot()
+
+
+# Shared by all connections and threads of the process
+execution_policy = ExecutionPolicy.from_env()
+
 def get_snowflake_connection(database=None, schema=None):
     """
     Returns a connection to the target Snowflake database (cloud).
@@ -20,22 +120,79 @@ def get_snowflake_connection(database=None, schema=None):
     - SNOWFLAKE_WAREHOUSE (required)
     - SNOWFLAKE_DATABASE (optional)
     - SNOWFLAKE_SCHEMA (optional)
+
+    Sessions get the parameters of execution_policy (query tag, timeouts,
+    result cache), see ExecutionPolicy.
+
+    Set SNOWFLAKE_BACKEND=local to use the DuckDB stand-in in
+    config/local_snowflake.py instead (no credentials needed; data lives in
+    SNOWFLAKE_LOCAL_PATH, default .validation/local_snowflake).
     """
+    default_database = os.getenv("SNOWFLAKE_DATABASE")
+    default_schema = os.getenv("SNOWFLAKE_SCHEMA")
+
+    backend = os.getenv("SNOWFLAKE_BACKEND", "snowflake")
+    if backend == "local":
+        return local_snowflake.connect(database=database or default_database, schema=schema or default_schema,
+                                       session_parameters=execution_policy.session_parameters())
+    elif backend != "snowflake":
+        raise ValueError("Unsupported SNOWFLAKE_BACKEND. Use 'snowflake' or 'local'.")
+
     user = os.getenv("SNOWFLAKE_USER")
     password = os.getenv("SNOWFLAKE_PASSWORD")
     account = os.getenv("SNOWFLAKE_ACCOUNT")
     warehouse = os.getenv("SNOWFLAKE_WAREHOUSE")
-    default_database = os.getenv("SNOWFLAKE_DATABASE")
-    default_schema = os.getenv("SNOWFLAKE_SCHEMA")
 
     if not all([user, password, account, warehouse]):
         raise ValueError("Snowflake credentials not found. Please ensure credentials/.env.target file exists with required variables.")
 
+    # Imported here so the local stand-in works without the connector installed
+    import snowflake.connector
+
     return snowflake.connector.connect(
         user=user,
         password=password,
         account=account,
         warehouse=warehouse,
         database=database or default_database,
-        schema=schema or default_schema
+        schema=schema or default_schema,
+        session_parameters=execution_policy.session_parameters(),
+        # Keep the session token alive while the connection sits in a pool
+        client_session_keep_alive=True
     )
+
+def get_snowflake_pool(database=None, schema=None):
+    """
+    Returns the process-wide connection pool for a Snowflake database/schema,
+    creating it on first use. Reusing pooled connections avoids the
+    multi-second Snowflake login on every Streamlit rerun.
+
+    Parameters:
+    - database (str): Optional. Defaults to SNOWFLAKE_DATABASE.
+    - schema (str): Optional. Defaults to SNOWFLAKE_SCHEMA.
+
+    Optional Environment Variables (from credentials/.env.target):
+    - SNOWFLAKE_POOL_MAX_IDLE (default: 4): idle connections kept per database
+    - SNOWFLAKE_POOL_IDLE_TIMEOUT (default: 1800): seconds before an idle connection is closed
+    """
+    key = (database, schema)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                connect=lambda: get_snowflake_connection(database, schema),
+                ping=_ping,
+                max_idle=int(os.getenv("SNOWFLAKE_POOL_MAX_IDLE", "4")),
+                idle_timeout=float(os.getenv("SNOWFLAKE_POOL_IDLE_TIMEOUT", "1800"))
+            )
+            _pools[key] = pool
+    return pool
+
+def _ping(conn):
+    if conn.is_closed():
+        raise ConnectionError("connection already closed")
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT 1")
+    finally:
+        cur.close()
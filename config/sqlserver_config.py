@@ -1,30 +1,98 @@
 import pyodbc
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+import struct
+from dotenv import load_dotenv
+
+from config.connection_pool import ConnectionPool
+
+# Load source database credentials from credentials/.env.source
+load_dotenv('credentials/.env.source')
+
+# Process-wide registry of pools, one per database
+_pools = {}
+_pools_lock = threading.Lock()
+
+# ODBC type code of DATETIMEOFFSET, which pyodbc cannot convert by itself
+SQL_SS_TIMESTAMPOFFSET = -155
+
+def _datetimeoffset(value):
+    # SQL_SS_TIMESTAMPOFFSET_STRUCT: date and time fields, nanoseconds, offset hours and minutes
+    year, month, day, hour, minute, second, nanoseconds, offset_hours, offset_minutes = struct.unpack("<6hI2h", value)
+    offset = timezone(timedelta(hours=offset_hours, minutes=offset_minutes))
+    return datetime(year, month, day, hour, minute, second, nanoseconds // 1000, tzinfo=offset)
 
 def get_sqlserver_connection(database=None):
     """
-    Returns a connection to the local SQL Server instance.
-    Uses Windows Authentication.
-    
+    Returns a connection to the source SQL Server database (2019 or later).
+
     Parameters:
-    - database_name (str): Optional. If provided, connects to that specific database.
+    - database (str): Optional. If provided, connects to that specific database.
+
+    Environment Variables (from credentials/.env.source):
+    - SQLSERVER_HOST (default: localhost): host, host,port or host\\instance
+    - SQLSERVER_PORT (optional)
+    - SQLSERVER_DRIVER (default: ODBC Driver 17 for SQL Server)
+    - SQLSERVER_USER / SQLSERVER_PASSWORD (optional): SQL Server
+      authentication; Windows Authentication is used when they are not set
+    - SQLSERVER_OPTIONS (optional): extra connection string attributes,
+      e.g. "Encrypt=yes;TrustServerCertificate=yes"
     """
-    server = "MILAN\SQLEXPRESS"  # Adjust if your instance name is different
-    driver = "ODBC Driver 17 for SQL Server"  # Make sure this is installed
-
-    if database:
-        conn_str = (
-            f"DRIVER={{{driver}}};"
-            f"SERVER={server};"
-            f"DATABASE={database};"
-            "Trusted_Connection=yes;"
-        )
-    else:
+    server = os.getenv("SQLSERVER_HOST", "localhost")
+    port = os.getenv("SQLSERVER_PORT")
+    driver = os.getenv("SQLSERVER_DRIVER", "ODBC Driver 17 for SQL Server")
+    user = os.getenv("SQLSERVER_USER")
+    password = os.getenv("SQLSERVER_PASSWORD")
+
+    conn_str = (
+        f"DRIVER={{{driver}}};"
+        f"SERVER={server}{',' + port if port else ''};"
         # Default to master if no DB specified
-        conn_str = (
-            f"DRIVER={{{driver}}};"
-            f"SERVER={server};"
-            "DATABASE=master;"
-            "Trusted_Connection=yes;"
-        )
-
-    return pyodbc.connect(conn_str)
+        f"DATABASE={database or 'master'};"
+    )
+    if user and password:
+        conn_str += f"UID={user};PWD={password};"
+    else:
+        conn_str += "Trusted_Connection=yes;"
+    options = os.getenv("SQLSERVER_OPTIONS")
+    if options:
+        conn_str += options.rstrip(";") + ";"
+
+    # Read-only use: autocommit keeps pooled connections from holding locks between queries
+    conn = pyodbc.connect(conn_str, autocommit=True)
+    conn.add_output_converter(SQL_SS_TIMESTAMPOFFSET, _datetimeoffset)
+    return conn
+
+def get_sqlserver_pool(database=None):
+    """
+    Returns the process-wide connection pool for a SQL Server database,
+    creating it on first use.
+
+    Parameters:
+    - database (str): Optional. Defaults to the master system database.
+
+    Optional Environment Variables (from credentials/.env.source):
+    - SQLSERVER_POOL_MAX_IDLE (default: 4): idle connections kept per database
+    - SQLSERVER_POOL_IDLE_TIMEOUT (default: 600): seconds before an idle connection is closed
+    """
+    database = database or "master"
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None:
+            pool = ConnectionPool(
+                connect=lambda: get_sqlserver_connection(database),
+                ping=_ping,
+                max_idle=int(os.getenv("SQLSERVER_POOL_MAX_IDLE", "4")),
+                idle_timeout=float(os.getenv("SQLSERVER_POOL_IDLE_TIMEOUT", "600"))
+            )
+            _pools[database] = pool
+    return pool
+
+def _ping(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+    finally:
+        cursor.close()
@@ -1,4 +1,1056 @@
+import json
+from decimal import Decimal
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from scripts import data_fetcher
+from scripts.dialects import get_dialect, PostgreSQLDialect
+
+# Type categories whose MIN/MAX are meaningful across databases. Text MIN/MAX
+# depend on collation, which differs between PostgreSQL and Snowflake.
+ORDERED_TYPE_CATEGORIES = ('number', 'float', 'date', 'timestamp', 'timestamp_tz')
+
+# PostgreSQL data types and the Snowflake INFORMATION_SCHEMA types a faithful
+# migration maps them to. Pairs outside this map are reported as incompatible.
+# Other sources declare their own map (see Dialect.snowflake_types).
+POSTGRESQL_TO_SNOWFLAKE_TYPES = PostgreSQLDialect.snowflake_types
+
 
 def compare_row_counts(count1, count2):
-    return count1 == count2, count1, count2
\ No newline at end of file
+    return count1 == count2, count1, count2
+
+
+def compare_table_lists(tables_source, tables_target):
+    """
+    Compares table names case-insensitively (PostgreSQL uses lowercase,
+    Snowflake uppercase).
+
+    Returns (common_tables, source_only, target_only); common and source-only
+    tables use the source names, target-only tables the target names.
+    """
+    source_upper = {t.upper() for t in tables_source}
+    target_upper = {t.upper() for t in tables_target}
+    common_tables = [t for t in tables_source if t.upper() in target_upper]
+    source_only = [t for t in tables_source if t.upper() not in target_upper]
+    target_only = [t for t in tables_target if t.upper() not in source_upper]
+    return common_tables, source_only, target_only
+
+
+def get_common_columns(columns_source, columns_target):
+    """
+    Aligns two get_table_columns results by case-insensitive column name.
+
+    Returns (source_columns, target_columns): lists of (column_name, data_type)
+    for the columns present on both sides, in the same order on both sides.
+    The order is decided here rather than by the databases because PostgreSQL
+    and Snowflake collate identifiers differently.
+    """
+    source_by_name = {name.upper(): (name, data_type) for name, data_type in columns_source[['column_name', 'data_type']].itertuples(index=False)}
+    target_by_name = {name.upper(): (name, data_type) for name, data_type in columns_target[['column_name', 'data_type']].itertuples(index=False)}
+    common = sorted(set(source_by_name) & set(target_by_name))
+    return [source_by_name[c] for c in common], [target_by_name[c] for c in common]
+
+
+def build_checksum_query(columns, table_name, source='postgresql', schema='public', distinct_counts=True):
+    """
+    Builds a single aggregate query returning an order-independent content
+    fingerprint of a table: the row count, the sum of per-row hashes and,
+    per column, the non-null count, distinct count, sum of value hashes and
+    (for numeric and temporal columns) the normalized MIN/MAX.
+
+    Parameters:
+    - columns (list): (column_name, data_type) pairs, see get_common_columns.
+    - distinct_counts (bool): COUNT(DISTINCT ...) per column. Exact but the
+      most expensive part of the scan on wide tables.
+    """
+    dialect = get_dialect(source)
+    select = [
+        'COUNT(*) AS "row_count"',
+        f'COALESCE({dialect.hash_sum(data_fetcher.row_hash_expression(columns, source))}, 0) AS "row_hash_sum"',
+    ]
+    for i, (name, data_type) in enumerate(columns):
+        col = data_fetcher.quote_identifier(name, source)
+        value = data_fetcher.normalize_expression(col, data_type, source)
+        select.append(f'COUNT({col}) AS "c{i}_non_null"')
+        select.append(f'COALESCE({dialect.hash_sum(data_fetcher.hash_expression(value, source))}, 0) AS "c{i}_hash_sum"')
+        if distinct_counts:
+            select.append(f'COUNT(DISTINCT {value}) AS "c{i}_distinct"')
+        if data_fetcher.get_type_category(data_type, source) in ORDERED_TYPE_CATEGORIES:
+            select.append(f'{data_fetcher.normalize_expression(f"MIN({col})", data_type, source)} AS "c{i}_min"')
+            select.append(f'{data_fetcher.normalize_expression(f"MAX({col})", data_type, source)} AS "c{i}_max"')
+
+    select_list = ",\n        ".join(select)
+    table = data_fetcher.qualified_table_name(table_name, source, schema)
+    return f"SELECT\n        {select_list}\n    FROM {table}"
+
+
+def get_table_checksum(conn, table_name, columns, source='postgresql', schema='public', distinct_counts=True):
+    """
+    Runs build_checksum_query and returns a dict with 'row_count',
+    'row_hash_sum' and 'columns', a DataFrame indexed by upper-cased column
+    name with non_null, distinct, hash_sum, min and max.
+    """
+    query = build_checksum_query(columns, table_name, source, schema, distinct_counts)
+    # Hash sums exceed float precision; keep the exact Decimal/int values
+    row = data_fetcher.run_query(conn, query, coerce_float=False).iloc[0]
+    return _parse_checksum_row(row, columns, distinct_counts)
+
+
+def get_table_checksums(conn, tables, source='postgresql', schema='public', distinct_counts=True):
+    """
+    get_table_checksum for several tables over one connection, through
+    data_fetcher.run_queries: on Snowflake all checksum queries are in
+    flight at once (up to the execution policy's statement limit).
+
+    Parameters:
+    - tables (list): (table_name, columns) pairs.
+
+    Returns a dict of table name to get_table_checksum result.
+    """
+    queries = [build_checksum_query(columns, table_name, source, schema, distinct_counts) for table_name, columns in tables]
+    results = data_fetcher.run_queries(conn, queries, coerce_float=False)
+    return {
+        table_name: _parse_checksum_row(df.iloc[0], columns, distinct_counts)
+        for (table_name, columns), df in zip(tables, results)
+    }
+
+
+def _parse_checksum_row(row, columns, distinct_counts):
+    column_stats = []
+    for i, (name, _) in enumerate(columns):
+        column_stats.append({
+            "column_name": name.upper(),
+            "non_null": int(row[f"c{i}_non_null"]),
+            "distinct": int(row[f"c{i}_distinct"]) if distinct_counts else None,
+            "hash_sum": int(row[f"c{i}_hash_sum"]),
+            "min": row.get(f"c{i}_min"),
+            "max": row.get(f"c{i}_max"),
+        })
+
+    return {
+        "row_count": int(row["row_count"]),
+        "row_hash_sum": int(row["row_hash_sum"]),
+        "columns": pd.DataFrame(column_stats, columns=["column_name", "non_null", "distinct", "hash_sum", "min", "max"]).set_index("column_name"),
+    }
+
+
+def compare_checksums(checksum_source, checksum_target):
+    """
+    Compares two get_table_checksum results.
+
+    Returns (match, column_comparison): match is True when the row counts and
+    row hash sums agree; column_comparison has one row per column with the
+    statistics from both sides and a 'Match' flag.
+    """
+    match = (
+        checksum_source["row_count"] == checksum_target["row_count"]
+        and checksum_source["row_hash_sum"] == checksum_target["row_hash_sum"]
+    )
+
+    source_stats = checksum_source["columns"]
+    target_stats = checksum_target["columns"]
+    column_comparison = source_stats.add_prefix("source_").join(target_stats.add_prefix("target_"), how="outer")
+
+    column_match = pd.Series(True, index=column_comparison.index)
+    for stat in ("non_null", "distinct", "hash_sum", "min", "max"):
+        left = column_comparison[f"source_{stat}"]
+        right = column_comparison[f"target_{stat}"]
+        column_match &= (left == right) | (left.isna() & right.isna())
+    column_comparison["Match"] = column_match
+
+    return match, column_comparison.reset_index().rename(columns={"column_name": "Column Name"})
+
+
+def compare_table_checksums(conn_source, conn_target, table_name, source_schema='public', target_schema='public', distinct_counts=True,
+                            source='postgresql'):
+    """
+    Full-content comparison of one table between a source database (see
+    scripts/dialects.py, PostgreSQL by default) and Snowflake (target). Each side is scanned once and only a single row of
+    aggregates is transferred, regardless of table size.
+
+    Only columns present on both sides are fingerprinted; use the schema
+    comparison to catch missing columns.
+
+    Returns (match, column_comparison), see compare_checksums.
+    """
+    columns_source = data_fetcher.get_table_columns(conn_source, table_name, source, source_schema)
+    columns_target = data_fetcher.get_table_columns(conn_target, table_name, 'snowflake', target_schema)
+    common_source, common_target = get_common_columns(columns_source, columns_target)
+
+    checksum_source = get_table_checksum(conn_source, table_name, common_source, source, source_schema, distinct_counts)
+    checksum_target = get_table_checksum(conn_target, table_name, common_target, 'snowflake', target_schema, distinct_counts)
+    return compare_checksums(checksum_source, checksum_target)
+
+
+# --- Recursive bucketed diff ---
+
+def _sql_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _key_text_expression(key_columns, source):
+    dialect = get_dialect(source)
+    parts = [
+        f"COALESCE({data_fetcher.normalized_value_expression(name, data_type, source)}, {dialect.null_marker})"
+        for name, data_type in key_columns
+    ]
+    if len(parts) == 1:
+        return parts[0]
+    return dialect.concat_ws(parts)
+
+
+def _bucket_expression(key_columns, source, mode, level, fanout, key_range):
+    # Level 0 is the whole table; level n splits every level n-1 bucket into
+    # `fanout` children, so bucket ids of consecutive levels nest exactly.
+    if mode == 'hash':
+        modulus = fanout ** level
+        key_hash = data_fetcher.hash_expression(_key_text_expression(key_columns, source), source)
+        return get_dialect(source).modulo(key_hash, modulus)
+    elif mode == 'range':
+        # Levels past range_levels split each range bucket by key hash (see
+        # find_mismatched_rows); child ids stay unique to their parent
+        low, top_width, range_levels = key_range
+        range_level = level if range_levels is None else min(level, range_levels)
+        width = max(top_width // (fanout ** range_level), 1)
+        key = data_fetcher.quote_identifier(key_columns[0][0], source)
+        bucket = f"FLOOR(({key} - {low}) / {width})"
+        if range_levels is None or level <= range_levels:
+            return bucket
+        modulus = fanout ** (level - range_levels)
+        key_hash = data_fetcher.hash_expression(_key_text_expression(key_columns, source), source)
+        return f"{bucket} * {modulus} + {get_dialect(source).modulo(key_hash, modulus)}"
+    else:
+        raise ValueError("Unsupported bucket mode. Use 'hash' or 'range'.")
+
+
+def _select_columns(common_source, common_target, names, table_name):
+    wanted = {name.upper() for name in names}
+    selected_source = [c for c in common_source if c[0].upper() in wanted]
+    selected_target = [c for c in common_target if c[0].upper() in wanted]
+    if len(selected_source) != len(wanted):
+        raise ValueError(f"Columns {sorted(wanted)} are not present on both sides of {table_name}.")
+    return selected_source, selected_target
+
+
+def _in_list(values):
+    return ", ".join(str(int(v)) for v in values)
+
+
+def _get_bucket_digests(conn, table_name, columns, key_columns, source, schema, mode, level, fanout, key_range, parent_buckets):
+    bucket = _bucket_expression(key_columns, source, mode, level, fanout, key_range)
+    query = f"""
+    SELECT {bucket} AS "bucket", COUNT(*) AS "row_count",
+           COALESCE({get_dialect(source).hash_sum(data_fetcher.row_hash_expression(columns, source))}, 0) AS "hash_sum"
+    FROM {data_fetcher.qualified_table_name(table_name, source, schema)}
+    """
+    if parent_buckets is not None:
+        parent = _bucket_expression(key_columns, source, mode, level - 1, fanout, key_range)
+        query += f"WHERE {parent} IN ({_in_list(parent_buckets)})\n"
+    # SQL Server cannot group by position
+    query += f"GROUP BY {bucket}"
+
+    df = data_fetcher.run_query(conn, query, coerce_float=False)
+    return {int(b): (int(c), int(h)) for b, c, h in df[['bucket', 'row_count', 'hash_sum']].itertuples(index=False)}
+
+
+def _get_leaf_row_hashes(conn, table_name, columns, key_columns, source, schema, mode, level, fanout, key_range, buckets):
+    bucket = _bucket_expression(key_columns, source, mode, level, fanout, key_range)
+    query = f"""
+    SELECT {_key_text_expression(key_columns, source)} AS "key",
+           {data_fetcher.row_hash_expression(columns, source)} AS "row_hash"
+    FROM {data_fetcher.qualified_table_name(table_name, source, schema)}
+    WHERE {bucket} IN ({_in_list(buckets)})
+    """
+    # Leaf sets can be large when max_leaf_rows is raised, so stream them
+    table = data_fetcher.read_query_arrow(conn, query, source)
+    if table is None:
+        return pd.DataFrame(columns=["key", "row_hash"])
+    df = table.to_pandas()
+    df['row_hash'] = df['row_hash'].astype(object).map(int)
+    return df
+
+
+def _get_rows_by_key(conn, table_name, key_columns, source, schema, keys):
+    if not keys:
+        return pd.DataFrame()
+    query = f"""
+    SELECT {_key_text_expression(key_columns, source)} AS "_key", t.*
+    FROM {data_fetcher.qualified_table_name(table_name, source, schema)} t
+    WHERE {_key_text_expression(key_columns, source)} IN ({', '.join(_sql_literal(k) for k in keys)})
+    """
+    return data_fetcher.run_query(conn, query)
+
+
+def _get_combined_key_bounds(conn_source, conn_target, table_name, key_source, key_target, source_schema, target_schema, source):
+    bounds = []
+    for conn, key, side, schema in ((conn_source, key_source, source, source_schema), (conn_target, key_target, 'snowflake', target_schema)):
+        side_bounds = data_fetcher.get_key_bounds(conn, table_name, key, side, schema)
+        if side_bounds is not None:
+            bounds.extend(side_bounds)
+    if not bounds:
+        return None
+    return min(bounds), max(bounds)
+
+
+def _get_key_range(conn_source, conn_target, table_name, key_source, key_target, source_schema, target_schema, fanout, source):
+    bounds = _get_combined_key_bounds(conn_source, conn_target, table_name, key_source, key_target, source_schema, target_schema, source)
+    if bounds is None:
+        return 0, 1, None
+    low, high = int(bounds[0]), int(bounds[1])
+    # The top-level width is a power of the fanout so that every level splits
+    # its parent into exactly `fanout` integer-width children.
+    width = 1
+    while width <= high - low:
+        width *= fanout
+    # (low, top-level width, number of range levels before hash splitting; None while undecided)
+    return low, width, None
+
+
+def find_mismatched_rows(conn_source, conn_target, table_name, source_schema='public', target_schema='public',
+                         key_columns=None, mode='hash', fanout=16, max_leaf_rows=1000, max_depth=8, max_buckets=4096,
+                         source='postgresql'):
+    """
+    Locates the rows that differ between the source database and Snowflake
+    (target) with a Merkle-style drill-down: rows are grouped into buckets by
+    key, per-bucket (count, hash sum) digests are compared on both sides, and
+    only mismatching buckets are split further. Once the mismatching buckets
+    hold at most `max_leaf_rows` rows, per-row hashes are fetched for those
+    buckets only, and finally the full differing rows.
+
+    Parameters:
+    - key_columns (list): Optional. Column names identifying a row. Defaults
+      to all common columns, in which case a changed row is reported as one
+      missing and one extra row.
+    - mode (str): 'hash' buckets by MOD of the key hash and works with any
+      key; 'range' buckets by ranges of a single numeric key column. Ranges
+      are equal-width, so skewed keys (e.g. a few outliers far from the
+      rest) leave most rows in one bucket; once a range level puts more than
+      half of the rows still searched into one bucket, the following levels
+      split each range bucket by key hash instead.
+    - fanout (int): Number of child buckets each mismatching bucket is split into.
+    - max_leaf_rows (int): Row budget for the final per-row hash fetch.
+    - max_depth (int): Maximum number of split levels.
+    - max_buckets (int): Stop drilling down when more buckets than this
+      mismatch (the tables differ almost everywhere).
+    - source (str): Source database type, see scripts/dialects.py.
+
+    Returns a dict with:
+    - 'differences': DataFrame of key and status ('missing_in_target',
+      'extra_in_target' or 'changed').
+    - 'source_rows' / 'target_rows': the full differing rows from each side.
+    - 'levels': DataFrame of buckets compared and mismatched per level.
+    - 'complete': False if the drill-down stopped before isolating rows.
+    """
+    columns_source = data_fetcher.get_table_columns(conn_source, table_name, source, source_schema)
+    columns_target = data_fetcher.get_table_columns(conn_target, table_name, 'snowflake', target_schema)
+    common_source, common_target = get_common_columns(columns_source, columns_target)
+
+    if key_columns:
+        key_source, key_target = _select_columns(common_source, common_target, key_columns, table_name)
+    else:
+        key_source, key_target = common_source, common_target
+
+    key_range = None
+    if mode == 'range':
+        if len(key_source) != 1 or data_fetcher.get_type_category(key_source[0][1], source) != 'number':
+            raise ValueError("Range bucketing needs a single numeric key column.")
+        key_range = _get_key_range(conn_source, conn_target, table_name, key_source[0][0], key_target[0][0],
+                                   source_schema, target_schema, fanout, source)
+
+    sides = (
+        (conn_source, common_source, key_source, source, source_schema),
+        (conn_target, common_target, key_target, 'snowflake', target_schema),
+    )
+
+    levels = []
+    mismatched = None
+    searched_rows = None
+    complete = True
+    level = 0
+    while True:
+        level += 1
+        digests = [
+            _get_bucket_digests(conn, table_name, columns, keys, side, schema, mode, level, fanout, key_range, mismatched)
+            for conn, columns, keys, side, schema in sides
+        ]
+        buckets = set(digests[0]) | set(digests[1])
+        mismatched = sorted(b for b in buckets if digests[0].get(b) != digests[1].get(b))
+        bucket_rows = {b: max(digests[0].get(b, (0, 0))[0], digests[1].get(b, (0, 0))[0]) for b in buckets}
+        leaf_rows = sum(bucket_rows[b] for b in mismatched)
+        levels.append({"level": level, "buckets_compared": len(buckets), "buckets_mismatched": len(mismatched), "rows_in_mismatched": leaf_rows})
+
+        if not mismatched or leaf_rows <= max_leaf_rows:
+            break
+        if level >= max_depth or len(mismatched) > max_buckets:
+            complete = False
+            break
+        if mode == 'range' and key_range[2] is None:
+            if searched_rows is None:
+                searched_rows = sum(bucket_rows.values())
+            if max(bucket_rows[b] for b in mismatched) > searched_rows / 2:
+                # This range split did not spread the rows; hash from here on
+                key_range = (key_range[0], key_range[1], level)
+            elif key_range[1] // (fanout ** level) <= 1:
+                break
+        searched_rows = leaf_rows
+
+    differences = pd.DataFrame(columns=["key", "status"])
+    source_rows = target_rows = pd.DataFrame()
+    if mismatched and complete:
+        hashes_source, hashes_target = [
+            _get_leaf_row_hashes(conn, table_name, columns, keys, side, schema, mode, level, fanout, key_range, mismatched)
+            for conn, columns, keys, side, schema in sides
+        ]
+        merged = hashes_source.merge(hashes_target, on="key", how="outer", suffixes=("_source", "_target"), indicator=True)
+        merged["status"] = merged["_merge"].map({"left_only": "missing_in_target", "right_only": "extra_in_target", "both": "changed"})
+        merged = merged[(merged["_merge"] != "both") | (merged["row_hash_source"] != merged["row_hash_target"])]
+        differences = merged[["key", "status"]].reset_index(drop=True)
+
+        keys = differences["key"].tolist()
+        source_rows = _get_rows_by_key(conn_source, table_name, key_source, source, source_schema, keys)
+        target_rows = _get_rows_by_key(conn_target, table_name, key_target, 'snowflake', target_schema, keys)
+
+    return {
+        "differences": differences,
+        "source_rows": source_rows,
+        "target_rows": target_rows,
+        "levels": pd.DataFrame(levels),
+        "complete": complete,
+    }
+
+
+def _sort_expression(column, data_type, source):
+    # Both sides must return keys in the same order as Python compares them:
+    # text by code point (UTF-8 byte order), not by the database collation,
+    # and NULLs (unique keys may hold them) after all other values
+    identifier = data_fetcher.quote_identifier(column, source)
+    if data_fetcher.get_type_category(data_type, source) == 'text':
+        identifier = get_dialect(source).binary_sort(identifier)
+    return get_dialect(source).nulls_last(identifier)
+
+
+class _NullKey:
+    # Stands in for NULL key values during the merge: equal to itself and
+    # greater than any other value, the order both sides sort keys in
+    def __eq__(self, other):
+        return isinstance(other, _NullKey)
+
+    def __hash__(self):
+        return 0
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return not isinstance(other, _NullKey)
+
+
+_NULL_KEY = _NullKey()
+
+
+def _key_converter(data_type, source):
+    if data_fetcher.get_type_category(data_type, source) in ('number', 'float'):
+        # PostgreSQL NUMERIC without a declared precision arrives as text
+        convert = lambda value: value if isinstance(value, (int, float)) else Decimal(value)
+    else:
+        convert = lambda value: value
+    return lambda value: _NULL_KEY if value is None else convert(value)
+
+
+def _key_values(key):
+    return tuple(None if value is _NULL_KEY else value for value in key)
+
+
+def _iter_sorted_row_hashes(conn, table_name, columns, key_columns, source, schema, batch_size):
+    select = [f'{data_fetcher.quote_identifier(name, source)} AS "k{i}"' for i, (name, _) in enumerate(key_columns)]
+    select.append(f'{data_fetcher.row_hash_expression(columns, source)} AS "row_hash"')
+    order_by = ", ".join(_sort_expression(name, data_type, source) for name, data_type in key_columns)
+    query = f"""
+    SELECT {', '.join(select)}
+    FROM {data_fetcher.qualified_table_name(table_name, source, schema)}
+    ORDER BY {order_by}
+    """
+    converters = [_key_converter(data_type, source) for _, data_type in key_columns]
+    for batch in data_fetcher.iter_query_batches(conn, query, source, batch_size):
+        keys = zip(*[map(convert, batch.column(i).to_pylist()) for i, convert in enumerate(converters)])
+        yield from zip(keys, batch.column(len(converters)).to_pylist())
+
+
+def _resolve_key_columns(conn_source, conn_target, table_name, common_source, common_target, key_columns, source_schema, target_schema, source):
+    key_columns = (key_columns
+                   or data_fetcher.get_primary_key(conn_source, table_name, source, source_schema)
+                   or data_fetcher.get_primary_key(conn_target, table_name, 'snowflake', target_schema))
+    if not key_columns:
+        raise ValueError(f"No key columns given and no primary or unique key found for {table_name}.")
+    return _select_columns(common_source, common_target, key_columns, table_name)
+
+
+def iter_key_differences(conn_source, conn_target, table_name, source_schema='public', target_schema='public',
+                         key_columns=None, batch_size=data_fetcher.STREAM_BATCH_SIZE, source='postgresql'):
+    """
+    Streams both tables ordered by key and merge-joins them, yielding
+    (key, status) for every row that differs; status is 'missing_in_target',
+    'extra_in_target' or 'changed'. Rows are compared by a hash of all
+    common columns computed in SQL.
+
+    Both sides are read in chunks of `batch_size` rows and each row is
+    visited once, so memory use stays bounded regardless of table size.
+
+    Parameters:
+    - key_columns (list): Optional. Column names uniquely identifying a row.
+      Defaults to the primary key (or first unique constraint) of the
+      source table, then of the Snowflake table.
+    - source (str): Source database type, see scripts/dialects.py.
+    """
+    columns_source = data_fetcher.get_table_columns(conn_source, table_name, source, source_schema)
+    columns_target = data_fetcher.get_table_columns(conn_target, table_name, 'snowflake', target_schema)
+    common_source, common_target = get_common_columns(columns_source, columns_target)
+    key_source, key_target = _resolve_key_columns(conn_source, conn_target, table_name, common_source, common_target,
+                                                  key_columns, source_schema, target_schema, source)
+
+    rows_source = _iter_sorted_row_hashes(conn_source, table_name, common_source, key_source, source, source_schema, batch_size)
+    rows_target = _iter_sorted_row_hashes(conn_target, table_name, common_target, key_target, 'snowflake', target_schema, batch_size)
+
+    row_source = next(rows_source, None)
+    row_target = next(rows_target, None)
+    while row_source is not None or row_target is not None:
+        if row_target is None or (row_source is not None and row_source[0] < row_target[0]):
+            yield _key_values(row_source[0]), 'missing_in_target'
+            row_source = next(rows_source, None)
+        elif row_source is None or row_target[0] < row_source[0]:
+            yield _key_values(row_target[0]), 'extra_in_target'
+            row_target = next(rows_target, None)
+        else:
+            if row_source[1] != row_target[1]:
+                yield _key_values(row_source[0]), 'changed'
+            row_source = next(rows_source, None)
+            row_target = next(rows_target, None)
+
+
+def merge_compare_tables(conn_source, conn_target, table_name, source_schema='public', target_schema='public',
+                         key_columns=None, batch_size=data_fetcher.STREAM_BATCH_SIZE, max_differences=1000, source='postgresql'):
+    """
+    Runs iter_key_differences to completion and summarizes it.
+
+    Returns a dict with:
+    - 'counts': dict of number of rows per status.
+    - 'differences': DataFrame of key and status for the first
+      `max_differences` differing rows.
+    """
+    counts = {'missing_in_target': 0, 'extra_in_target': 0, 'changed': 0}
+    differences = []
+    for key, status in iter_key_differences(conn_source, conn_target, table_name, source_schema, target_schema,
+                                            key_columns, batch_size, source):
+        counts[status] += 1
+        if len(differences) < max_differences:
+            differences.append({"key": key[0] if len(key) == 1 else key, "status": status})
+    return {"counts": counts, "differences": pd.DataFrame(differences, columns=["key", "status"])}
+
+
+# --- Parallel chunked diff ---
+
+def _chunk_row_hashes_query(table_name, columns, key_columns, source, schema, where):
+    query = f"""
+    SELECT {_key_text_expression(key_columns, source)} AS "key",
+           {data_fetcher.row_hash_expression(columns, source)} AS "row_hash"
+    FROM {data_fetcher.qualified_table_name(table_name, source, schema)}
+    """
+    if where:
+        query += f"WHERE {where}\n"
+    return query
+
+
+def _chunk_row_hashes(batches):
+    names = ["key", "row_hash"]
+    if not batches:
+        return pa.table({"key": pa.array([], pa.string()), "row_hash": pa.array([], pa.int64())})
+    table = pa.Table.from_batches(batches)
+    # Snowflake returns the hashes as NUMBER(38,0)
+    return pa.table([table.column(0).cast(pa.string()), table.column(1).cast(pa.int64())], names=names)
+
+
+def _diff_chunk(batches_source, batches_target):
+    joined = _chunk_row_hashes(batches_source).join(_chunk_row_hashes(batches_target), keys="key", join_type="full outer",
+                                                   left_suffix="_source", right_suffix="_target")
+    hash_source, hash_target = joined["row_hash_source"], joined["row_hash_target"]
+    masks = {
+        "missing_in_target": pc.is_null(hash_target),
+        "extra_in_target": pc.is_null(hash_source),
+        "changed": pc.fill_null(pc.not_equal(hash_source, hash_target), False),
+    }
+    return {status: pc.filter(joined["key"], mask) for status, mask in masks.items()}
+
+
+def parallel_compare_tables(pool_source, pool_target, table_name, source_schema='public', target_schema='public',
+                            key_columns=None, chunks=16, method='hash', workers_per_database=4,
+                            batch_size=data_fetcher.STREAM_BATCH_SIZE, max_differences=1000, checkpoint=None,
+                            source='postgresql'):
+    """
+    Finds the rows that differ between the source database and Snowflake
+    (target) like merge_compare_tables, but splits both tables into chunks
+    covering the same keys on both sides (see data_fetcher.get_chunk_predicates)
+    and fetches the chunks concurrently over the connection pools.
+
+    Chunks are compared as soon as both sides of a chunk have arrived, in any
+    order, by joining their (key, row hash) pairs, so memory use is bounded by
+    the chunks in flight rather than the table size, and nothing needs to be
+    sorted. Throughput grows with `workers_per_database` until one of the
+    databases or the network is saturated.
+
+    Parameters:
+    - key_columns (list): Optional. Column names uniquely identifying a row.
+      Defaults to the primary key (or first unique constraint) of the
+      source table, then of the Snowflake table.
+    - chunks (int): Number of chunks per table; make chunks small enough that
+      a few of them fit in memory.
+    - method (str): 'hash' (any key) or 'key_range' (a single numeric key
+      split over the combined range of both sides). 'ctid' chunks cannot be
+      matched between the two databases and are not supported here.
+    - workers_per_database (int): Concurrent chunk queries per database.
+    - checkpoint (JobCheckpoint): Optional. Every compared chunk is recorded
+      in it (see scripts/jobs.py), and chunks it already holds for the same
+      source type, databases, table, schemas, key and chunking are not
+      fetched again, so an interrupted diff resumes where it stopped.
+    - source (str): Source database type, see scripts/dialects.py.
+
+    Returns a dict with:
+    - 'counts': dict of number of rows per status ('missing_in_target',
+      'extra_in_target' or 'changed').
+    - 'differences': DataFrame of key (the key values as text, joined by
+      ASCII unit separators for composite keys) and status for the first `max_differences`
+      differing rows.
+    - 'chunks': number of chunks compared.
+    """
+    if method not in ('hash', 'key_range'):
+        raise ValueError("Unsupported chunk method for comparison. Use 'hash' or 'key_range'.")
+
+    with pool_source.connection() as conn_source, pool_target.connection() as conn_target:
+        columns_source = data_fetcher.get_table_columns(conn_source, table_name, source, source_schema)
+        columns_target = data_fetcher.get_table_columns(conn_target, table_name, 'snowflake', target_schema)
+        common_source, common_target = get_common_columns(columns_source, columns_target)
+        key_source, key_target = _resolve_key_columns(conn_source, conn_target, table_name, common_source, common_target,
+                                                      key_columns, source_schema, target_schema, source)
+        key_range = None
+        if method == 'key_range':
+            if len(key_source) != 1:
+                raise ValueError("Key range chunks need a single numeric key column.")
+            key_range = _get_combined_key_bounds(conn_source, conn_target, table_name, key_source[0][0], key_target[0][0],
+                                                 source_schema, target_schema, source)
+        predicates_source = data_fetcher.get_chunk_predicates(conn_source, table_name, source, source_schema, chunks,
+                                                              method, key_source, key_range)
+        predicates_target = data_fetcher.get_chunk_predicates(conn_target, table_name, 'snowflake', target_schema, chunks,
+                                                              method, key_target, key_range)
+        # Server, user and database of each side, so checkpointed chunks are
+        # only reused for the same pair of databases
+        targets = [data_fetcher.get_connection_target(conn_source), data_fetcher.get_connection_target(conn_target)]
+
+    counts = {'missing_in_target': 0, 'extra_in_target': 0, 'changed': 0}
+    differences = []
+
+    def add_chunk(chunk_counts, chunk_differences):
+        for status, keys in chunk_differences.items():
+            counts[status] += chunk_counts[status]
+            room = max_differences - len(differences)
+            differences.extend({"key": key, "status": status} for key in keys[:max(room, 0)])
+
+    completed = {}
+    scope = None
+    if checkpoint is not None:
+        scope = json.dumps([source, *targets, table_name.upper(), source_schema, target_schema,
+                            [name.upper() for name, _ in key_source], method, chunks])
+        completed = checkpoint.completed_chunks(scope)
+        for chunk_counts, chunk_differences in completed.values():
+            add_chunk(chunk_counts, chunk_differences)
+
+    # Interleave the sides so both databases always have work in flight;
+    # task 2 * i is the i-th remaining chunk on the source and 2 * i + 1 on Snowflake
+    chunk_ids = [chunk for chunk in range(len(predicates_source)) if chunk not in completed]
+    tasks = []
+    for chunk in chunk_ids:
+        where_source, where_target = predicates_source[chunk], predicates_target[chunk]
+        tasks.append((pool_source, _chunk_row_hashes_query(table_name, common_source, key_source, source, source_schema, where_source), source))
+        tasks.append((pool_target, _chunk_row_hashes_query(table_name, common_target, key_target, 'snowflake', target_schema, where_target), 'snowflake'))
+
+    pending = {}
+    for index, batch in data_fetcher.iter_parallel_query_batches(tasks, 2 * workers_per_database, batch_size):
+        position, side = divmod(index, 2)
+        chunk = chunk_ids[position]
+        state = pending.setdefault(chunk, {"batches": ([], []), "done": [False, False]})
+        if batch is not None:
+            state["batches"][side].append(batch)
+            continue
+        state["done"][side] = True
+        if not all(state["done"]):
+            continue
+        del pending[chunk]
+        chunk_diff = _diff_chunk(*state["batches"])
+        chunk_counts = {status: len(keys) for status, keys in chunk_diff.items()}
+        # Only as many keys per status as could ever be reported are kept
+        chunk_differences = {status: keys.slice(0, max_differences).to_pylist() for status, keys in chunk_diff.items()}
+        add_chunk(chunk_counts, chunk_differences)
+        if checkpoint is not None:
+            checkpoint.record_chunk(scope, chunk, chunk_counts, chunk_differences)
+
+    return {
+        "counts": counts,
+        "differences": pd.DataFrame(differences, columns=["key", "status"]),
+        "chunks": len(predicates_source),
+    }
+
+
+def is_type_compatible(source_type, target_type, source='postgresql'):
+    """
+    True when a source column type is migrated to an expected Snowflake
+    type (see POSTGRESQL_TO_SNOWFLAKE_TYPES and Dialect.snowflake_types).
+    Unknown source types are accepted when both sides normalize to the same
+    category.
+    """
+    source_type, target_type = source_type.upper(), target_type.upper()
+    type_map = get_dialect(source).snowflake_types
+    if source_type in type_map:
+        return target_type in type_map[source_type]
+    return data_fetcher.get_type_category(source_type, source) == data_fetcher.get_type_category(target_type)
+
+
+# --- Schema drift ---
+
+# Decimal digits each PostgreSQL integer type needs in a Snowflake NUMBER
+# (other sources: Dialect.integer_digits)
+INTEGER_DIGITS = PostgreSQLDialect.integer_digits
+
+# Drift kinds that leave a migrated column unable to hold the source data
+# (or missing); the others are reported as warnings
+SCHEMA_DRIFT_ERRORS = ('missing_in_target', 'extra_in_target', 'renamed', 'type_mismatch', 'precision_loss')
+
+SCHEMA_DRIFT_COLUMNS = ["table", "column", "kind", "severity", "source", "target"]
+
+
+def _types_compatible(source_types, target_types, source):
+    # Vectorized is_type_compatible
+    type_map = get_dialect(source).snowflake_types
+    allowed = pd.MultiIndex.from_tuples(
+        [(s, t) for s, targets in type_map.items() for t in targets]
+    )
+    pairs = pd.MultiIndex.from_arrays([source_types, target_types])
+    source_categories = {t: data_fetcher.get_type_category(t, source) for t in pd.unique(source_types)}
+    target_categories = {t: data_fetcher.get_type_category(t) for t in pd.unique(target_types)}
+    same_category = source_types.map(source_categories) == target_types.map(target_categories)
+    return pd.Series(pairs.isin(allowed), index=source_types.index).where(source_types.isin(type_map), same_category)
+
+
+def _normalize_defaults(defaults):
+    # Spell equivalent defaults of all dialects the same way
+    text = defaults.fillna("").astype(str).str.strip().str.lower()
+    text = text.str.replace(r"::[a-z_ ]+(\[\])?(\(\d+(,\s*\d+)?\))?", "", regex=True)  # PostgreSQL casts
+    # SQL Server wraps defaults in one or two pairs of parentheses, e.g. ((0))
+    text = text.str.replace(r"^\((.*)\)$", r"\1", regex=True)
+    text = text.str.replace(r"^\((.*)\)$", r"\1", regex=True)
+    text = text.str.replace(r"^n'", "'", regex=True)  # SQL Server unicode literals
+    text = text.mask(text.str.contains(r"nextval\(|\.nextval$", regex=True), "<sequence>")
+    return text.str.replace(r"^(now\(\)|current_timestamp(\(\))?|getdate\(\)|sysdatetime\(\))$", "current_timestamp", regex=True)
+
+
+def _prepare_schema_columns(columns):
+    df = columns[["table_name", "column_name", "data_type", "ordinal_position"]].copy()
+    df["table_key"] = df["table_name"].str.upper()
+    df["column_key"] = df["column_name"].str.upper()
+    for name in ("character_maximum_length", "numeric_precision", "numeric_scale"):
+        df[name] = pd.to_numeric(columns[name], errors="coerce") if name in columns else float("nan")
+    df["nullable"] = columns["is_nullable"].str.upper() != "NO" if "is_nullable" in columns else True
+    df["default"] = _normalize_defaults(columns["column_default"]) if "column_default" in columns else ""
+    df["column_default"] = columns["column_default"] if "column_default" in columns else None
+
+    # Type with its length or precision/scale, e.g. NUMBER(12,2)
+    label = df["data_type"].astype(str)
+    length = df["character_maximum_length"].astype("Int64").astype(str)
+    precision = df["numeric_precision"].astype("Int64").astype(str)
+    scale = df["numeric_scale"].fillna(0).astype("Int64").astype(str)
+    label = label.mask(df["numeric_precision"].notna(), label + "(" + precision + "," + scale + ")")
+    df["type_label"] = label.mask(df["character_maximum_length"].notna(), label + "(" + length + ")")
+    return df
+
+
+def _drift_records(frame, kind, column, source, target):
+    def text(name):
+        if not name:
+            return None
+        values = frame[name]
+        return values.astype(str).astype(object).where(values.notna(), None).values
+
+    return pd.DataFrame({
+        "table": frame["table"].values,
+        "column": frame[column].values,
+        "kind": kind,
+        "source": text(source),
+        "target": text(target),
+    })
+
+
+def compare_schema_columns(columns_source, columns_target, source='postgresql'):
+    """
+    Diffs the column definitions of every table of a source (see
+    scripts/dialects.py, PostgreSQL by default) and a Snowflake (target)
+    schema, as returned by data_fetcher.get_schema_columns.
+    Works on the whole-schema DataFrames with vectorized operations, so
+    thousands of tables take well under a second. Only tables present on
+    both sides are compared (see compare_table_lists for the others).
+
+    Columns are aligned by case-insensitive name. The kinds of drift are:
+    - 'missing_in_target' / 'extra_in_target': column on one side only.
+    - 'renamed': a column missing in the target and an extra target column
+      at the same ordinal position with a compatible type.
+    - 'type_mismatch': not an expected migration of the type
+      (see Dialect.snowflake_types and is_type_compatible).
+    - 'precision_loss': the target type cannot hold every source value
+      (fewer integer digits or decimal places, or a shorter text length).
+    - 'nullability_changed', 'default_changed': NOT NULL or the default
+      differs (defaults are compared after removing PostgreSQL casts and
+      SQL Server parentheses, and sequence defaults match each other).
+    - 'reordered': the column's position among the common columns differs.
+    The first five are errors, the others warnings (see SCHEMA_DRIFT_ERRORS).
+
+    Returns a dict with:
+    - 'drift': DataFrame with one row per difference: table, column, kind,
+      severity ('error' or 'warning'), source and target (the definitions
+      on each side).
+    - 'tables': DataFrame with one row per compared table: table,
+      columns_source, columns_target, errors, warnings, kinds (comma
+      separated) and match (no errors).
+    """
+    prepared_source = _prepare_schema_columns(columns_source)
+    prepared_target = _prepare_schema_columns(columns_target)
+    table_names = prepared_source.drop_duplicates("table_key").set_index("table_key")["table_name"]
+    common = table_names.index.intersection(pd.Index(prepared_target["table_key"].unique()))
+    prepared_source = prepared_source[prepared_source["table_key"].isin(common)]
+    prepared_target = prepared_target[prepared_target["table_key"].isin(common)]
+
+    merged = prepared_source.merge(prepared_target, on=["table_key", "column_key"], how="outer", suffixes=("_source", "_target"), indicator=True)
+    merged["table"] = merged["table_key"].map(table_names)
+    only_source = merged[merged["_merge"] == "left_only"]
+    only_target = merged[merged["_merge"] == "right_only"]
+    both = merged[merged["_merge"] == "both"]
+
+    # A column dropped and another added at the same position is most likely a rename
+    renamed = only_source[["table", "table_key", "ordinal_position_source", "column_name_source", "data_type_source", "type_label_source"]].merge(
+        only_target[["table_key", "ordinal_position_target", "column_name_target", "data_type_target", "type_label_target"]],
+        left_on=["table_key", "ordinal_position_source"], right_on=["table_key", "ordinal_position_target"]
+    )
+    renamed = renamed[_types_compatible(renamed["data_type_source"], renamed["data_type_target"], source).values]
+    only_source = only_source[~pd.MultiIndex.from_frame(only_source[["table_key", "column_name_source"]]).isin(
+        pd.MultiIndex.from_frame(renamed[["table_key", "column_name_source"]]))]
+    only_target = only_target[~pd.MultiIndex.from_frame(only_target[["table_key", "column_name_target"]]).isin(
+        pd.MultiIndex.from_frame(renamed[["table_key", "column_name_target"]]))]
+
+    compatible = _types_compatible(both["data_type_source"], both["data_type_target"], source)
+    precision_source, scale_source = both["numeric_precision_source"], both["numeric_scale_source"].fillna(0)
+    precision_target, scale_target = both["numeric_precision_target"], both["numeric_scale_target"].fillna(0)
+    integer_digits = both["data_type_source"].map(get_dialect(source).integer_digits)
+    precision_loss = compatible & (
+        (precision_source.notna() & precision_target.notna()
+         & ((scale_target < scale_source) | (precision_target - scale_target < precision_source - scale_source)))
+        | (integer_digits.notna() & precision_target.notna() & (precision_target - scale_target < integer_digits))
+        | (both["character_maximum_length_target"] < both["character_maximum_length_source"])
+    )
+    rank_source = both.groupby("table_key")["ordinal_position_source"].rank(method="first")
+    rank_target = both.groupby("table_key")["ordinal_position_target"].rank(method="first")
+
+    nullability = both.assign(
+        null_source=both["nullable_source"].map({True: "NULL", False: "NOT NULL"}),
+        null_target=both["nullable_target"].map({True: "NULL", False: "NOT NULL"}),
+    )
+    reordered = both.assign(position_source=rank_source.astype(int), position_target=rank_target.astype(int))
+    drift = pd.concat([
+        _drift_records(only_source, "missing_in_target", "column_name_source", "type_label_source", None),
+        _drift_records(only_target, "extra_in_target", "column_name_target", None, "type_label_target"),
+        _drift_records(renamed, "renamed", "column_name_source", "column_name_source", "column_name_target"),
+        _drift_records(both[~compatible], "type_mismatch", "column_name_source", "type_label_source", "type_label_target"),
+        _drift_records(both[precision_loss], "precision_loss", "column_name_source", "type_label_source", "type_label_target"),
+        _drift_records(nullability[both["nullable_source"] != both["nullable_target"]], "nullability_changed",
+                       "column_name_source", "null_source", "null_target"),
+        _drift_records(both[both["default_source"] != both["default_target"]], "default_changed",
+                       "column_name_source", "column_default_source", "column_default_target"),
+        _drift_records(reordered[rank_source != rank_target], "reordered", "column_name_source", "position_source", "position_target"),
+    ], ignore_index=True)
+    drift["severity"] = drift["kind"].isin(SCHEMA_DRIFT_ERRORS).map({True: "error", False: "warning"})
+    drift = drift[SCHEMA_DRIFT_COLUMNS].sort_values(["table", "column", "kind"], kind="stable").reset_index(drop=True)
+
+    tables = pd.DataFrame({"table": table_names[common].values}, index=common)
+    tables["columns_source"] = prepared_source.groupby("table_key").size()
+    tables["columns_target"] = prepared_target.groupby("table_key").size()
+    table_keys = drift["table"].str.upper()
+    tables["errors"] = (drift["severity"] == "error").groupby(table_keys).sum()
+    tables["warnings"] = (drift["severity"] == "warning").groupby(table_keys).sum()
+    kinds = drift.assign(table_key=table_keys).drop_duplicates(["table_key", "kind"])
+    tables["kinds"] = kinds.groupby("table_key")["kind"].agg(", ".join)
+    tables = tables.fillna({"errors": 0, "warnings": 0, "kinds": ""}).astype({"errors": int, "warnings": int})
+    tables["match"] = tables["errors"] == 0
+    return {"drift": drift, "tables": tables.sort_values("table").reset_index(drop=True)}
+
+
+def get_comparison_category(source_type, target_type, source=None):
+    """
+    Picks the normalization category both sides of a column pair are
+    compared in, so that a lossy but expected type change is not reported
+    as a value difference: NUMERIC vs FLOAT compares rounded values and DATE
+    vs TIMESTAMP compares dates. Returns None when each side keeps its own
+    category.
+    """
+    categories = {data_fetcher.get_type_category(source_type, source), data_fetcher.get_type_category(target_type)}
+    if categories == {'number', 'float'}:
+        return 'float'
+    if 'date' in categories and categories <= {'date', 'timestamp', 'timestamp_tz'}:
+        return 'date'
+    if categories == {'timestamp', 'timestamp_tz'}:
+        return 'timestamp'
+    return None
+
+
+# Rows per chunk compare_column_values aims for, so that the key and value
+# hashes of one chunk of both sides fit comfortably in memory
+COLUMN_HASH_CHUNK_ROWS = 500000
+
+
+def _get_column_hashes(conn, table_name, key_columns, columns, categories, source, schema, rules, where=None):
+    # One 60-bit hash per normalized value keeps the fetched data compact;
+    # positional aliases avoid case differences between the two databases.
+    select = [f'{_key_text_expression(key_columns, source)} AS "key"']
+    for i, ((name, data_type), category) in enumerate(zip(columns, categories)):
+        value = data_fetcher.normalized_value_expression(name, data_type, source, category=category, **rules)
+        select.append(f'{data_fetcher.hash_expression(f"COALESCE({value}, {get_dialect(source).null_marker})", source)} AS "c{i}"')
+    query = f"SELECT {', '.join(select)} FROM {data_fetcher.qualified_table_name(table_name, source, schema)}"
+    if where:
+        query += f" WHERE {where}"
+
+    table = data_fetcher.read_query_arrow(conn, query, source)
+    names = ["key"] + [f"c{i}" for i in range(len(columns))]
+    if table is None:
+        return pa.table({name: pa.array([], pa.string() if name == "key" else pa.int64()) for name in names})
+    # Snowflake returns the hashes as NUMBER(38,0)
+    return pa.table([table.column(0).cast(pa.string())] + [table.column(i).cast(pa.int64()) for i in range(1, len(names))], names=names)
+
+
+def _estimated_row_count(conn, table_name, source, schema):
+    counts = data_fetcher.get_schema_row_counts(conn, source, schema, tables=[table_name])
+    return int(counts["row_count"].iloc[0]) if not counts.empty else 0
+
+
+def compare_column_values(conn_source, conn_target, table_name, key_columns, source_schema='public', target_schema='public',
+                          columns=None, scale=6, trim=False, ignore_case=False, max_examples=5, chunks=None, source='postgresql'):
+    """
+    Compares every value of a table column by column between the source
+    database and Snowflake (target), with rows aligned on a key.
+
+    Each side computes a hash of every normalized value in SQL (see
+    data_fetcher.normalize_expression); the hashes are joined on the key and
+    compared as Arrow arrays, so no Python code runs per row. Column pairs
+    whose types differ in an expected way (see get_comparison_category) are
+    normalized to a common form first.
+
+    Large tables are compared in chunks of keys (hash chunks, see
+    data_fetcher.get_chunk_predicates), so only the hashes of one chunk of
+    each side are held in memory at a time; every chunk costs a scan of both
+    tables.
+
+    Parameters:
+    - key_columns (list): Column names uniquely identifying a row.
+    - columns (list): Optional. Column names to compare; defaults to all
+      common non-key columns.
+    - scale (int): Decimal places floating point values are rounded to.
+    - trim (bool): Ignore leading/trailing whitespace in text columns.
+    - ignore_case (bool): Compare text columns case-insensitively.
+    - max_examples (int): Keys of mismatching rows reported per column.
+    - chunks (int): Optional. Number of key chunks; defaults to enough for
+      about COLUMN_HASH_CHUNK_ROWS rows per chunk, going by the catalog row
+      count of the larger side.
+    - source (str): Source database type, see scripts/dialects.py.
+
+    Returns a dict with:
+    - 'columns': DataFrame with one row per column: Column Name, Source
+      Type, Snowflake Type, Type Compatible, Mismatches, Mismatch (%) and
+      Example Keys.
+    - 'compared_rows': number of keys present on both sides.
+    - 'missing_in_target' / 'extra_in_target': number of keys on one side only.
+    """
+    columns_source = data_fetcher.get_table_columns(conn_source, table_name, source, source_schema)
+    columns_target = data_fetcher.get_table_columns(conn_target, table_name, 'snowflake', target_schema)
+    common_source, common_target = get_common_columns(columns_source, columns_target)
+
+    key_source, key_target = _select_columns(common_source, common_target, key_columns, table_name)
+    if columns:
+        compared_source, compared_target = _select_columns(common_source, common_target, columns, table_name)
+    else:
+        key_names = {name.upper() for name, _ in key_source}
+        compared_source = [c for c in common_source if c[0].upper() not in key_names]
+        compared_target = [c for c in common_target if c[0].upper() not in key_names]
+
+    if chunks is None:
+        row_count = max(_estimated_row_count(conn_source, table_name, source, source_schema),
+                        _estimated_row_count(conn_target, table_name, 'snowflake', target_schema))
+        chunks = -(-row_count // COLUMN_HASH_CHUNK_ROWS)
+    # Hash chunks hold the same keys on both sides
+    predicates_source = data_fetcher.get_chunk_predicates(conn_source, table_name, source, source_schema, chunks, 'hash', key_source)
+    predicates_target = data_fetcher.get_chunk_predicates(conn_target, table_name, 'snowflake', target_schema, chunks, 'hash', key_target)
+
+    categories = [get_comparison_category(s[1], t[1], source) for s, t in zip(compared_source, compared_target)]
+    rules = {"scale": scale, "trim": trim, "ignore_case": ignore_case}
+    compared_rows = rows_source = rows_target = 0
+    mismatches = [0] * len(compared_source)
+    examples = [[] for _ in compared_source]
+    for where_source, where_target in zip(predicates_source, predicates_target):
+        hashes_source = _get_column_hashes(conn_source, table_name, key_source, compared_source, categories, source, source_schema,
+                                           rules, where_source)
+        hashes_target = _get_column_hashes(conn_target, table_name, key_target, compared_target, categories, 'snowflake', target_schema,
+                                           rules, where_target)
+        joined = hashes_source.join(hashes_target, keys="key", join_type="inner", left_suffix="_source", right_suffix="_target")
+        compared_rows += joined.num_rows
+        rows_source += hashes_source.num_rows
+        rows_target += hashes_target.num_rows
+        for i in range(len(compared_source)):
+            differs = pc.not_equal(joined[f"c{i}_source"], joined[f"c{i}_target"])
+            chunk_mismatches = pc.sum(differs).as_py() or 0
+            mismatches[i] += chunk_mismatches
+            room = max_examples - len(examples[i])
+            if chunk_mismatches and room > 0:
+                examples[i].extend(pc.filter(joined["key"], differs).slice(0, room).to_pylist())
+
+    records = []
+    for i, ((name, source_type), (_, target_type)) in enumerate(zip(compared_source, compared_target)):
+        records.append({
+            "Column Name": name.upper(),
+            "Source Type": source_type,
+            "Snowflake Type": target_type,
+            "Type Compatible": is_type_compatible(source_type, target_type, source),
+            "Mismatches": mismatches[i],
+            "Mismatch (%)": round(100 * mismatches[i] / compared_rows, 2) if compared_rows else 0.0,
+            "Example Keys": examples[i],
+        })
+
+    return {
+        "columns": pd.DataFrame(records, columns=["Column Name", "Source Type", "Snowflake Type", "Type Compatible",
+                                                  "Mismatches", "Mismatch (%)", "Example Keys"]),
+        "compared_rows": compared_rows,
+        "missing_in_target": rows_source - compared_rows,
+        "extra_in_target": rows_target - compared_rows,
+    }
+
+
+def compare_null_percentages(nulls_source, nulls_target, source='postgresql'):
+    """
+    Combines per-column null percentages (see quality_checks.check_nulls) from
+    both sides into one table with rounded percentages and their difference,
+    matching columns case-insensitively. The source column is labelled with
+    the source database's name.
+    """
+    nulls_source = nulls_source.round(0)
+    nulls_target = nulls_target.round(0)
+    nulls_source.index = nulls_source.index.str.upper()
+    nulls_target.index = nulls_target.index.str.upper()
+
+    null_comparison = pd.concat([nulls_source, nulls_target], axis=1).fillna(0)
+    label_source = f"{get_dialect(source).label} (%)"
+    null_comparison.columns = [label_source, "Snowflake (%)"]
+    null_comparison["Difference"] = (null_comparison[label_source] - null_comparison["Snowflake (%)"]).abs()
+    null_comparison = null_comparison.astype(int)
+    return null_comparison.rename_axis("Column Name").reset_index()
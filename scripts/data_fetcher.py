@@ -1,78 +1,861 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, nullcontext
+from decimal import Decimal
+
 import pandas as pd
+import pyarrow as pa
+
+from config.snowflake_config import execution_policy
+from scripts import tracing
+from scripts.dialects import get_dialect, registered_dialects
+
+
+class MetadataCache:
+    """
+    Size-bounded LRU cache with a time-to-live for database, schema and table
+    listings, keyed by (connection target, object). Listings are re-read on
+    every Streamlit widget change, and Snowflake SHOW commands are slow, so
+    they are served from here until they expire or are invalidated.
+
+    Parameters:
+    - ttl (float): Seconds an entry stays valid.
+    - max_entries (int): Least recently used entries are evicted beyond this.
+    - path (str): Optional. JSON file the cache is persisted to, so a
+      restarted app starts warm. Values must be JSON serializable.
+    """
+
+    def __init__(self, ttl=300, max_entries=256, path=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def get(self, key):
+        """Returns (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def invalidate(self, target=None):
+        """Drops all entries, or only those of one connection target."""
+        with self._lock:
+            if target is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == target]:
+                    del self._entries[key]
+            self._save()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        for target, obj, stored_at, value in stored:
+            self._entries[(target, obj)] = (stored_at, value)
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump([[target, obj, stored_at, value] for (target, obj), (stored_at, value) in self._entries.items()], f)
+        os.replace(tmp_path, self.path)
+
+
+# Shared by all sessions of the app process.
+# Optional environment variables:
+# - METADATA_CACHE_TTL (default: 300): seconds listings are cached
+# - METADATA_CACHE_MAX_ENTRIES (default: 256)
+# - METADATA_CACHE_PATH (default: none): persist the cache to this JSON file
+metadata_cache = MetadataCache(
+    ttl=float(os.getenv("METADATA_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "256")),
+    path=os.getenv("METADATA_CACHE_PATH") or None
+)
+
+
+def get_connection_target(conn):
+    """
+    Identifies the server, user and database a connection points at, for use
+    as a cache key.
+    """
+    for dialect in registered_dialects():
+        target = dialect.connection_target(conn)
+        if target is not None:
+            return target
+    return f"{type(conn).__name__}:{id(conn)}"
+
+
+def _is_snowflake(conn):
+    return get_connection_target(conn).startswith("snowflake://")
+
+
+def _statement_slot(conn):
+    # Snowflake statements count against execution_policy.max_concurrent_statements
+    return execution_policy.statement_slot() if _is_snowflake(conn) else nullcontext()
+
+
+def _read_frame(conn, query, coerce_float, span=None):
+    # Builds the DataFrame from the DBAPI cursor; pd.read_sql warns on every
+    # connection that is not SQLAlchemy's
+    cur = conn.cursor()
+    try:
+        cur.execute(query)
+        if span is not None:
+            span.set(query_id=getattr(cur, 'sfqid', None))
+        columns = [c[0] for c in cur.description]
+        return pd.DataFrame.from_records([tuple(row) for row in cur.fetchall()], columns=columns, coerce_float=coerce_float)
+    finally:
+        cur.close()
+
+
+def run_query(conn, query, coerce_float=True):
+    """
+    Runs a query and returns its result as a DataFrame (as pd.read_sql).
+    Every query of the tool goes through here, run_queries or
+    iter_query_batches, so it is recorded on the active trace (see
+    scripts/tracing.py) with its target, latency, rows, bytes and Snowflake
+    query id, and Snowflake statements wait for a slot of the execution
+    policy (see config/snowflake_config.py).
+    """
+    span = tracing.query_span(get_connection_target(conn), query)
+    with _statement_slot(conn):
+        if span is None:
+            return _read_frame(conn, query, coerce_float)
+        try:
+            df = _read_frame(conn, query, coerce_float, span)
+        except Exception as e:
+            span.end(error=e)
+            raise
+    span.set(rows=len(df), bytes=int(df.memory_usage(index=False, deep=True).sum()))
+    span.end()
+    return df
+
+
+def run_queries(conn, queries, coerce_float=True):
+    """
+    Runs independent queries and returns one DataFrame per query, in order.
+
+    On Snowflake the queries are submitted with execute_async, so up to
+    execution_policy.max_concurrent_statements of them run in the warehouse
+    at once while this thread holds a single connection, and their status
+    is polled (with back-off) until each has finished. Other connections
+    run them one after another through run_query.
+    """
+    if not _is_snowflake(conn):
+        return [run_query(conn, query, coerce_float) for query in queries]
+
+    target = get_connection_target(conn)
+    results = [None] * len(queries)
+    pending = list(enumerate(queries))
+    in_flight = {}  # query id -> (index, span)
+    error = None
+    cur = conn.cursor()
+    try:
+        while pending or in_flight:
+            # Submit while slots are free; with nothing in flight, wait for one
+            while pending and execution_policy.acquire_slot(blocking=not in_flight):
+                index, query = pending.pop(0)
+                span = tracing.query_span(target, query)
+                try:
+                    query_id = cur.execute_async(query)["queryId"]
+                except Exception as e:
+                    execution_policy.release_slot()
+                    if span is not None:
+                        span.end(error=e)
+                    raise
+                if span is not None:
+                    span.set(query_id=query_id)
+                in_flight[query_id] = (index, span)
+
+            interval = execution_policy.poll_interval
+            while True:
+                finished = [
+                    query_id for query_id in in_flight
+                    if not conn.is_still_running(conn.get_query_status_throw_if_error(query_id))
+                ]
+                if finished:
+                    break
+                time.sleep(interval)
+                interval = min(interval * 2, execution_policy.max_poll_interval)
+
+            for query_id in finished:
+                index, span = in_flight[query_id]
+                cur.get_results_from_sfqid(query_id)
+                df = pd.DataFrame.from_records(cur.fetchall(), columns=[c[0] for c in cur.description], coerce_float=coerce_float)
+                del in_flight[query_id]
+                execution_policy.release_slot()
+                if span is not None:
+                    span.set(rows=len(df), bytes=int(df.memory_usage(index=False, deep=True).sum()))
+                    span.end()
+                results[index] = df
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        # After an error, statements still running are left to the statement timeout
+        for _, span in in_flight.values():
+            execution_policy.release_slot()
+            if span is not None:
+                span.end(error=error)
+        cur.close()
+    return results
+
+
+def _cached_listing(conn, obj, fetch, use_cache):
+    if not use_cache:
+        return fetch()
+    key = (get_connection_target(conn), obj)
+    hit, value = metadata_cache.get(key)
+    if hit:
+        return value
+    value = fetch()
+    metadata_cache.set(key, value)
+    return value
+
+
+def get_databases(conn, source='postgresql', use_cache=True):
+    query, column = get_dialect(source).databases_query()
+    return _cached_listing(conn, "databases", lambda: run_query(conn, query)[column].tolist(), use_cache)
+
+def get_schemas(conn, source='postgresql', use_cache=True):
+    query, column = get_dialect(source).schemas_query()
+    return _cached_listing(conn, "schemas", lambda: run_query(conn, query)[column].tolist(), use_cache)
+
+def get_postgresql_databases(conn, use_cache=True):
+    return get_databases(conn, 'postgresql', use_cache)
+
+def get_postgresql_schemas(conn, use_cache=True):
+    return get_schemas(conn, 'postgresql', use_cache)
 
-def get_postgresql_databases(conn):
-    query = "SELECT datname FROM pg_database WHERE datistemplate = false AND datname != 'postgres'"
-    return pd.read_sql(query, conn)['datname'].tolist()
-
-def get_postgresql_schemas(conn):
-    query = """
-        SELECT schema_name
-        FROM information_schema.schemata
-        WHERE schema_name NOT IN ('pg_catalog', 'information_schema', 'pg_toast')
-        ORDER BY schema_name
-    """
-    return pd.read_sql(query, conn)['schema_name'].tolist()
-
-def get_table_list(conn, source='postgresql', schema='public'):
-    if source == 'postgresql':
-        query = f"""
-        SELECT table_name
-        FROM information_schema.tables
-        WHERE table_type = 'BASE TABLE' AND table_schema = '{schema}'
-        ORDER BY table_name
-        """
-        return pd.read_sql(query, conn)['table_name'].tolist()
-    elif source == 'snowflake':
-        query = f"SHOW TABLES IN SCHEMA {schema}"
-        return pd.read_sql(query, conn)['name'].tolist()
+def get_table_list(conn, source='postgresql', schema='public', use_cache=True):
+    query, column = get_dialect(source).tables_query(schema)
+    return _cached_listing(conn, f"tables:{schema}", lambda: run_query(conn, query)[column].tolist(), use_cache)
 
 def get_table_row_count(conn, table_name, source='postgresql', schema='public'):
-    if source == 'postgresql':
-        query = f'SELECT COUNT(*) AS "count" FROM {schema}."{table_name}"'
-        return pd.read_sql(query, conn)['count'].iloc[0]
-    elif source == 'snowflake':
-        # Snowflake uses uppercase identifiers without quotes
-        query = f'SELECT COUNT(*) AS "count" FROM {schema.upper()}.{table_name.upper()}'
-        return pd.read_sql(query, conn)['count'].iloc[0]
-    else:
-        raise ValueError("Unsupported source. Use 'postgresql' or 'snowflake'.")
+    return run_query(conn, get_dialect(source).row_count_query(table_name, schema))['count'].iloc[0]
 
 def get_table_schema(conn, table_name, source='postgresql', schema='public'):
-    if source == 'postgresql':
-        query = f"""
-        SELECT UPPER(column_name) AS column_name, UPPER(data_type) AS data_type
-        FROM information_schema.columns
-        WHERE table_schema = '{schema}' AND table_name = '{table_name}'
-        ORDER BY column_name
-        """
-    elif source == 'snowflake':
-        query = f"""
-        SELECT UPPER(COLUMN_NAME) AS COLUMN_NAME, UPPER(DATA_TYPE) AS DATA_TYPE
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = '{schema.upper()}' AND TABLE_NAME = '{table_name.upper()}'
-        ORDER BY COLUMN_NAME
-        """
+    return run_query(conn, get_dialect(source).table_schema_query(table_name, schema))
+
+def get_table_columns(conn, table_name, source='postgresql', schema='public'):
+    """
+    Returns the columns of a table with their exact (unmodified) names and
+    data types, in ordinal order. Unlike get_table_schema, the names can be
+    used directly as identifiers in generated SQL.
+    """
+    return run_query(conn, get_dialect(source).table_columns_query(table_name, schema))
+
+
+def get_primary_key(conn, table_name, source='postgresql', schema='public'):
+    """
+    Returns the column names of a table's primary key in key order, falling
+    back to its first unique constraint. Returns an empty list when the
+    table has neither.
+
+    Snowflake does not enforce these constraints, so a declared key there is
+    only as reliable as the load that filled the table.
+    """
+    keys = []
+    for constraint_type, query in get_dialect(source).primary_key_queries(table_name, schema):
+        found = run_query(conn, query)
+        found.columns = found.columns.str.lower()
+        if constraint_type is not None:
+            found = found.assign(constraint_type=constraint_type)
+        keys.append(found[["constraint_type", "constraint_name", "column_name", "key_sequence"]])
+    keys = pd.concat(keys, ignore_index=True)
+
+    if keys.empty:
+        return []
+    keys["is_primary"] = keys["constraint_type"] == 'PRIMARY KEY'
+    keys = keys.sort_values(["is_primary", "constraint_name", "key_sequence"], ascending=[False, True, True])
+    constraint = keys["constraint_name"].iloc[0]
+    return keys.loc[keys["constraint_name"] == constraint, "column_name"].tolist()
+
+
+SAMPLE_METHODS = ('limit', 'system', 'bernoulli', 'key_hash')
+
+# Z-scores for the confidence levels offered for sample sizing
+CONFIDENCE_Z_SCORES = {0.80: 1.2816, 0.90: 1.6449, 0.95: 1.9600, 0.98: 2.3263, 0.99: 2.5758}
+
+# Percentage-based samples return a random number of rows; ask for a bit
+# more than needed and cut back with LIMIT
+SAMPLE_OVERSAMPLING = 1.25
+
+# Key-hash samples keep rows whose key hash falls below a threshold out of
+# this many hash buckets
+KEY_HASH_BUCKETS = 1000000
+
+
+def get_sample_size(population, confidence=0.95, margin_of_error=0.05, proportion=0.5):
+    """
+    Returns the number of rows needed to estimate a proportion (e.g. the
+    share of NULLs in a column) within `margin_of_error` at the given
+    confidence level, using Cochran's formula with finite population
+    correction.
+    """
+    if confidence not in CONFIDENCE_Z_SCORES:
+        raise ValueError(f"Unsupported confidence level. Use one of {sorted(CONFIDENCE_Z_SCORES)}.")
+    z = CONFIDENCE_Z_SCORES[confidence]
+    n0 = z * z * proportion * (1 - proportion) / (margin_of_error * margin_of_error)
+    if population is None or population <= 0:
+        return int(n0 + 0.999999)
+    return min(int(population), int(n0 / (1 + (n0 - 1) / population) + 0.999999))
+
+
+def _sample_percentage(n, row_count):
+    if not row_count or row_count <= n:
+        return 100.0
+    return min(100.0, round(100.0 * n * SAMPLE_OVERSAMPLING / row_count, 6))
+
+
+def get_sample_data(conn, table_name, n=100, source='postgresql', schema='public', method='limit', key_columns=None,
+                    row_count=None, seed=None):
+    """
+    Returns up to n rows of a table.
+
+    Parameters:
+    - method (str):
+      'limit' returns the first n rows the database finds (cheap, not random).
+      'system' samples whole storage blocks (TABLESAMPLE SYSTEM / SAMPLE BLOCK);
+      cheap on huge tables but rows from one block are correlated.
+      'bernoulli' samples individual rows (TABLESAMPLE BERNOULLI / SAMPLE ROW;
+      a random number per row on SQL Server); uniformly random but reads
+      the whole table.
+      'key_hash' deterministically picks the rows with the lowest key hashes,
+      so the same rows are selected on both sides and can be compared row by
+      row. Reads the whole table.
+    - key_columns (list): Column names used by 'key_hash'; defaults to all columns.
+    - row_count (int): Optional. Table size used to turn n into a sampling
+      percentage; fetched from catalog statistics when not given.
+    - seed (int): Optional. Makes 'system'/'bernoulli' samples repeatable.
+    """
+    dialect = get_dialect(source)
+    table = qualified_table_name(table_name, source, schema)
+
+    if method == 'limit':
+        query = dialect.limit_query(f"SELECT * FROM {table}", n)
+    elif method in ('system', 'bernoulli', 'key_hash'):
+        if row_count is None:
+            counts = get_schema_row_counts(conn, source, schema, tables=[table_name])
+            row_count = int(counts["row_count"].iloc[0]) if not counts.empty else None
+        percentage = _sample_percentage(n, row_count)
+
+        if method == 'key_hash':
+            columns = get_table_columns(conn, table_name, source, schema)
+            if key_columns:
+                wanted = {k.upper() for k in key_columns}
+                columns = columns[columns["column_name"].str.upper().isin(wanted)]
+                if len(columns) != len(wanted):
+                    raise ValueError(f"Columns {sorted(wanted)} are not all present in {table_name}.")
+            if columns.empty:
+                raise ValueError(f"Table {table_name} has no columns to hash.")
+            # Sort by upper-cased name so both databases hash the same column order
+            key = sorted(columns[["column_name", "data_type"]].itertuples(index=False), key=lambda c: c[0].upper())
+            key_hash = row_hash_expression(key, source)
+            threshold = int(KEY_HASH_BUCKETS * percentage / 100)
+            query = dialect.limit_query(
+                f"SELECT * FROM {table} WHERE {dialect.modulo(key_hash, KEY_HASH_BUCKETS)} < {threshold} ORDER BY {key_hash}", n
+            )
+        else:
+            # Block samples come in whole blocks and stale statistics can
+            # understate the table size, so widen the sample until it is big enough
+            while True:
+                df = run_query(conn, dialect.percentage_sample_query(table, n, method, percentage, seed))
+                if len(df) >= n or percentage >= 100:
+                    return df
+                percentage = min(100.0, percentage * 4)
     else:
-        raise ValueError("Unsupported source type.")
+        raise ValueError(f"Unsupported sample method. Use one of {SAMPLE_METHODS}.")
 
-    return pd.read_sql(query, conn)
+    return run_query(conn, query)
 
-def get_sample_data(conn, table_name, n=100, source='postgresql', schema='public'):
-    if source == 'postgresql':
-        query = f'SELECT * FROM {schema}."{table_name}" LIMIT {n}'
-    elif source == 'snowflake':
-        # Snowflake uses uppercase identifiers without quotes
-        query = f"SELECT * FROM {schema.upper()}.{table_name.upper()} LIMIT {n}"
-    return pd.read_sql(query, conn)
 
-# scripts/data_fetcher.py
+def get_snowflake_databases(conn, use_cache=True):
+    return get_databases(conn, 'snowflake', use_cache)
+
+def get_snowflake_schemas(conn, use_cache=True):
+    return get_schemas(conn, 'snowflake', use_cache)
+
+
+# --- Schema-level bulk metadata (one catalog query per schema, not per table) ---
+
+def get_schema_columns(conn, source='postgresql', schema='public'):
+    """
+    Returns the columns of every table in a schema with a single catalog query.
 
-def get_snowflake_databases(conn):
-    query = "SHOW DATABASES"
-    df = pd.read_sql(query, conn)
-    return df['name'].tolist()
+    Returns a DataFrame with table_name, column_name (exact names, usable as
+    identifiers), data_type (upper case), ordinal_position,
+    character_maximum_length, numeric_precision and numeric_scale (decimal
+    digits; NULL for binary-precision types such as PostgreSQL INTEGER and
+    REAL), is_nullable ('YES'/'NO') and column_default (as SQL text), ordered
+    by table and ordinal position.
+    """
+    return run_query(conn, get_dialect(source).schema_columns_query(schema))
+
+def get_schema_row_counts(conn, source='postgresql', schema='public', exact=False, tables=None):
+    """
+    Returns row counts for the tables of a schema in a single query.
+
+    Parameters:
+    - exact (bool): If False, counts come from catalog statistics and cost
+      no table scans: planner estimates from pg_class.reltuples on
+      PostgreSQL (falling back to pg_stat_user_tables.n_live_tup for tables
+      never analyzed), sys.partitions row counts on SQL Server. If True, an
+      exact COUNT(*) per table is run, combined into one UNION ALL statement.
+      Snowflake counts always come from INFORMATION_SCHEMA.TABLES.ROW_COUNT,
+      which is exact and served from metadata.
+    - tables (list): Optional. Restrict to these tables (required for exact
+      counts to avoid scanning tables that are not needed).
+
+    Returns a DataFrame with table_name and row_count.
+    """
+    dialect = get_dialect(source)
+    if exact and not dialect.catalog_row_counts_exact:
+        if tables is None:
+            tables = get_table_list(conn, source, schema, use_cache=False)
+        if not tables:
+            return pd.DataFrame(columns=["table_name", "row_count"])
+        return run_query(conn, dialect.exact_row_counts_query(tables, schema))
+
+    df = run_query(conn, dialect.catalog_row_counts_query(schema))
+    if tables is not None:
+        wanted = {t.upper() for t in tables}
+        df = df[df["table_name"].str.upper().isin(wanted)].reset_index(drop=True)
+    return df
+
+
+def get_schema_change_markers(conn, source='postgresql', schema='public'):
+    """
+    Returns a cheap per-table change marker for every table of a schema, read
+    from catalog statistics with a single query. A table whose marker is the
+    same as in an earlier run has not been modified since.
 
-def get_snowflake_schemas(conn):
-    query = "SHOW SCHEMAS"
-    df = pd.read_sql(query, conn)
-    return df['name'].tolist()
+    PostgreSQL: relfilenode (changes on TRUNCATE and table rewrites) and the
+    cumulative n_tup_ins/n_tup_upd/n_tup_del from pg_stat_user_tables.
+    Snowflake: LAST_ALTERED, ROW_COUNT and BYTES from INFORMATION_SCHEMA.TABLES.
+    SQL Server: modify_date, the sys.partitions row count and the last write
+    recorded in sys.dm_db_index_usage_stats.
+
+    Returns a DataFrame with table_name and marker.
+    """
+    return run_query(conn, get_dialect(source).change_markers_query(schema))
+
+def get_schema_watermarks(conn, tables, column, source='postgresql', schema='public'):
+    """
+    Returns MAX(column) as text for each of the given tables (e.g. an
+    updated_at or sequence column), combined into one UNION ALL statement.
+
+    Returns a DataFrame with table_name and watermark.
+    """
+    if not tables:
+        return pd.DataFrame(columns=["table_name", "watermark"])
+    dialect = get_dialect(source)
+    col = quote_identifier(column, source)
+    query = "\nUNION ALL\n".join(
+        f"""SELECT '{t.replace("'", "''")}' AS "table_name", {dialect.text_cast(f"MAX({col})")} AS "watermark" FROM {qualified_table_name(t, source, schema)}"""
+        for t in tables
+    )
+    return run_query(conn, query)
+
+
+# --- Streaming fetch (Arrow record batches with flat memory use) ---
+
+STREAM_BATCH_SIZE = 50000
+
+
+def iter_query_batches(conn, query, source='postgresql', batch_size=STREAM_BATCH_SIZE):
+    """
+    Runs a query and yields its result as pyarrow.RecordBatch objects of at
+    most `batch_size` rows, so memory use does not grow with the result size.
+
+    PostgreSQL results are read through a named (server-side) cursor, so rows
+    are transferred `batch_size` at a time instead of all at once. Snowflake
+    results are read with fetch_arrow_batches, which hands over the Arrow
+    result chunks without creating Python objects per row. SQL Server
+    results are fetched `batch_size` rows per round trip (cursor.arraysize).
+    See Dialect.iter_batches in scripts/dialects.py.
+    """
+    span = tracing.query_span(get_connection_target(conn), query)
+    error = None
+    try:
+        for batch in get_dialect(source).iter_batches(conn, query, batch_size, span):
+            if span is not None:
+                span.set(rows=span.attributes["rows"] + batch.num_rows, bytes=span.attributes["bytes"] + batch.nbytes)
+            yield batch
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if span is not None:
+            span.end(error=error)
+
+
+def iter_table_batches(conn, table_name, source='postgresql', schema='public', columns=None, where=None, order_by=None,
+                       batch_size=STREAM_BATCH_SIZE):
+    """
+    Streams the rows of a table as Arrow record batches, see iter_query_batches.
+
+    Parameters:
+    - columns (list): Optional. Column names to fetch; defaults to all columns.
+    - where (str): Optional. SQL filter condition.
+    - order_by (list): Optional. Column names to order by.
+    """
+    return iter_query_batches(conn, table_query(table_name, source, schema, columns, where, order_by), source, batch_size)
+
+
+def table_query(table_name, source='postgresql', schema='public', columns=None, where=None, order_by=None):
+    """Returns the SELECT statement used by iter_table_batches."""
+    select = ", ".join(quote_identifier(c, source) for c in columns) if columns else "*"
+    query = f"SELECT {select} FROM {qualified_table_name(table_name, source, schema)}"
+    if where:
+        query += f" WHERE {where}"
+    if order_by:
+        query += " ORDER BY " + ", ".join(quote_identifier(c, source) for c in order_by)
+    return query
+
+
+def read_query_arrow(conn, query, source='postgresql', batch_size=STREAM_BATCH_SIZE):
+    """
+    Runs a query through iter_query_batches and returns one pyarrow.Table.
+    Cheaper than run_query for large results; call .to_pandas() on the
+    result when a DataFrame is needed.
+    """
+    batches = list(iter_query_batches(conn, query, source, batch_size))
+    if not batches:
+        return None
+    return pa.Table.from_batches(batches)
+
+
+# --- Parallel chunked extraction ---
+
+# 'key_range' splits a single numeric key into equal-width ranges, 'hash'
+# buckets rows by a hash of the key (any key type), 'ctid' splits a
+# PostgreSQL table into ranges of physical blocks (no key needed)
+CHUNK_METHODS = ('key_range', 'hash', 'ctid')
+
+# Results of finished chunk queries waiting to be consumed, per worker
+CHUNK_QUEUE_DEPTH = 2
+
+
+def get_key_bounds(conn, table_name, column, source='postgresql', schema='public'):
+    """Returns (MIN, MAX) of a column, or None if the table is empty."""
+    col = quote_identifier(column, source)
+    query = f'SELECT MIN({col}) AS "low", MAX({col}) AS "high" FROM {qualified_table_name(table_name, source, schema)}'
+    # tolist() hands back Python numbers, which compare with the Decimal
+    # bounds of the other side (numpy integers do not)
+    low, high = run_query(conn, query, coerce_float=False)[["low", "high"]].iloc[0].tolist()
+    if pd.isna(low):
+        return None
+    return low, high
+
+
+def _range_boundaries(low, high, chunks):
+    # Integer keys get integer boundaries; other numeric keys are split exactly as decimals
+    low, high = Decimal(str(low)), Decimal(str(high))
+    if low == low.to_integral_value() and high == high.to_integral_value():
+        low, high = int(low), int(high)
+        width = (high - low) // chunks + 1
+        return [str(low + i * width) for i in range(1, chunks) if low + i * width <= high]
+    return [format(low + (high - low) * i / chunks, 'f') for i in range(1, chunks)]
+
+
+def get_chunk_predicates(conn, table_name, source='postgresql', schema='public', chunks=8, method='hash', key_columns=None,
+                         key_range=None):
+    """
+    Returns WHERE conditions splitting a table into at most `chunks` disjoint
+    parts that together cover every row, for fetching the parts concurrently
+    (see iter_parallel_query_batches). A condition of None means the whole table.
+
+    Parameters:
+    - method (str):
+      'key_range' splits the range of a single numeric key into equal-width
+      ranges; the first and last are open-ended, so rows outside `key_range`
+      are still covered. Only as even as the key values are.
+      'hash' buckets rows by MOD of a hash of the key. Every chunk costs a
+      full scan, but chunks are even for any key type and, as the hash is
+      computed identically on every database (see hash_expression), chunk i
+      holds the same keys on the source and on Snowflake.
+      'ctid' (PostgreSQL only) splits the table into ranges of physical
+      blocks. Needs no key and each chunk only reads its own blocks (TID
+      range scans, PostgreSQL 14+; older versions scan the table per chunk),
+      but chunks do not correspond to any chunk of another table.
+    - key_columns (list): (column_name, data_type) pairs of the key; one
+      numeric column for 'key_range'.
+    - key_range (tuple): Optional. (low, high) key values to split for
+      'key_range', e.g. the combined range of both sides; read from the table
+      when not given.
+
+    Each chunk of a 'key_range' or 'ctid' split is queried separately, so
+    rows changed while the chunks are being read may be seen in either state.
+    """
+    if chunks <= 1:
+        return [None]
+
+    if method == 'key_range':
+        if not key_columns or len(key_columns) != 1 or get_type_category(key_columns[0][1], source) != 'number':
+            raise ValueError("Key range chunks need a single numeric key column.")
+        if key_range is None:
+            key_range = get_key_bounds(conn, table_name, key_columns[0][0], source, schema)
+        if key_range is None:
+            return [None]
+        key = quote_identifier(key_columns[0][0], source)
+        boundaries = _range_boundaries(key_range[0], key_range[1], chunks)
+        if not boundaries:
+            return [None]
+        predicates = [f"{key} < {boundaries[0]}"]
+        predicates.extend(f"{key} >= {low} AND {key} < {high}" for low, high in zip(boundaries, boundaries[1:]))
+        predicates.append(f"{key} >= {boundaries[-1]}")
+        return predicates
+
+    elif method == 'hash':
+        if not key_columns:
+            raise ValueError("Hash chunks need key columns.")
+        key_hash = row_hash_expression(key_columns, source)
+        return [f"{get_dialect(source).modulo(key_hash, chunks)} = {i}" for i in range(chunks)]
+
+    elif method == 'ctid':
+        if source != 'postgresql':
+            raise ValueError("ctid chunks are only supported on PostgreSQL.")
+        relation = qualified_table_name(table_name, source, schema).replace("'", "''")
+        query = f"SELECT pg_relation_size('{relation}') / current_setting('block_size')::int AS pages"
+        pages = int(run_query(conn, query)['pages'].iloc[0])
+        width = max(-(-pages // chunks), 1)
+        boundaries = list(range(width, pages, width))
+        if not boundaries:
+            return [None]
+        # The last chunk is open-ended so rows in blocks added meanwhile are not missed
+        predicates = [f"ctid < '({boundaries[0]},0)'::tid"]
+        predicates.extend(f"ctid >= '({low},0)'::tid AND ctid < '({high},0)'::tid" for low, high in zip(boundaries, boundaries[1:]))
+        predicates.append(f"ctid >= '({boundaries[-1]},0)'::tid")
+        return predicates
+
+    else:
+        raise ValueError(f"Unsupported chunk method. Use one of {CHUNK_METHODS}.")
+
+
+def _put_unless_stopped(results, stop, item):
+    while not stop.is_set():
+        try:
+            results.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def iter_parallel_query_batches(tasks, workers=4, batch_size=STREAM_BATCH_SIZE):
+    """
+    Runs several queries concurrently, each on its own pooled connection, and
+    yields their results as (task_index, pyarrow.RecordBatch) pairs in the
+    order batches arrive, interleaving the queries. (task_index, None) is
+    yielded once a query has returned all of its rows. Consumers must not
+    depend on the order; use it with order-independent processing such as
+    per-chunk aggregation or comparing chunks that cover the same keys.
+
+    Batches are handed over through a bounded queue, so a slow consumer
+    pauses the fetching threads instead of letting results pile up. An error
+    in any query is raised by the generator; closing the generator early
+    stops the remaining queries.
+
+    Parameters:
+    - tasks (list): (pool, query, source) tuples; pool is a ConnectionPool.
+    - workers (int): Queries in flight at a time. Throughput grows with it
+      until the databases or the network are saturated.
+    """
+    results = queue.Queue(maxsize=CHUNK_QUEUE_DEPTH * workers)
+    stop = threading.Event()
+
+    def fetch(index, pool, query, source):
+        try:
+            with pool.connection() as conn:
+                # Close the stream (and its server-side cursor) before the connection goes back to the pool
+                with closing(iter_query_batches(conn, query, source, batch_size)) as batches:
+                    for batch in batches:
+                        if not _put_unless_stopped(results, stop, (index, batch)):
+                            return
+        except Exception as e:
+            _put_unless_stopped(results, stop, (index, e))
+            return
+        _put_unless_stopped(results, stop, (index, None))
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chunk-fetch")
+    try:
+        for index, task in enumerate(tasks):
+            tracing.submit_in_context(executor, fetch, index, *task)
+        remaining = len(tasks)
+        while remaining:
+            index, batch = results.get()
+            if isinstance(batch, Exception):
+                raise batch
+            if batch is None:
+                remaining -= 1
+            yield index, batch
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_table_chunks(pool, table_name, source='postgresql', schema='public', columns=None, chunks=8, method='hash',
+                      key_columns=None, workers=4, batch_size=STREAM_BATCH_SIZE):
+    """
+    Streams a whole table as Arrow record batches fetched by `workers`
+    concurrent chunk queries (see get_chunk_predicates), yielding
+    (chunk_index, RecordBatch) pairs, with (chunk_index, None) when a chunk
+    is complete. Batches arrive in no particular order.
+
+    Parameters:
+    - columns (list): Optional. Column names to fetch; defaults to all columns.
+    - key_columns (list): Key column names for 'key_range' and 'hash' chunks;
+      defaults to the primary key.
+    """
+    with pool.connection() as conn:
+        if method != 'ctid':
+            key_columns = key_columns or get_primary_key(conn, table_name, source, schema)
+            if not key_columns:
+                raise ValueError(f"No key columns given and no primary or unique key found for {table_name}.")
+            table_columns = get_table_columns(conn, table_name, source, schema)
+            types = {name.upper(): data_type for name, data_type in table_columns[["column_name", "data_type"]].itertuples(index=False)}
+            missing = [name for name in key_columns if name.upper() not in types]
+            if missing:
+                raise ValueError(f"Key columns {missing} not found in {table_name}.")
+            key_columns = [(name, types[name.upper()]) for name in key_columns]
+        predicates = get_chunk_predicates(conn, table_name, source, schema, chunks, method, key_columns)
+    tasks = [(pool, table_query(table_name, source, schema, columns, where), source) for where in predicates]
+    return iter_parallel_query_batches(tasks, workers, batch_size)
+
+
+# --- SQL expression helpers shared by the pushdown comparison engine ---
+
+def quote_identifier(name, source='postgresql'):
+    return get_dialect(source).quote_identifier(name)
+
+
+def qualified_table_name(table_name, source='postgresql', schema='public'):
+    return f"{quote_identifier(schema, source)}.{quote_identifier(table_name, source)}"
+
+
+def get_type_category(data_type, source=None):
+    """
+    Maps an INFORMATION_SCHEMA data type (PostgreSQL, Snowflake or SQL
+    Server) onto the category used to normalize values before hashing.
+    Types whose category depends on the database (e.g. SQL Server BIT, a
+    PostgreSQL bit string) are looked up in the source dialect's
+    type_categories first.
+
+    Returns one of: 'number', 'float', 'date', 'timestamp', 'timestamp_tz',
+    'boolean', 'text'.
+    """
+    data_type = (data_type or '').upper()
+    if source is not None and data_type in get_dialect(source).type_categories:
+        return get_dialect(source).type_categories[data_type]
+    if data_type in ('SMALLINT', 'INTEGER', 'BIGINT', 'NUMERIC', 'DECIMAL', 'NUMBER', 'INT', 'FIXED', 'TINYINT', 'SMALLMONEY'):
+        return 'number'
+    if data_type in ('REAL', 'DOUBLE PRECISION', 'FLOAT', 'DOUBLE', 'FLOAT4', 'FLOAT8'):
+        return 'float'
+    if data_type == 'DATE':
+        return 'date'
+    if data_type in ('TIMESTAMP WITH TIME ZONE', 'TIMESTAMP_TZ', 'TIMESTAMP_LTZ', 'DATETIMEOFFSET'):
+        return 'timestamp_tz'
+    if data_type.startswith('TIMESTAMP') or data_type in ('DATETIME', 'DATETIME2', 'SMALLDATETIME'):
+        return 'timestamp'
+    if data_type == 'BOOLEAN':
+        return 'boolean'
+    return 'text'
+
+
+def normalize_expression(expression, data_type, source='postgresql', category=None, scale=6, trim=False, ignore_case=False):
+    """
+    Wraps a SQL expression so its value is rendered as text in a canonical
+    form that is identical on every supported database for equal values
+    (trailing zeros stripped from numbers, ISO dates, UTC timestamps).
+    NULL stays NULL.
+
+    Parameters:
+    - category (str): Optional. Normalization category to use instead of the
+      one derived from `data_type` (see get_type_category), e.g. 'float' to
+      compare a NUMERIC column with a FLOAT one.
+    - scale (int): Decimal places floating point values are rounded to.
+    - trim (bool): Strip leading/trailing whitespace from text.
+    - ignore_case (bool): Compare text case-insensitively.
+    """
+    dialect = get_dialect(source)
+    native_category = get_type_category(data_type, source)
+    category = category or native_category
+    if native_category == 'timestamp_tz' and category in ('date', 'timestamp', 'timestamp_tz'):
+        expression = dialect.to_utc(expression)
+
+    if category in ('number', 'float'):
+        if category == 'float':
+            expression = f"CAST({expression} AS DECIMAL(38, {scale}))"
+        return dialect.number_text(dialect.text_cast(expression))
+    if category == 'date':
+        return dialect.date_text(expression)
+    if category in ('timestamp', 'timestamp_tz'):
+        return dialect.timestamp_text(expression)
+    if category == 'boolean':
+        return dialect.boolean_text(expression)
+    text = dialect.text_cast(expression)
+    if trim:
+        text = f"TRIM({text})"
+    if ignore_case:
+        text = f"UPPER({text})"
+    return text
+
+
+def normalized_value_expression(column, data_type, source='postgresql', **rules):
+    return normalize_expression(quote_identifier(column, source), data_type, source, **rules)
+
+
+def hash_expression(text_expression, source='postgresql'):
+    """
+    Returns a SQL expression hashing a text expression to a non-negative
+    60-bit integer (the first 15 hex digits of its MD5), computed
+    identically on every supported database.
+    """
+    return get_dialect(source).hash_expression(text_expression)
+
+
+def row_hash_expression(columns, source='postgresql'):
+    """
+    Returns a SQL expression hashing a whole row.
+
+    Parameters:
+    - columns (list): (column_name, data_type) pairs, in the order they should
+      be concatenated. Both sides must pass the columns in the same order.
+    """
+    dialect = get_dialect(source)
+    parts = [
+        f"COALESCE({normalized_value_expression(name, data_type, source)}, {dialect.null_marker})"
+        for name, data_type in columns
+    ]
+    return hash_expression(dialect.concat_ws(parts), source)
@@ -0,0 +1,761 @@
+"""
+SQL dialects of the databases the tool reads from.
+
+Everything that differs between databases lives in a Dialect registered
+under its source name ('postgresql', 'snowflake', 'sqlserver'): connection
+pools, catalog listings and bulk metadata queries, identifier quoting, the
+SQL that renders and hashes values identically on every database (see
+data_fetcher.normalize_expression and hash_expression), sampling and how a
+result is streamed as Arrow record batches.
+
+data_fetcher, comparator and quality_checks build every query through
+get_dialect(source), so a new source database plugs into all checks, the
+summary report, the parallel chunked diff and the app's source selection by
+registering a Dialect subclass with register_dialect.
+"""
+import datetime
+import uuid
+from decimal import Decimal
+
+import pyarrow as pa
+
+from config.postgresql_config import get_postgresql_pool
+from config.snowflake_config import get_snowflake_pool, execution_policy
+
+# Registered dialects by source name, in registration order
+_dialects = {}
+
+
+def register_dialect(dialect):
+    """Registers a Dialect instance under its name and returns it."""
+    _dialects[dialect.name] = dialect
+    return dialect
+
+
+def get_dialect(source):
+    dialect = _dialects.get(source)
+    if dialect is None:
+        raise ValueError(f"Unsupported source. Use one of {list(_dialects)}.")
+    return dialect
+
+
+def registered_dialects():
+    return list(_dialects.values())
+
+
+def source_types():
+    """Names of the dialects that can be the source side of a comparison."""
+    return [name for name, dialect in _dialects.items() if dialect.is_source]
+
+
+class Dialect:
+    """
+    Base class of the database dialects. The defaults follow the SQL
+    standard (INFORMATION_SCHEMA catalog, CAST, COALESCE, CONCAT_WS, MOD,
+    LIMIT); subclasses override what their database spells differently.
+
+    Class attributes:
+    - name (str): Source name used throughout the tool.
+    - label (str): Name shown to users.
+    - is_source (bool): Can be the source side of a comparison (the target
+      side is always Snowflake).
+    - hash_separator / null_marker (str): SQL for the characters joining
+      column values into a hash input and standing in for NULL.
+    - type_categories (dict): Data types whose normalization category
+      differs from the shared mapping in data_fetcher.get_type_category.
+    - snowflake_types (dict): Data types of this database and the Snowflake
+      types a faithful migration maps them to. Pairs outside this map are
+      reported as incompatible (see comparator.is_type_compatible).
+    - integer_digits (dict): Decimal digits each integer type needs in a
+      Snowflake NUMBER.
+    - count_rows (str): Row count aggregate.
+    - catalog_row_counts_exact (bool): Catalog row counts are exact, so
+      exact counts never need COUNT(*) scans.
+    """
+    name = None
+    label = None
+    is_source = True
+    hash_separator = "CHR(31)"
+    null_marker = "CHR(30)"
+    type_categories = {}
+    snowflake_types = {}
+    integer_digits = {}
+    count_rows = "COUNT(*)"
+    catalog_row_counts_exact = False
+
+    # --- Connections ---
+
+    def get_pool(self, database=None):
+        """Returns the process-wide ConnectionPool for a database (the server's default database if None)."""
+        raise NotImplementedError
+
+    def connection_target(self, conn):
+        """
+        Identifies the server, user and database of a connection of this
+        dialect (see data_fetcher.get_connection_target); None for
+        connections of other dialects.
+        """
+        return None
+
+    # --- Catalog queries ---
+
+    def databases_query(self):
+        """Returns (query, result column) listing the databases."""
+        raise NotImplementedError
+
+    def schemas_query(self):
+        """Returns (query, result column) listing the schemas of the current database."""
+        return """
+        SELECT SCHEMA_NAME AS "schema_name"
+        FROM INFORMATION_SCHEMA.SCHEMATA
+        WHERE SCHEMA_NAME <> 'INFORMATION_SCHEMA'
+        ORDER BY SCHEMA_NAME
+        """, 'schema_name'
+
+    def tables_query(self, schema):
+        """Returns (query, result column) listing the base tables of a schema."""
+        return f"""
+        SELECT TABLE_NAME AS "table_name"
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_TYPE = 'BASE TABLE' AND TABLE_SCHEMA = '{schema}'
+        ORDER BY TABLE_NAME
+        """, 'table_name'
+
+    def row_count_query(self, table_name, schema):
+        return f'SELECT {self.count_rows} AS "count" FROM {self.qualified_table_name(table_name, schema)}'
+
+    def table_schema_query(self, table_name, schema):
+        return f"""
+        SELECT UPPER(COLUMN_NAME) AS column_name, UPPER(DATA_TYPE) AS data_type
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = '{schema}' AND TABLE_NAME = '{table_name}'
+        ORDER BY UPPER(COLUMN_NAME)
+        """
+
+    def table_columns_query(self, table_name, schema):
+        return f"""
+        SELECT COLUMN_NAME AS "column_name", UPPER(DATA_TYPE) AS "data_type"
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = '{schema}' AND TABLE_NAME = '{table_name}'
+        ORDER BY ORDINAL_POSITION
+        """
+
+    def primary_key_queries(self, table_name, schema):
+        """
+        Returns (constraint_type, query) pairs whose combined results list
+        the primary key and unique constraint columns of a table, with
+        constraint_name, column_name and key_sequence columns. A
+        constraint_type of None means the query returns a constraint_type
+        column itself.
+        """
+        return [(None, f"""
+        SELECT tc.CONSTRAINT_TYPE AS "constraint_type", tc.CONSTRAINT_NAME AS "constraint_name",
+               kcu.COLUMN_NAME AS "column_name", kcu.ORDINAL_POSITION AS "key_sequence"
+        FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+        JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+          ON kcu.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND kcu.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+         AND kcu.TABLE_NAME = tc.TABLE_NAME
+        WHERE tc.TABLE_SCHEMA = '{schema}' AND tc.TABLE_NAME = '{table_name}'
+          AND tc.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'UNIQUE')
+        """)]
+
+    def schema_columns_query(self, schema):
+        """See data_fetcher.get_schema_columns for the result columns."""
+        return f"""
+        SELECT c.TABLE_NAME AS "table_name", c.COLUMN_NAME AS "column_name",
+               UPPER(c.DATA_TYPE) AS "data_type", c.ORDINAL_POSITION AS "ordinal_position",
+               c.CHARACTER_MAXIMUM_LENGTH AS "character_maximum_length",
+               CASE WHEN c.NUMERIC_PRECISION_RADIX = 10 THEN c.NUMERIC_PRECISION END AS "numeric_precision",
+               CASE WHEN c.NUMERIC_PRECISION_RADIX = 10 THEN c.NUMERIC_SCALE END AS "numeric_scale",
+               c.IS_NULLABLE AS "is_nullable", c.COLUMN_DEFAULT AS "column_default"
+        FROM INFORMATION_SCHEMA.COLUMNS c
+        JOIN INFORMATION_SCHEMA.TABLES t
+          ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+        WHERE c.TABLE_SCHEMA = '{schema}' AND t.TABLE_TYPE = 'BASE TABLE'
+        ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+        """
+
+    def catalog_row_counts_query(self, schema):
+        """Returns a query of table_name and row_count for a schema from catalog statistics (no table scans)."""
+        raise NotImplementedError
+
+    def exact_row_counts_query(self, tables, schema):
+        """Returns one UNION ALL statement counting the rows of each of the given tables."""
+        return "\nUNION ALL\n".join(
+            f"""SELECT '{t.replace("'", "''")}' AS "table_name", {self.count_rows} AS "row_count" FROM {self.qualified_table_name(t, schema)}"""
+            for t in tables
+        )
+
+    def change_markers_query(self, schema):
+        """Returns a query of table_name and marker, see data_fetcher.get_schema_change_markers."""
+        raise NotImplementedError
+
+    # --- Identifiers and value expressions ---
+
+    def quote_identifier(self, name):
+        return '"' + name.replace('"', '""') + '"'
+
+    def qualified_table_name(self, table_name, schema):
+        return f"{self.quote_identifier(schema)}.{self.quote_identifier(table_name)}"
+
+    def text_cast(self, expression):
+        """Casts an expression to text."""
+        return f"CAST({expression} AS VARCHAR)"
+
+    def number_text(self, text):
+        """Strips trailing zeros (and a trailing decimal point) from a number rendered as text."""
+        return f"CASE WHEN {text} LIKE '%.%' THEN RTRIM(RTRIM({text}, '0'), '.') ELSE {text} END"
+
+    def to_utc(self, expression):
+        """Converts a time zone aware timestamp to a UTC timestamp without time zone."""
+        raise NotImplementedError
+
+    def date_text(self, expression):
+        """Renders a date (or the date of a timestamp) as YYYY-MM-DD."""
+        return f"TO_CHAR({expression}, 'YYYY-MM-DD')"
+
+    def timestamp_text(self, expression):
+        """Renders a timestamp as YYYY-MM-DD HH24:MI:SS with six fractional digits."""
+        raise NotImplementedError
+
+    def boolean_text(self, expression):
+        return f"CASE WHEN {expression} THEN 'true' WHEN NOT {expression} THEN 'false' END"
+
+    def concat_ws(self, parts):
+        """Joins text expressions with hash_separator."""
+        return f"CONCAT_WS({self.hash_separator}, {', '.join(parts)})"
+
+    def hash_expression(self, text_expression):
+        """
+        Hashes a text expression to a non-negative 60-bit integer: the first
+        15 hex digits of the MD5 of its UTF-8 bytes. Every dialect must
+        return the same number for the same text.
+        """
+        raise NotImplementedError
+
+    def hash_sum(self, expression):
+        """Sums hash_expression values without overflowing."""
+        return f"SUM({expression})"
+
+    def modulo(self, expression, divisor):
+        return f"MOD({expression}, {divisor})"
+
+    def distinct_count(self, expression, approximate=False):
+        if not approximate:
+            return f"COUNT(DISTINCT {expression})"
+        return f"APPROX_COUNT_DISTINCT({expression})"
+
+    def binary_sort(self, identifier):
+        """Sort expression ordering text by code point (UTF-8 byte order) rather than by collation."""
+        raise NotImplementedError
+
+    def nulls_last(self, expression):
+        """ORDER BY item sorting `expression` ascending with NULLs after all other values."""
+        return f"{expression} NULLS LAST"
+
+    # --- Sampling ---
+
+    def limit_query(self, query, n):
+        """Limits a SELECT statement to its first n rows."""
+        return f"{query} LIMIT {n}"
+
+    def percentage_sample_query(self, table, n, method, percentage, seed):
+        """
+        Returns a query sampling about `percentage` percent of a table,
+        limited to n rows. method is 'system' (whole blocks) or 'bernoulli'
+        (individual rows); seed, if given, makes the sample repeatable.
+        """
+        raise ValueError(f"Percentage sampling is not supported on {self.label}. Use 'limit' or 'key_hash'.")
+
+    # --- Streaming fetch ---
+
+    def iter_batches(self, conn, query, batch_size, span):
+        """
+        Runs a query and yields its result as pyarrow.RecordBatch objects of
+        at most batch_size rows (see data_fetcher.iter_query_batches). The
+        default fetches batch_size rows per round trip with a DB-API cursor.
+        """
+        cur = conn.cursor()
+        cur.arraysize = batch_size
+        try:
+            cur.execute(query)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield self.record_batch(rows, cur.description)
+        finally:
+            cur.close()
+
+    def arrow_type(self, column):
+        """
+        Arrow type of a result column (a cursor.description entry), or None
+        to infer it from the values. Fixing the type keeps every batch of a
+        stream on the same schema even when a batch is all NULL.
+        """
+        return None
+
+    def record_batch(self, rows, description):
+        arrays = [pa.array(values, type=self.arrow_type(column)) for values, column in zip(zip(*rows), description)]
+        return pa.RecordBatch.from_arrays(arrays, names=[column[0] for column in description])
+
+
+# PostgreSQL type OIDs with a fixed Arrow type
+_POSTGRESQL_ARROW_TYPES = {
+    16: pa.bool_(),                      # boolean
+    20: pa.int64(),                      # bigint
+    21: pa.int16(),                      # smallint
+    23: pa.int32(),                      # integer
+    700: pa.float32(),                   # real
+    701: pa.float64(),                   # double precision
+    25: pa.string(),                     # text
+    1042: pa.string(),                   # character
+    1043: pa.string(),                   # character varying
+    1082: pa.date32(),                   # date
+    1114: pa.timestamp('us'),            # timestamp without time zone
+    1184: pa.timestamp('us', tz='UTC'),  # timestamp with time zone
+}
+_POSTGRESQL_NUMERIC_OID = 1700
+
+
+class PostgreSQLDialect(Dialect):
+    name = 'postgresql'
+    label = 'PostgreSQL'
+    snowflake_types = {
+        'SMALLINT': ('NUMBER',),
+        'INTEGER': ('NUMBER',),
+        'BIGINT': ('NUMBER',),
+        'NUMERIC': ('NUMBER',),
+        'REAL': ('FLOAT',),
+        'DOUBLE PRECISION': ('FLOAT',),
+        'MONEY': ('NUMBER',),
+        'CHARACTER VARYING': ('TEXT',),
+        'CHARACTER': ('TEXT',),
+        'TEXT': ('TEXT',),
+        'UUID': ('TEXT',),
+        'DATE': ('DATE',),
+        'TIME WITHOUT TIME ZONE': ('TIME',),
+        'TIMESTAMP WITHOUT TIME ZONE': ('TIMESTAMP_NTZ',),
+        'TIMESTAMP WITH TIME ZONE': ('TIMESTAMP_TZ', 'TIMESTAMP_LTZ'),
+        'BOOLEAN': ('BOOLEAN',),
+        'BYTEA': ('BINARY',),
+        'JSON': ('VARIANT', 'OBJECT', 'ARRAY'),
+        'JSONB': ('VARIANT', 'OBJECT', 'ARRAY'),
+        'ARRAY': ('ARRAY', 'VARIANT'),
+    }
+    integer_digits = {'SMALLINT': 5, 'INTEGER': 10, 'BIGINT': 19}
+
+    def get_pool(self, database=None):
+        return get_postgresql_pool(database)
+
+    def connection_target(self, conn):
+        info = getattr(conn, 'info', None)
+        if info is not None and hasattr(info, 'dbname'):
+            # psycopg2
+            return f"postgresql://{info.user}@{info.host}:{info.port}/{info.dbname}"
+        return None
+
+    def databases_query(self):
+        return "SELECT datname FROM pg_database WHERE datistemplate = false AND datname != 'postgres'", 'datname'
+
+    def schemas_query(self):
+        return """
+        SELECT schema_name
+        FROM information_schema.schemata
+        WHERE schema_name NOT IN ('pg_catalog', 'information_schema', 'pg_toast')
+        ORDER BY schema_name
+        """, 'schema_name'
+
+    def row_count_query(self, table_name, schema):
+        return f'SELECT COUNT(*) AS "count" FROM {schema}."{table_name}"'
+
+    def catalog_row_counts_query(self, schema):
+        # Planner estimates from pg_class.reltuples, falling back to
+        # pg_stat_user_tables.n_live_tup for tables never analyzed
+        return f"""
+        SELECT c.relname AS "table_name",
+               CASE WHEN c.reltuples > 0 THEN c.reltuples::bigint ELSE COALESCE(s.n_live_tup, 0) END AS "row_count"
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE n.nspname = '{schema}' AND c.relkind IN ('r', 'p')
+        ORDER BY c.relname
+        """
+
+    def change_markers_query(self, schema):
+        # relfilenode changes on TRUNCATE and table rewrites; the tuple
+        # counters are cumulative
+        return f"""
+        SELECT c.relname AS "table_name",
+               c.relfilenode || ':' || COALESCE(s.n_tup_ins, 0) || ':' || COALESCE(s.n_tup_upd, 0)
+                   || ':' || COALESCE(s.n_tup_del, 0) AS "marker"
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE n.nspname = '{schema}' AND c.relkind IN ('r', 'p')
+        """
+
+    def to_utc(self, expression):
+        return f"({expression} AT TIME ZONE 'UTC')"
+
+    def timestamp_text(self, expression):
+        return f"TO_CHAR({expression}, 'YYYY-MM-DD HH24:MI:SS.US')"
+
+    def hash_expression(self, text_expression):
+        return f"('x' || SUBSTR(MD5({text_expression}), 1, 15))::bit(60)::bigint"
+
+    def distinct_count(self, expression, approximate=False):
+        if not approximate:
+            return f"COUNT(DISTINCT {expression})"
+        # Requires the hll extension (CREATE EXTENSION hll)
+        return f"hll_cardinality(hll_add_agg(hll_hash_text({expression})))"
+
+    def binary_sort(self, identifier):
+        return f'{identifier} COLLATE "C"'
+
+    def percentage_sample_query(self, table, n, method, percentage, seed):
+        repeatable = f" REPEATABLE ({int(seed)})" if seed is not None else ""
+        return f"SELECT * FROM {table} TABLESAMPLE {method.upper()} ({percentage}){repeatable} LIMIT {n}"
+
+    def iter_batches(self, conn, query, batch_size, span):
+        # Rows are read through a named (server-side) cursor, so they are
+        # transferred batch_size at a time instead of all at once. Named
+        # cursors only live inside a transaction.
+        autocommit = conn.autocommit
+        if autocommit:
+            conn.autocommit = False
+        cur = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+        cur.itersize = batch_size
+        try:
+            cur.execute(query)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield self.record_batch(rows, cur.description)
+        finally:
+            cur.close()
+            conn.rollback()
+            if autocommit:
+                conn.autocommit = True
+
+    def arrow_type(self, column):
+        if column.type_code == _POSTGRESQL_NUMERIC_OID:
+            if column.precision is not None and column.precision <= 38:
+                return pa.decimal128(column.precision, column.scale)
+            # NUMERIC without a declared precision (reported as 65535) or wider
+            # than decimal128 has no fixed Arrow type; keep the exact value as
+            # text rather than guess a scale per batch
+            return pa.string()
+        return _POSTGRESQL_ARROW_TYPES.get(column.type_code)
+
+    def record_batch(self, rows, description):
+        arrays = []
+        for values, column in zip(zip(*rows), description):
+            arrow_type = self.arrow_type(column)
+            if arrow_type == pa.string() and column.type_code == _POSTGRESQL_NUMERIC_OID:
+                values = [None if v is None else str(v) for v in values]
+            arrays.append(pa.array(values, type=arrow_type))
+        return pa.RecordBatch.from_arrays(arrays, names=[column.name for column in description])
+
+
+class SnowflakeDialect(Dialect):
+    # Snowflake folds unquoted identifiers to uppercase, so schema and table
+    # names are upper-cased in catalog queries and when quoted
+    name = 'snowflake'
+    label = 'Snowflake'
+    is_source = False
+    catalog_row_counts_exact = True
+
+    def get_pool(self, database=None):
+        return get_snowflake_pool(database)
+
+    def connection_target(self, conn):
+        if hasattr(conn, 'account'):
+            # snowflake.connector
+            return f"snowflake://{conn.user}@{conn.account}/{conn.database}"
+        return None
+
+    def databases_query(self):
+        return "SHOW DATABASES", 'name'
+
+    def schemas_query(self):
+        return "SHOW SCHEMAS", 'name'
+
+    def tables_query(self, schema):
+        return f"SHOW TABLES IN SCHEMA {schema}", 'name'
+
+    def row_count_query(self, table_name, schema):
+        return f'SELECT COUNT(*) AS "count" FROM {schema.upper()}.{table_name.upper()}'
+
+    def table_schema_query(self, table_name, schema):
+        return f"""
+        SELECT UPPER(COLUMN_NAME) AS COLUMN_NAME, UPPER(DATA_TYPE) AS DATA_TYPE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = '{schema.upper()}' AND TABLE_NAME = '{table_name.upper()}'
+        ORDER BY COLUMN_NAME
+        """
+
+    def table_columns_query(self, table_name, schema):
+        return super().table_columns_query(table_name.upper(), schema.upper())
+
+    def primary_key_queries(self, table_name, schema):
+        table = self.qualified_table_name(table_name, schema)
+        return [('PRIMARY KEY', f"SHOW PRIMARY KEYS IN TABLE {table}"), ('UNIQUE', f"SHOW UNIQUE KEYS IN TABLE {table}")]
+
+    def schema_columns_query(self, schema):
+        return f"""
+        SELECT c.TABLE_NAME AS "table_name", c.COLUMN_NAME AS "column_name",
+               UPPER(c.DATA_TYPE) AS "data_type", c.ORDINAL_POSITION AS "ordinal_position",
+               c.CHARACTER_MAXIMUM_LENGTH AS "character_maximum_length",
+               c.NUMERIC_PRECISION AS "numeric_precision", c.NUMERIC_SCALE AS "numeric_scale",
+               c.IS_NULLABLE AS "is_nullable", c.COLUMN_DEFAULT AS "column_default"
+        FROM INFORMATION_SCHEMA.COLUMNS c
+        JOIN INFORMATION_SCHEMA.TABLES t
+          ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+        WHERE c.TABLE_SCHEMA = '{schema.upper()}' AND t.TABLE_TYPE = 'BASE TABLE'
+        ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+        """
+
+    def catalog_row_counts_query(self, schema):
+        # Exact and served from metadata
+        return f"""
+        SELECT TABLE_NAME AS "table_name", ROW_COUNT AS "row_count"
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = '{schema.upper()}' AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY TABLE_NAME
+        """
+
+    def change_markers_query(self, schema):
+        return f"""
+        SELECT TABLE_NAME AS "table_name",
+               COALESCE(TO_VARCHAR(LAST_ALTERED, 'YYYY-MM-DD HH24:MI:SS.FF9 TZH:TZM'), '') || ':'
+                   || COALESCE(TO_VARCHAR(ROW_COUNT), '') || ':' || COALESCE(TO_VARCHAR(BYTES), '') AS "marker"
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = '{schema.upper()}' AND TABLE_TYPE = 'BASE TABLE'
+        """
+
+    def quote_identifier(self, name):
+        return '"' + name.upper().replace('"', '""') + '"'
+
+    def to_utc(self, expression):
+        return f"CONVERT_TIMEZONE('UTC', {expression})"
+
+    def timestamp_text(self, expression):
+        return f"TO_CHAR({expression}, 'YYYY-MM-DD HH24:MI:SS.FF6')"
+
+    def hash_expression(self, text_expression):
+        return f"TO_NUMBER(SUBSTR(MD5({text_expression}), 1, 15), 'XXXXXXXXXXXXXXX')"
+
+    def binary_sort(self, identifier):
+        return f"COLLATE({identifier}, 'utf8')"
+
+    def percentage_sample_query(self, table, n, method, percentage, seed):
+        if method == 'bernoulli' and seed is None:
+            # Fixed-size row sampling needs no table size estimate
+            return f"SELECT * FROM {table} SAMPLE ROW ({int(n)} ROWS)"
+        sampling = 'BLOCK' if method == 'system' else 'ROW'
+        seeded = f" SEED ({int(seed)})" if seed is not None else ""
+        return f"SELECT * FROM {table} SAMPLE {sampling} ({percentage}){seeded} LIMIT {n}"
+
+    def iter_batches(self, conn, query, batch_size, span):
+        # fetch_arrow_batches hands over the Arrow result chunks without
+        # creating Python objects per row
+        cur = conn.cursor()
+        try:
+            with execution_policy.statement_slot():
+                cur.execute(query)
+                if span is not None:
+                    span.set(query_id=cur.sfqid)
+                for table in cur.fetch_arrow_batches():
+                    yield from table.to_batches(max_chunksize=batch_size)
+        finally:
+            cur.close()
+
+
+# Result column types of pyodbc (cursor.description type codes are Python types)
+_SQLSERVER_ARROW_TYPES = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    datetime.date: pa.date32(),
+    datetime.datetime: pa.timestamp('us'),
+    bytes: pa.binary(),
+    bytearray: pa.binary(),
+}
+
+# Binary UTF-8 collation: text converted to VARCHAR under it is UTF-8
+# encoded (SQL Server 2019+), so it hashes and sorts like the other dialects
+_SQLSERVER_UTF8_COLLATION = "Latin1_General_100_BIN2_UTF8"
+
+
+class SQLServerDialect(Dialect):
+    # Needs SQL Server 2019 or later (UTF-8 collations, CONCAT_WS, TRIM,
+    # APPROX_COUNT_DISTINCT). Identifiers are bracket-quoted and keep their case.
+    name = 'sqlserver'
+    label = 'SQL Server'
+    hash_separator = "CHAR(31)"
+    null_marker = "CHAR(30)"
+    type_categories = {
+        'BIT': 'boolean',
+        'MONEY': 'number',
+    }
+    snowflake_types = {
+        'TINYINT': ('NUMBER',),
+        'SMALLINT': ('NUMBER',),
+        'INT': ('NUMBER',),
+        'BIGINT': ('NUMBER',),
+        'DECIMAL': ('NUMBER',),
+        'NUMERIC': ('NUMBER',),
+        'MONEY': ('NUMBER',),
+        'SMALLMONEY': ('NUMBER',),
+        'REAL': ('FLOAT',),
+        'FLOAT': ('FLOAT',),
+        'BIT': ('BOOLEAN',),
+        'CHAR': ('TEXT',),
+        'VARCHAR': ('TEXT',),
+        'NCHAR': ('TEXT',),
+        'NVARCHAR': ('TEXT',),
+        'TEXT': ('TEXT',),
+        'NTEXT': ('TEXT',),
+        'UNIQUEIDENTIFIER': ('TEXT',),
+        'XML': ('TEXT', 'VARIANT'),
+        'DATE': ('DATE',),
+        'TIME': ('TIME',),
+        'DATETIME': ('TIMESTAMP_NTZ',),
+        'DATETIME2': ('TIMESTAMP_NTZ',),
+        'SMALLDATETIME': ('TIMESTAMP_NTZ',),
+        'DATETIMEOFFSET': ('TIMESTAMP_TZ', 'TIMESTAMP_LTZ'),
+        'BINARY': ('BINARY',),
+        'VARBINARY': ('BINARY',),
+        'IMAGE': ('BINARY',),
+    }
+    integer_digits = {'TINYINT': 3, 'SMALLINT': 5, 'INT': 10, 'BIGINT': 19}
+    count_rows = "COUNT_BIG(*)"
+
+    def get_pool(self, database=None):
+        # pyodbc is only needed when SQL Server is used
+        from config.sqlserver_config import get_sqlserver_pool
+        return get_sqlserver_pool(database)
+
+    def connection_target(self, conn):
+        if type(conn).__module__ != 'pyodbc':
+            return None
+        import pyodbc
+        return (f"sqlserver://{conn.getinfo(pyodbc.SQL_USER_NAME)}@{conn.getinfo(pyodbc.SQL_SERVER_NAME)}"
+                f"/{conn.getinfo(pyodbc.SQL_DATABASE_NAME)}")
+
+    def databases_query(self):
+        # database_id 1-4 are the system databases
+        return "SELECT name FROM sys.databases WHERE database_id > 4 ORDER BY name", 'name'
+
+    def schemas_query(self):
+        return """
+        SELECT s.name AS "schema_name"
+        FROM sys.schemas s
+        WHERE s.name NOT IN ('sys', 'INFORMATION_SCHEMA', 'guest') AND s.name NOT LIKE 'db[_]%'
+        ORDER BY s.name
+        """, 'schema_name'
+
+    def catalog_row_counts_query(self, schema):
+        # Row counts of the heap or clustered index, kept up to date by the
+        # storage engine (not guaranteed exact under concurrent changes)
+        return f"""
+        SELECT t.name AS "table_name", SUM(p.rows) AS "row_count"
+        FROM sys.tables t
+        JOIN sys.schemas s ON s.schema_id = t.schema_id
+        JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+        WHERE s.name = '{schema}'
+        GROUP BY t.name
+        ORDER BY t.name
+        """
+
+    def change_markers_query(self, schema):
+        # modify_date changes on DDL, the row count on most loads and
+        # last_user_update on any write. Index usage statistics are reset
+        # when the server restarts, which only makes tables look changed.
+        # Reading them needs VIEW SERVER STATE.
+        return f"""
+        SELECT t.name AS "table_name",
+               CONVERT(VARCHAR(33), t.modify_date, 126)
+                   + ':' + CAST((SELECT SUM(p.rows) FROM sys.partitions p
+                                 WHERE p.object_id = t.object_id AND p.index_id IN (0, 1)) AS VARCHAR(20))
+                   + ':' + COALESCE((SELECT CONVERT(VARCHAR(33), MAX(u.last_user_update), 126) FROM sys.dm_db_index_usage_stats u
+                                     WHERE u.database_id = DB_ID() AND u.object_id = t.object_id), '') AS "marker"
+        FROM sys.tables t
+        JOIN sys.schemas s ON s.schema_id = t.schema_id
+        WHERE s.name = '{schema}'
+        """
+
+    def quote_identifier(self, name):
+        return '[' + name.replace(']', ']]') + ']'
+
+    def text_cast(self, expression):
+        return f"CAST({expression} AS NVARCHAR(MAX))"
+
+    def number_text(self, text):
+        # RTRIM with characters needs SQL Server 2022; cut the trailing zeros
+        # off the reversed text instead
+        stripped = f"REVERSE(SUBSTRING(REVERSE({text}), PATINDEX('%[^0]%', REVERSE({text})), 64))"
+        return (f"CASE WHEN {text} LIKE '%.%' THEN CASE WHEN {stripped} LIKE '%.' "
+                f"THEN LEFT({stripped}, LEN({stripped}) - 1) ELSE {stripped} END ELSE {text} END")
+
+    def to_utc(self, expression):
+        return f"CAST(SWITCHOFFSET({expression}, '+00:00') AS DATETIME2(6))"
+
+    def date_text(self, expression):
+        return f"CONVERT(VARCHAR(10), {expression}, 23)"
+
+    def timestamp_text(self, expression):
+        # Style 121 of DATETIME2(6) is YYYY-MM-DD HH:MI:SS.ffffff
+        return f"CONVERT(VARCHAR(26), CAST({expression} AS DATETIME2(6)), 121)"
+
+    def boolean_text(self, expression):
+        return f"CASE WHEN {expression} = 1 THEN 'true' WHEN {expression} = 0 THEN 'false' END"
+
+    def hash_expression(self, text_expression):
+        # The first 60 bits of the digest, as high 32 bits * 2^28 + the next
+        # 28 bits. Binary shorter than BIGINT converts as an unsigned value.
+        digest = f"HASHBYTES('MD5', CAST(({text_expression}) COLLATE {_SQLSERVER_UTF8_COLLATION} AS VARCHAR(MAX)))"
+        return f"(CAST(SUBSTRING({digest}, 1, 4) AS BIGINT) * 268435456 + CAST(SUBSTRING({digest}, 5, 4) AS BIGINT) / 16)"
+
+    def hash_sum(self, expression):
+        # SUM of BIGINT is BIGINT; a few thousand 60-bit hashes overflow it
+        return f"SUM(CAST({expression} AS DECIMAL(38, 0)))"
+
+    def modulo(self, expression, divisor):
+        return f"(({expression}) % {divisor})"
+
+    def binary_sort(self, identifier):
+        return f"CAST({identifier} COLLATE {_SQLSERVER_UTF8_COLLATION} AS VARCHAR(MAX))"
+
+    def nulls_last(self, expression):
+        # SQL Server sorts NULLs first and has no NULLS LAST
+        return f"CASE WHEN {expression} IS NULL THEN 1 ELSE 0 END, {expression}"
+
+    def limit_query(self, query, n):
+        return f"SELECT TOP ({int(n)}) " + query[len("SELECT "):]
+
+    def percentage_sample_query(self, table, n, method, percentage, seed):
+        if method == 'system':
+            repeatable = f" REPEATABLE ({int(seed)})" if seed is not None else ""
+            return f"SELECT TOP ({int(n)}) * FROM {table} TABLESAMPLE SYSTEM ({percentage} PERCENT){repeatable}"
+        if seed is not None:
+            raise ValueError("Seeded row sampling is not supported on SQL Server. Use 'system' or 'key_hash'.")
+        # TABLESAMPLE only samples pages; draw a random number per row instead
+        return f"SELECT TOP ({int(n)}) * FROM {table} WHERE RAND(CHECKSUM(NEWID())) < {percentage / 100}"
+
+    def arrow_type(self, column):
+        # pyodbc description: (name, type_code, display_size, internal_size, precision, scale, null_ok)
+        if column[1] is Decimal:
+            precision, scale = column[4], column[5]
+            if precision and precision <= 38:
+                return pa.decimal128(precision, scale or 0)
+            return None
+        return _SQLSERVER_ARROW_TYPES.get(column[1])
+
+
+register_dialect(PostgreSQLDialect())
+register_dialect(SnowflakeDialect())
+register_dialect(SQLServerDialect())
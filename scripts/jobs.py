@@ -0,0 +1,299 @@
+"""
+Resumable, checkpointed validation jobs.
+
+A job is one run of the headless runner (python -m scripts.validate) in a
+worker process of its own, detached from whoever started it, so it outlives
+Streamlit reruns, browser reconnects and app restarts. Everything about a
+job lives in its directory under JOBS_DIR:
+
+- job.json: the runner's command line arguments, creation time and the pid
+  and start time of the current worker (so a pid reused by an unrelated
+  process, e.g. after a reboot, is not taken for the worker).
+- checkpoint.jsonl: an append-only log of events, one JSON object per line,
+  flushed to disk as they happen: run_started, pair_started, table (with the
+  full table result), pair_finished, run_finished (or run_incomplete when
+  tables failed) and, for row-level diffs, chunk (see
+  comparator.parallel_compare_tables).
+- worker.log: the worker's output.
+- the result files (xlsx, csv, json), rewritten on every attempt.
+
+Resuming a job starts a new worker with the same arguments; tables already
+in the checkpoint are reported from it instead of being checked again, so
+an interrupted run continues from the last finished table.
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from scripts.results_store import serialize_result, deserialize_result
+
+JOBS_DIR = os.getenv("JOBS_DIR", ".validation/jobs")
+
+JOB_FILE = "job.json"
+CHECKPOINT_FILE = "checkpoint.jsonl"
+LOG_FILE = "worker.log"
+
+# Job states reported by get_job_status. Interrupted jobs (worker stopped,
+# crashed or finished with failed tables) can be resumed
+JOB_STATES = ('running', 'finished', 'interrupted')
+
+# Workers started by this process, so finished ones can be reaped
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+class JobCheckpoint:
+    """
+    The append-only event log of one job. Every event is written and
+    fsynced before record returns, so a crash loses at most the event being
+    written; an incomplete last line is ignored when the log is read back.
+    Thread safe.
+
+    Parameters:
+    - path (str): Log file. Created if missing.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self.events = read_events(path)
+        # Terminate a line left incomplete by a crash, so new events start on their own line
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb+") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    def record(self, event, **fields):
+        entry = dict(fields, event=event, at=time.time())
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.events.append(entry)
+
+    def record_table(self, pair, result):
+        """Records a finished table result; failed tables are left to be retried."""
+        if "error" in result:
+            return
+        self.record("table", pair=pair, table=result["table"], result=serialize_result(result))
+
+    def completed_tables(self, pair):
+        """Returns {upper-cased table name: result} of the tables already checked for a pair."""
+        with self._lock:
+            events = [e for e in self.events if e["event"] == "table" and e["pair"] == pair]
+        return {e["table"].upper(): deserialize_result(e["result"]) for e in events}
+
+    def record_chunk(self, scope, chunk, counts, differences):
+        """Records one compared chunk of a row-level diff identified by `scope`."""
+        self.record("chunk", scope=scope, chunk=chunk, counts=counts, differences=differences)
+
+    def completed_chunks(self, scope):
+        """Returns {chunk: (counts, differences)} of the chunks already compared for `scope`."""
+        with self._lock:
+            return {
+                e["chunk"]: (e["counts"], e["differences"])
+                for e in self.events if e["event"] == "chunk" and e["scope"] == scope
+            }
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.events = []
+
+
+def read_events(path):
+    """Reads a checkpoint log, skipping a partially written last line."""
+    events = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return events
+
+
+def _read_job(job_dir):
+    with open(os.path.join(job_dir, JOB_FILE)) as f:
+        return json.load(f)
+
+
+def _write_job(job_dir, job):
+    path = os.path.join(job_dir, JOB_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(job, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def create_job(args, label=None, jobs_dir=JOBS_DIR):
+    """
+    Creates the directory of a new job without starting it.
+
+    Parameters:
+    - args (list): Arguments for python -m scripts.validate, without
+      --job-dir and --output-dir (the job directory is used for both).
+    - label (str): Optional. Shown in job listings; defaults to the arguments.
+
+    Returns the job directory.
+    """
+    job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    job_dir = os.path.join(jobs_dir, job_id)
+    os.makedirs(job_dir)
+    _write_job(job_dir, {"id": job_id, "label": label or " ".join(args), "args": list(args),
+                         "created_at": time.time(), "pid": None, "pid_started": None, "attempts": 0})
+    return job_dir
+
+
+def start_job(job_dir):
+    """
+    Starts (or resumes) the worker of a job in a new session, detached from
+    this process. Raises ValueError if the job is already running.
+    Returns the worker's pid.
+    """
+    if get_job_status(job_dir)["state"] == 'running':
+        raise ValueError(f"Job {os.path.basename(job_dir)} is already running.")
+    job = _read_job(job_dir)
+    command = [sys.executable, "-m", "scripts.validate", *job["args"], "--job-dir", job_dir]
+    if os.name == 'nt':
+        detach = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS}
+    else:
+        detach = {"start_new_session": True}
+    with open(os.path.join(job_dir, LOG_FILE), "a") as log:
+        worker = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **detach)
+    with _workers_lock:
+        _workers[worker.pid] = worker
+    job["pid"] = worker.pid
+    job["pid_started"] = _process_start_time(worker.pid)
+    job["attempts"] += 1
+    _write_job(job_dir, job)
+    return worker.pid
+
+
+def cancel_job(job_dir):
+    """Stops a running job's worker; the job can be resumed later."""
+    job = _read_job(job_dir)
+    pid = job["pid"]
+    if pid and _is_running(pid, job.get("pid_started")):
+        os.kill(pid, signal.SIGTERM)
+
+
+def _process_start_time(pid):
+    # Start time of a process in epoch seconds, from /proc (Linux); None
+    # where it cannot be read. Field 22 of /proc/<pid>/stat is the start
+    # time in clock ticks since boot
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name (field 2) may contain spaces and parentheses
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime "))
+        return round(boot_time + int(fields[19]) / os.sysconf("SC_CLK_TCK"), 2)
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+
+
+def _is_running(pid, started=None):
+    with _workers_lock:
+        worker = _workers.get(pid)
+    if worker is not None:
+        # Our own child: poll() also reaps it once it has exited
+        return worker.poll() is None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # A live process with another start time reuses the pid of a dead worker
+    current = _process_start_time(pid)
+    if started is not None and current is not None and abs(current - started) > 1:
+        return False
+    return True
+
+
+def get_job_status(job_dir):
+    """
+    Summarizes a job from its job.json and checkpoint log.
+
+    Returns a dict with 'id', 'label', 'dir', 'state' (one of JOB_STATES),
+    'attempts', 'created_at', 'tables_total', 'tables_done', 'mismatches'
+    (tables not matching, once finished), 'failures' (tables whose checks
+    failed in the last attempt), 'exit_code' (None until finished)
+    and 'outputs' (result files present).
+    """
+    job = _read_job(job_dir)
+    events = read_events(os.path.join(job_dir, CHECKPOINT_FILE))
+
+    # Table totals come from the latest attempt's pair_started events; done
+    # tables from every attempt, as resumed tables are not re-checked
+    totals, done, mismatches = {}, {}, 0
+    finished = None
+    failures = 0
+    for event in events:
+        if event["event"] == "run_started":
+            finished = None
+            failures = 0
+        elif event["event"] == "run_incomplete":
+            failures = event["failures"]
+        elif event["event"] == "pair_started":
+            totals[event["pair"]] = event["tables"]
+        elif event["event"] == "table":
+            done.setdefault(event["pair"], set()).add(event["table"].upper())
+        elif event["event"] == "run_finished":
+            finished = event
+
+    # A resumed worker may not have logged run_started yet, so liveness comes first
+    if job["pid"] and _is_running(job["pid"], job.get("pid_started")):
+        state = 'running'
+    elif finished is not None:
+        state = 'finished'
+        mismatches = finished["mismatches"]
+    else:
+        state = 'interrupted'
+
+    outputs = sorted(
+        name for name in os.listdir(job_dir)
+        if name.endswith((".xlsx", ".csv", ".json", ".parquet")) and name != JOB_FILE
+    )
+    return {
+        "id": job["id"],
+        "label": job["label"],
+        "dir": job_dir,
+        "state": state,
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "tables_total": sum(totals.values()),
+        "tables_done": sum(len(tables) for tables in done.values()),
+        "mismatches": mismatches,
+        "failures": failures,
+        "exit_code": None if finished is None else finished["exit_code"],
+        "outputs": outputs,
+    }
+
+
+def list_jobs(jobs_dir=JOBS_DIR):
+    """Statuses of all jobs under `jobs_dir`, newest first."""
+    if not os.path.isdir(jobs_dir):
+        return []
+    statuses = []
+    for name in sorted(os.listdir(jobs_dir), reverse=True):
+        job_dir = os.path.join(jobs_dir, name)
+        if os.path.isfile(os.path.join(job_dir, JOB_FILE)):
+            statuses.append(get_job_status(job_dir))
+    return statuses
@@ -1,5 +1,8 @@
 import pandas as pd
 
+from scripts import data_fetcher
+from scripts.dialects import get_dialect
+
 def check_duplicates(df):
     return df.duplicated().sum()
 
@@ -7,3 +10,70 @@ def check_nulls(df):
     # Returns percentage of nulls per column
     nulls = df.isnull().mean() * 100
     return nulls
+
+
+# --- Full-table profiling pushed down to the database ---
+
+def build_profile_query(columns, table_name, source='postgresql', schema='public', approximate=False, duplicates=True):
+    """
+    Builds one aggregate query profiling a whole table: row count, NULL count
+    and distinct count per column, and the number of duplicate rows.
+
+    Parameters:
+    - columns (list): (column_name, data_type) pairs.
+    - approximate (bool): Use HyperLogLog distinct counts (APPROX_COUNT_DISTINCT
+      on Snowflake and SQL Server, the hll extension on PostgreSQL) instead of exact
+      COUNT(DISTINCT ...), which is much cheaper on large tables.
+    - duplicates (bool): Also count duplicate rows. This groups by every
+      column and is the most expensive part of the query.
+    """
+    table = data_fetcher.qualified_table_name(table_name, source, schema)
+    values = [data_fetcher.normalized_value_expression(name, data_type, source) for name, data_type in columns]
+
+    select = ['COUNT(*) AS "row_count"']
+    for i, ((name, _), value) in enumerate(zip(columns, values)):
+        select.append(f'COUNT(*) - COUNT({data_fetcher.quote_identifier(name, source)}) AS "c{i}_nulls"')
+        select.append(f'{get_dialect(source).distinct_count(value, approximate)} AS "c{i}_distinct"')
+    if duplicates and values:
+        # Same semantics as check_duplicates: every copy after the first counts
+        select.append(
+            f'(SELECT COALESCE(SUM(n - 1), 0) FROM (SELECT COUNT(*) AS n FROM {table} '
+            f'GROUP BY {", ".join(values)} HAVING COUNT(*) > 1) d) AS "duplicate_rows"'
+        )
+
+    select_list = ",\n        ".join(select)
+    return f"SELECT\n        {select_list}\n    FROM {table}"
+
+
+def get_table_profile(conn, table_name, source='postgresql', schema='public', columns=None, approximate=False, duplicates=True):
+    """
+    Profiles a whole table in the database with a single query (see
+    build_profile_query), instead of estimating from a sample.
+
+    Parameters:
+    - columns (list): Optional. (column_name, data_type) pairs; defaults to
+      all columns of the table.
+
+    Returns a dict with 'row_count', 'duplicate_rows' (None if not counted)
+    and 'columns', a DataFrame indexed by upper-cased column name with
+    null_count, null_percentage and distinct_count.
+    """
+    if columns is None:
+        table_columns = data_fetcher.get_table_columns(conn, table_name, source, schema)
+        columns = list(table_columns[["column_name", "data_type"]].itertuples(index=False, name=None))
+
+    row = data_fetcher.run_query(conn, build_profile_query(columns, table_name, source, schema, approximate, duplicates)).iloc[0]
+    row_count = int(row["row_count"])
+
+    column_stats = pd.DataFrame({
+        "column_name": [name.upper() for name, _ in columns],
+        "null_count": [int(row[f"c{i}_nulls"]) for i in range(len(columns))],
+        "distinct_count": [int(row[f"c{i}_distinct"]) for i in range(len(columns))],
+    }).set_index("column_name")
+    column_stats["null_percentage"] = column_stats["null_count"] * 100.0 / row_count if row_count else 0.0
+
+    return {
+        "row_count": row_count,
+        "duplicate_rows": int(row["duplicate_rows"]) if duplicates and columns else None,
+        "columns": column_stats[["null_count", "null_percentage", "distinct_count"]],
+    }
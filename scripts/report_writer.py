@@ -0,0 +1,173 @@
+import csv
+import re
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+from scripts import comparator, summary_report
+
+# Column types of the flattened per-table records (summary_report.result_to_record
+# plus the compared database/schema pair), fixed so every Parquet row group
+# has the same schema even when a column is all NULL
+RECORD_SCHEMA = pa.schema([
+    ("source", pa.string()),
+    ("source_database", pa.string()),
+    ("source_schema", pa.string()),
+    ("sf_database", pa.string()),
+    ("sf_schema", pa.string()),
+    ("table", pa.string()),
+    ("match", pa.bool_()),
+    ("error", pa.string()),
+    ("row_count_source", pa.int64()),
+    ("row_count_target", pa.int64()),
+    ("row_count_match", pa.bool_()),
+    ("column_count_source", pa.int64()),
+    ("column_count_target", pa.int64()),
+    ("column_match", pa.bool_()),
+    ("schema_drift_errors", pa.int64()),
+    ("schema_drift_warnings", pa.int64()),
+    ("duplicates_source", pa.int64()),
+    ("duplicates_target", pa.int64()),
+    ("content_match", pa.bool_()),
+    ("max_null_difference", pa.int64()),
+    ("nulls_aligned", pa.bool_()),
+])
+
+_INVALID_SHEET_CHARACTERS = re.compile(r"[\[\]:*?/\\]")
+
+
+class ExcelReportWriter:
+    """
+    Writes the summary report workbook one table sheet at a time.
+
+    Uses xlsxwriter's constant_memory mode: each row is flushed to a temporary
+    file as soon as it is written, so memory use does not grow with the number
+    of tables. The workbook is only complete once close() is called; for a
+    crash-safe record of progress use ResultsFileWriter with CSV.
+
+    Parameters:
+    - path (str): Destination .xlsx file.
+    - source (str): Source database type, names the source side in the sheets.
+    """
+
+    def __init__(self, path, source='postgresql'):
+        self.path = path
+        self.source = source
+        self._workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        self._bold = self._workbook.add_format({'bold': True})
+        self._sheet_names = set()
+
+    def _sheet_name(self, table):
+        # Excel sheet names are limited to 31 characters and must be unique
+        base = _INVALID_SHEET_CHARACTERS.sub("_", table)[:31]
+        name, suffix = base, 1
+        while name.upper() in self._sheet_names:
+            suffix += 1
+            name = f"{base[:31 - len(str(suffix)) - 1]}~{suffix}"
+        self._sheet_names.add(name.upper())
+        return name
+
+    def write_table(self, result):
+        """Writes one table's metrics, null comparison and schema drift to its own sheet."""
+        if "error" in result:
+            return
+        worksheet = self._workbook.add_worksheet(self._sheet_name(result["table"]))
+
+        # Rows must be written top to bottom in constant_memory mode
+        metrics = summary_report.build_summary_metrics(result, source=self.source)
+        worksheet.write_row(0, 0, list(metrics.columns), self._bold)
+        for row, values in enumerate(metrics.itertuples(index=False), start=1):
+            worksheet.write_row(row, 0, [_cell(v) for v in values])
+
+        null_comparison = result["null_comparison"]
+        worksheet.write_row(10, 0, list(null_comparison.columns), self._bold)
+        for row, values in enumerate(null_comparison.itertuples(index=False), start=11):
+            worksheet.write_row(row, 0, [_cell(v) for v in values])
+
+        schema_drift = result.get("schema_drift")
+        if schema_drift:
+            first_row = 11 + len(null_comparison) + 1
+            names = [name for name in comparator.SCHEMA_DRIFT_COLUMNS if name != "table"]
+            worksheet.write_row(first_row, 0, names, self._bold)
+            for row, record in enumerate(schema_drift, start=first_row + 1):
+                worksheet.write_row(row, 0, [_cell(record.get(name)) for name in names])
+
+    def close(self):
+        self._workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ResultsFileWriter:
+    """
+    Appends one flattened record per table (see summary_report.result_to_record)
+    to a single columnar results file, suitable for schemas with thousands of
+    tables.
+
+    Parameters:
+    - path (str): Destination file.
+    - file_format (str): 'csv' (flushed after every table, so a crashed run
+      keeps everything written so far) or 'parquet' (written in row groups
+      of `row_group_size` records).
+    - extra (dict): Optional. Constant columns added to every record, e.g. the
+      compared database/schema pair.
+    """
+
+    def __init__(self, path, file_format='csv', extra=None, row_group_size=500):
+        if file_format not in ('csv', 'parquet'):
+            raise ValueError("Unsupported results format. Use 'csv' or 'parquet'.")
+        self.path = path
+        self.file_format = file_format
+        self.extra = extra or {}
+        self.row_group_size = row_group_size
+        self._pending = []
+        if file_format == 'csv':
+            self._file = open(path, "w", newline="")
+            self._csv = csv.DictWriter(self._file, fieldnames=RECORD_SCHEMA.names, extrasaction="ignore")
+            self._csv.writeheader()
+            self._file.flush()
+        else:
+            self._parquet = pq.ParquetWriter(path, RECORD_SCHEMA)
+
+    def write_table(self, result, extra=None):
+        record = dict(self.extra, **(extra or {}))
+        record.update(summary_report.result_to_record(result))
+        if self.file_format == 'csv':
+            self._csv.writerow(record)
+            self._file.flush()
+        else:
+            self._pending.append(record)
+            if len(self._pending) >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._parquet.write_table(pa.Table.from_pylist(self._pending, schema=RECORD_SCHEMA))
+            self._pending = []
+
+    def close(self):
+        if self.file_format == 'csv':
+            self._file.close()
+        else:
+            self._flush()
+            self._parquet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _cell(value):
+    # xlsxwriter does not accept numpy scalars or None in write_row
+    if value is None:
+        return ""
+    if hasattr(value, "item"):
+        return value.item()
+    return value
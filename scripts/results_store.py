@@ -0,0 +1,121 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from scripts import summary_report
+
+DEFAULT_PATH = os.getenv("RESULTS_STORE_PATH", ".validation/results.db")
+
+
+class ResultsStore:
+    """
+    Local SQLite store of per-table validation results, used to skip tables
+    that have not changed since they were last checked.
+
+    Each row records, per (run key, table): when it was checked, the change
+    markers of both sides at that time (see data_fetcher.get_schema_change_markers
+    and get_schema_watermarks), the row counts, content digests (when
+    checksums ran), the options the checks ran with, and the full result.
+
+    Parameters:
+    - path (str): SQLite database file. Created if missing.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS table_results (
+                run_key TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                checked_at REAL NOT NULL,
+                source_marker TEXT,
+                target_marker TEXT,
+                options TEXT,
+                row_count_source INTEGER,
+                row_count_target INTEGER,
+                digest_source TEXT,
+                digest_target TEXT,
+                match INTEGER,
+                result TEXT NOT NULL,
+                PRIMARY KEY (run_key, table_name)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, run_key, table):
+        """Returns the stored row for a table as a dict, or None."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT checked_at, source_marker, target_marker, options, result FROM table_results WHERE run_key = ? AND table_name = ?",
+                (run_key, table.upper())
+            )
+            row = cur.fetchone()
+        if row is None:
+            return None
+        checked_at, source_marker, target_marker, options, result = row
+        return {
+            "checked_at": checked_at,
+            "source_marker": source_marker,
+            "target_marker": target_marker,
+            "options": options,
+            "result": deserialize_result(result),
+        }
+
+    def save(self, run_key, result, source_marker, target_marker, options):
+        """Records a table result unless the checks failed."""
+        if "error" in result:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO table_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_key, result["table"].upper(), time.time(), source_marker, target_marker, options,
+                    int(result["row_count_source"]), int(result["row_count_target"]),
+                    result.get("content_digest_source"), result.get("content_digest_target"),
+                    int(summary_report.is_table_match(result)), serialize_result(result),
+                )
+            )
+            self._conn.commit()
+
+    def forget(self, run_key=None):
+        """Deletes stored results for one run key, or all of them."""
+        with self._lock:
+            if run_key is None:
+                self._conn.execute("DELETE FROM table_results")
+            else:
+                self._conn.execute("DELETE FROM table_results WHERE run_key = ?", (run_key,))
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def serialize_result(result):
+    """JSON text of a (successful) table result, see ReportExecutor.iter_results."""
+    stored = {key: value for key, value in result.items() if key != "null_comparison"}
+    stored["null_comparison"] = result["null_comparison"].to_dict(orient="split")
+    return json.dumps(stored, default=_json_default)
+
+
+def deserialize_result(text):
+    """Inverse of serialize_result."""
+    result = json.loads(text)
+    split = result["null_comparison"]
+    result["null_comparison"] = pd.DataFrame(split["data"], columns=split["columns"])
+    return result
+
+
+def _json_default(value):
+    # numpy scalars from pandas aggregations
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
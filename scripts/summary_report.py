@@ -0,0 +1,464 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from scripts import data_fetcher, comparator, quality_checks, tracing
+from scripts.dialects import get_dialect
+
+SAMPLE_SIZE = 120
+
+# Tables per exact source COUNT(*) statement; batches run concurrently
+ROW_COUNT_BATCH_SIZE = 50
+
+# Tables whose Snowflake checksum queries are submitted together (asynchronously, on one connection)
+CHECKSUM_BATCH_SIZE = 8
+
+
+class ReportExecutor:
+    """
+    Runs the per-table summary checks for a whole schema concurrently.
+
+    Each database gets its own thread pool, so concurrency is bounded per
+    database (`workers_per_database` statements in flight on each side) and
+    a slow Snowflake warehouse does not hold up work on the source. Queries are
+    submitted at most once per (side, check, table), so checks that need the
+    same data share one query. Column metadata and row counts are fetched
+    for the whole schema up front, so only the sample query is per table.
+
+    Work runs in the submitting context, so with an active tracing.Trace
+    every table gets a 'check_table' span and every check a span of its own
+    holding the check's queries.
+
+    Parameters:
+    - pool_source / pool_target: ConnectionPool for the source / Snowflake.
+    - source_schema / target_schema: Schemas being compared.
+    - workers_per_database (int): Concurrent queries per database.
+    - include_checksums (bool): Also run the full-content checksum per table.
+      Snowflake checksums are submitted CHECKSUM_BATCH_SIZE tables at a
+      time through data_fetcher.run_queries.
+    - exact_row_counts (bool): Exact source counts (batched COUNT(*))
+      instead of catalog estimates. Snowflake counts are always exact.
+    - sample_method (str): See data_fetcher.get_sample_data.
+    - sample_confidence (float): Optional. Size each table's sample for this
+      confidence level (see data_fetcher.get_sample_size) instead of using
+      a fixed SAMPLE_SIZE rows.
+    - profile_quality (bool): Compute null percentages and duplicate counts
+      over the full tables in the databases (quality_checks.get_table_profile)
+      instead of from samples.
+    - store (ResultsStore): Optional. Enables incremental runs: tables whose
+      change markers on both sides are unchanged since their stored result
+      (checked with the same options) are not checked again.
+    - store_key (str): Identifies the compared database/schema pair in the store.
+    - watermark_column (str): Optional. Column (e.g. updated_at) whose MAX is
+      added to the change markers of the tables that have it.
+    - source (str): Source database type, one of dialects.source_types().
+    """
+
+    def __init__(self, pool_source, pool_target, source_schema, target_schema, workers_per_database=4, include_checksums=False,
+                 exact_row_counts=True, sample_method='limit', sample_confidence=None,
+                 profile_quality=False, store=None, store_key=None, watermark_column=None, source='postgresql'):
+        if not get_dialect(source).is_source:
+            raise ValueError(f"{get_dialect(source).label} cannot be used as the source database.")
+        self.source = source
+        self.sides = {
+            source: (pool_source, source_schema),
+            'snowflake': (pool_target, target_schema),
+        }
+        self.include_checksums = include_checksums
+        self.exact_row_counts = exact_row_counts
+        self.sample_method = sample_method
+        self.sample_confidence = sample_confidence
+        self.profile_quality = profile_quality
+        self.store = store
+        self.store_key = store_key
+        self.watermark_column = watermark_column
+        self._markers = {}
+        self.workers_per_database = workers_per_database
+        self._executors = {
+            source: ThreadPoolExecutor(max_workers=workers_per_database, thread_name_prefix=f"report-{source}")
+            for source in self.sides
+        }
+        self._futures = {}
+        self._futures_lock = threading.Lock()
+        self._row_counts = {}
+        self._checksum_batches = {}
+        self._checked = set()
+        self._schema_drift = None
+        self._schema_drift_lock = threading.Lock()
+
+    def _submit(self, source, check, table, fn, *args):
+        key = (source, check, table)
+        with self._futures_lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = tracing.submit_in_context(self._executors[source], self._run_query, source, check, table, fn, *args)
+                self._futures[key] = future
+        return future
+
+    def _run_query(self, source, check, table, fn, *args):
+        pool, _ = self.sides[source]
+        with tracing.span(check, source=source, table=None if table is None else str(table)):
+            with pool.connection() as conn:
+                return fn(conn, *args)
+
+    def prefetch_metadata(self, tables):
+        """
+        Submits the schema-wide column and row count queries for both sides.
+        Called by iter_results; per-table checks then only look results up.
+        """
+        for source, (_, schema) in self.sides.items():
+            self._submit(source, 'columns', None, data_fetcher.get_schema_columns, source, schema)
+
+            if source == self.source and self.exact_row_counts:
+                batches = [tables[i:i + ROW_COUNT_BATCH_SIZE] for i in range(0, len(tables), ROW_COUNT_BATCH_SIZE)]
+            else:
+                batches = [None]
+            for batch in batches:
+                key = tuple(batch) if batch else None
+                future = self._submit(source, 'row_counts', key, data_fetcher.get_schema_row_counts, source, schema, self.exact_row_counts, batch)
+                for table in (batch or tables):
+                    self._row_counts[(source, table.upper())] = future
+
+        if self.include_checksums:
+            for i in range(0, len(tables), CHECKSUM_BATCH_SIZE):
+                batch = tuple(tables[i:i + CHECKSUM_BATCH_SIZE])
+                for table in batch:
+                    self._checksum_batches[table.upper()] = batch
+
+    def _get_row_count(self, source, table):
+        if (source, table.upper()) not in self._row_counts:
+            self.prefetch_metadata([table])
+        counts = self._row_counts[(source, table.upper())].result()
+        found = counts.loc[counts["table_name"].str.upper() == table.upper(), "row_count"]
+        if found.empty:
+            raise ValueError(f"Table {table} not found in {source} schema {self.sides[source][1]}")
+        return int(found.iloc[0])
+
+    def _get_columns(self, source, table):
+        _, schema = self.sides[source]
+        columns = self._submit(source, 'columns', None, data_fetcher.get_schema_columns, source, schema).result()
+        return columns[columns["table_name"].str.upper() == table.upper()].reset_index(drop=True)
+
+    def _get_schema_drift(self, table):
+        # Column definitions of all tables are diffed in one go, the first time any table needs them
+        with self._schema_drift_lock:
+            if self._schema_drift is None:
+                columns = [
+                    self._submit(source, 'columns', None, data_fetcher.get_schema_columns, source, schema).result()
+                    for source, (_, schema) in self.sides.items()
+                ]
+                drift = comparator.compare_schema_columns(*columns, source=self.source)["drift"]
+                self._schema_drift = {key: group for key, group in drift.groupby(drift["table"].str.upper())}
+        drift = self._schema_drift.get(table.upper())
+        return [] if drift is None else drift.drop(columns="table").to_dict(orient="records")
+
+    def check_table(self, table):
+        """
+        Runs all checks for one table on both sides and returns a result dict
+        (see iter_results). Blocks until both sides have finished.
+        """
+        try:
+            with tracing.span("check_table", table=table):
+                return self._check_table(table)
+        finally:
+            self._forget(table)
+
+    def _check_table(self, table):
+        row_counts = {source: self._get_row_count(source, table) for source in self.sides}
+        columns = {source: self._get_columns(source, table) for source in self.sides}
+
+        if self.profile_quality:
+            profiles = {
+                source: self._submit(source, 'profile', table, quality_checks.get_table_profile, table, source, schema,
+                                     list(columns[source][["column_name", "data_type"]].itertuples(index=False, name=None)))
+                for source, (_, schema) in self.sides.items()
+            }
+            profile_source = profiles[self.source].result()
+            profile_target = profiles['snowflake'].result()
+            duplicates_source = profile_source["duplicate_rows"]
+            duplicates_target = profile_target["duplicate_rows"]
+            nulls_source = profile_source["columns"]["null_percentage"]
+            nulls_target = profile_target["columns"]["null_percentage"]
+        else:
+            if self.sample_confidence:
+                sample_size = data_fetcher.get_sample_size(row_counts[self.source], self.sample_confidence)
+            else:
+                sample_size = SAMPLE_SIZE
+            samples = {
+                source: self._submit(source, 'sample', table, data_fetcher.get_sample_data, table, sample_size, source, schema,
+                                     self.sample_method, None, row_counts[source])
+                for source, (_, schema) in self.sides.items()
+            }
+            sample_source = samples[self.source].result()
+            sample_target = samples['snowflake'].result()
+            duplicates_source = quality_checks.check_duplicates(sample_source)
+            duplicates_target = quality_checks.check_duplicates(sample_target)
+            nulls_source = quality_checks.check_nulls(sample_source)
+            nulls_target = quality_checks.check_nulls(sample_target)
+
+        match, count_source, count_target = comparator.compare_row_counts(row_counts[self.source], row_counts['snowflake'])
+        columns_source = columns[self.source]
+        columns_target = columns['snowflake']
+        schema_drift = self._get_schema_drift(table)
+
+        result = {
+            "table": table,
+            "row_count_source": count_source,
+            "row_count_target": count_target,
+            "row_count_match": match,
+            "column_count_source": columns_source.shape[0],
+            "column_count_target": columns_target.shape[0],
+            "column_match": columns_source.shape[0] == columns_target.shape[0]
+                            and not any(drift["severity"] == "error" for drift in schema_drift),
+            "schema_drift": schema_drift,
+            "duplicates_source": duplicates_source,
+            "duplicates_target": duplicates_target,
+            "null_comparison": comparator.compare_null_percentages(nulls_source, nulls_target, source=self.source),
+            # Null percentages of independent samples differ by chance; only
+            # full tables and key_hash samples cover the same rows on both sides
+            "nulls_aligned": self.profile_quality or self.sample_method == 'key_hash',
+            "content_match": None,
+        }
+
+        if self.include_checksums:
+            result["content_match"], result["content_digest_source"], result["content_digest_target"] = self._check_content(table)
+
+        return result
+
+    def _forget(self, table):
+        # Drop finished futures so samples are not held for the whole run;
+        # batched futures go once every table of their batch has been checked
+        with self._futures_lock:
+            self._checked.add(table.upper())
+            for key in list(self._futures):
+                tables = key[2] if isinstance(key[2], tuple) else (key[2],)
+                if key[2] is not None and all(name.upper() in self._checked for name in tables):
+                    del self._futures[key]
+            for source in self.sides:
+                self._row_counts.pop((source, table.upper()), None)
+            self._checksum_batches.pop(table.upper(), None)
+
+    def _check_content(self, table):
+        common_source, _ = comparator.get_common_columns(
+            self._get_columns(self.source, table), self._get_columns('snowflake', table)
+        )
+        checksum_source = self._submit(self.source, 'checksum', table, comparator.get_table_checksum, table, common_source, self.source, self.sides[self.source][1])
+        batch = self._checksum_batches.get(table.upper(), (table,))
+        checksums_target = self._submit('snowflake', 'checksums', batch, self._get_target_checksums, batch)
+        checksum_source = checksum_source.result()
+        checksum_target = checksums_target.result()[table]
+        match, _ = comparator.compare_checksums(checksum_source, checksum_target)
+        return match, str(checksum_source["row_hash_sum"]), str(checksum_target["row_hash_sum"])
+
+    def _get_target_checksums(self, conn, batch):
+        tables = [
+            (table, comparator.get_common_columns(self._get_columns(self.source, table), self._get_columns('snowflake', table))[1])
+            for table in batch
+        ]
+        return comparator.get_table_checksums(conn, tables, 'snowflake', self.sides['snowflake'][1])
+
+    def _options_signature(self):
+        return json.dumps({
+            "include_checksums": self.include_checksums,
+            "exact_row_counts": self.exact_row_counts,
+            "sample_method": self.sample_method,
+            "sample_confidence": self.sample_confidence,
+            "profile_quality": self.profile_quality,
+            "watermark_column": self.watermark_column,
+        }, sort_keys=True)
+
+    def _load_markers(self):
+        for source, (_, schema) in self.sides.items():
+            markers = self._submit(source, 'markers', None, data_fetcher.get_schema_change_markers, source, schema).result()
+            side_markers = {name.upper(): marker for name, marker in markers[["table_name", "marker"]].itertuples(index=False)}
+
+            if self.watermark_column:
+                columns = self._submit(source, 'columns', None, data_fetcher.get_schema_columns, source, schema).result()
+                has_column = columns[columns["column_name"].str.upper() == self.watermark_column.upper()]
+                watermarks = self._submit(source, 'watermarks', None, data_fetcher.get_schema_watermarks,
+                                          has_column["table_name"].tolist(), self.watermark_column, source, schema).result()
+                for name, watermark in watermarks[["table_name", "watermark"]].itertuples(index=False):
+                    side_markers[name.upper()] = f"{side_markers.get(name.upper())}|{watermark}"
+
+            for name, marker in side_markers.items():
+                self._markers[(source, name)] = marker
+
+    def _plan_incremental(self, tables):
+        """Splits tables into reusable stored results and tables to check."""
+        self._load_markers()
+        options = self._options_signature()
+        reused, to_check = [], []
+        for table in tables:
+            source_marker = self._markers.get((self.source, table.upper()))
+            target_marker = self._markers.get(('snowflake', table.upper()))
+            stored = self.store.get(self.store_key, table)
+            if (
+                stored is not None and source_marker is not None and target_marker is not None
+                and stored["source_marker"] == source_marker and stored["target_marker"] == target_marker
+                and stored["options"] == options
+            ):
+                result = stored["result"]
+                result["table"] = table
+                result["reused"] = True
+                result["checked_at"] = stored["checked_at"]
+                reused.append(result)
+            else:
+                to_check.append(table)
+        return reused, to_check
+
+    def _save(self, result):
+        table = result["table"]
+        self.store.save(
+            self.store_key, result,
+            self._markers.get((self.source, table.upper())), self._markers.get(('snowflake', table.upper())),
+            self._options_signature()
+        )
+
+    def iter_results(self, tables):
+        """
+        Checks every table and yields one result dict per table as soon as it
+        is complete (in completion order, not input order).
+
+        Each dict has 'table', 'row_count_source', 'row_count_target',
+        'row_count_match', 'column_count_source', 'column_count_target',
+        'column_match' (same column count and no schema drift errors),
+        'schema_drift' (list of dicts, see comparator.compare_schema_columns),
+        'duplicates_source', 'duplicates_target',
+        'null_comparison' (DataFrame), 'nulls_aligned' (both sides' null
+        percentages come from the same rows), 'content_match' (None if not checked)
+        and, if the checks raised, 'error' instead of the check fields.
+        Results reused from the store on incremental runs are yielded first
+        and additionally have 'reused' (True) and 'checked_at' (epoch seconds).
+        """
+        tables = list(dict.fromkeys(tables))
+        if self.store is not None:
+            reused, tables = self._plan_incremental(tables)
+            yield from reused
+
+        self.prefetch_metadata(tables)
+        # The coordinating threads only wait on the per-database pools, so
+        # they cannot starve them; two per database worker keeps both busy.
+        with ThreadPoolExecutor(max_workers=2 * self.workers_per_database, thread_name_prefix="report-table") as coordinator:
+            pending = {tracing.submit_in_context(coordinator, self.check_table, table): table for table in tables}
+            for future in as_completed(pending):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield {"table": pending[future], "error": str(e)}
+                    continue
+                if self.store is not None:
+                    self._save(result)
+                yield result
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+def build_summary_checks(result, present_in_both=True, source='postgresql'):
+    """Returns the Check/Result table shown for each table in the app."""
+    summary_data = {
+        "Check": [
+            "Table Presence in Both DBs",
+            "Row Count Match",
+            "Column Count Match",
+            f"Duplicate Rows ({get_dialect(source).label})",
+            "Duplicate Rows (Snowflake)"
+        ],
+        "Result": [
+            "✅ Present in both" if present_in_both else "❌ Missing in one",
+            "✅ Match" if result["row_count_match"] else "❌ Mismatch",
+            "✅ Match" if result["column_match"] else "❌ Mismatch",
+            f"{result['duplicates_source']} duplicates",
+            f"{result['duplicates_target']} duplicates"
+        ]
+    }
+    if "schema_drift" in result:
+        errors, warnings = count_schema_drift(result)
+        summary_data["Check"].append("Column Definitions Match")
+        if errors:
+            summary_data["Result"].append(f"❌ {errors} differences" + (f", {warnings} warnings" if warnings else ""))
+        elif warnings:
+            summary_data["Result"].append(f"⚠️ {warnings} warnings")
+        else:
+            summary_data["Result"].append("✅ Match")
+    if result["content_match"] is not None:
+        summary_data["Check"].append("Full-Content Checksum Match")
+        summary_data["Result"].append("✅ Match" if result["content_match"] else "❌ Mismatch")
+    return pd.DataFrame(summary_data)
+
+
+def count_schema_drift(result):
+    """Returns the number of (error, warning) schema drift records of a table result."""
+    drift = result.get("schema_drift") or []
+    errors = sum(1 for record in drift if record["severity"] == "error")
+    return errors, len(drift) - errors
+
+
+def build_summary_metrics(result, source='postgresql'):
+    """Returns the Metric/Value table written to each table's Excel sheet."""
+    return pd.DataFrame({
+        "Metric": [
+            "Row Count Source", "Row Count Target", "Row Count Match",
+            "Column Count Match", "Schema Drift Errors", f"Duplicates {get_dialect(source).label}", "Duplicates Snowflake",
+            "Content Checksum Match"
+        ],
+        "Value": [
+            result["row_count_source"], result["row_count_target"], result["row_count_match"],
+            result["column_match"], count_schema_drift(result)[0], result["duplicates_source"], result["duplicates_target"],
+            "Not checked" if result["content_match"] is None else result["content_match"]
+        ]
+    })
+
+
+def is_table_match(result):
+    """
+    True when every check of a table passed: no error, matching row and
+    column counts, no difference in null percentages and, if it was run, a
+    matching content checksum. Null percentages only count when both sides
+    were profiled on the same rows (see 'nulls_aligned'); otherwise they are
+    reported but do not decide the match.
+    """
+    if "error" in result:
+        return False
+    return bool(
+        result["row_count_match"]
+        and result["column_match"]
+        and result["content_match"] is not False
+        and (not result.get("nulls_aligned", True) or (result["null_comparison"]["Difference"] == 0).all())
+    )
+
+
+def result_to_record(result):
+    """Flattens a result dict into one JSON/Parquet friendly record."""
+    record = {
+        "table": result["table"],
+        "match": is_table_match(result),
+        "error": result.get("error"),
+    }
+    if "error" not in result:
+        null_comparison = result["null_comparison"]
+        record.update({
+            "row_count_source": int(result["row_count_source"]),
+            "row_count_target": int(result["row_count_target"]),
+            "row_count_match": bool(result["row_count_match"]),
+            "column_count_source": int(result["column_count_source"]),
+            "column_count_target": int(result["column_count_target"]),
+            "column_match": bool(result["column_match"]),
+            "schema_drift_errors": count_schema_drift(result)[0],
+            "schema_drift_warnings": count_schema_drift(result)[1],
+            "duplicates_source": None if result["duplicates_source"] is None else int(result["duplicates_source"]),
+            "duplicates_target": None if result["duplicates_target"] is None else int(result["duplicates_target"]),
+            "content_match": result["content_match"],
+            "max_null_difference": int(null_comparison["Difference"].max()) if not null_comparison.empty else 0,
+            "nulls_aligned": bool(result.get("nulls_aligned", True)),
+        })
+    return record
@@ -0,0 +1,220 @@
+"""
+Lightweight tracing of queries and checks.
+
+A Trace collects spans: 'query' spans are recorded by data_fetcher.run_query
+and iter_query_batches for every statement sent to a database (SQL text,
+connection target, latency, rows, bytes and the Snowflake query id), and
+'internal' spans wrap checks and other steps via span().
+
+The active trace and span live in context variables, so work submitted to a
+thread pool is attributed correctly when it runs inside
+contextvars.copy_context() (see submit_in_context). When no trace is active,
+span() and query_span() cost almost nothing.
+
+Traces export as a flat JSON list (to_records) or as OpenTelemetry OTLP/JSON
+(to_otlp), which can be loaded into any OTLP-compatible trace viewer.
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+SERVICE_NAME = "data-migration-assist"
+
+# Longest SQL text kept per query span
+MAX_STATEMENT_LENGTH = 4000
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(nbytes):
+    return os.urandom(nbytes).hex()
+
+
+class Span:
+    def __init__(self, trace, name, kind, parent_id, attributes):
+        self.trace = trace
+        self.name = name
+        self.kind = kind
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def duration_ms(self):
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error=None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.trace._add(self)
+
+    def to_record(self):
+        return dict(
+            name=self.name,
+            kind=self.kind,
+            trace_id=self.trace.trace_id,
+            span_id=self.span_id,
+            parent_id=self.parent_id,
+            start=self.start_ns / 1e9,
+            duration_ms=round(self.duration_ms, 3),
+            error=self.error,
+            **self.attributes
+        )
+
+
+class Trace:
+    """
+    Collects the finished spans of one run (a Streamlit rerun, a CLI run or
+    a benchmark measurement). Thread safe.
+    """
+
+    def __init__(self, name="run"):
+        self.name = name
+        self.trace_id = _new_id(16)
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def _add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def query_spans(self):
+        with self._lock:
+            return [s for s in self.spans if s.kind == 'query']
+
+    def to_records(self):
+        """Finished spans as flat dicts, in start order."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        return [span.to_record() for span in spans]
+
+    def to_otlp(self):
+        """Finished spans as an OTLP/JSON ExportTraceServiceRequest document."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [_otlp_span(span) for span in spans],
+                }],
+            }]
+        }
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(span):
+    # OTLP span kinds: 1 = INTERNAL, 3 = CLIENT
+    document = {
+        "traceId": span.trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 3 if span.kind == 'query' else 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items() if v is not None],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        document["parentSpanId"] = span.parent_id
+    return document
+
+
+def activate(trace):
+    """Makes `trace` the active trace of the current context; returns a token for deactivate."""
+    return _current_trace.set(trace), _current_span.set(None)
+
+
+def deactivate(token):
+    trace_token, span_token = token
+    _current_span.reset(span_token)
+    _current_trace.reset(trace_token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name="run"):
+    """Runs the block with a new active Trace, which it yields."""
+    trace = Trace(name)
+    token = activate(trace)
+    try:
+        yield trace
+    finally:
+        deactivate(token)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Times the block as a child of the current span; nested spans and queries
+    inside it become its children. Yields the Span, or None without an
+    active trace.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(trace, name, 'internal', parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(error=e)
+        raise
+    else:
+        current.end()
+    finally:
+        _current_span.reset(token)
+
+
+def query_span(target, statement):
+    """
+    Starts a 'query' span for one statement and returns it (or None without
+    an active trace). The caller sets rows/bytes/query_id and calls end().
+    Query spans never become the current span, so they may be ended from
+    a generator resumed in another context.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    parent = _current_span.get()
+    system = target.split(":", 1)[0]
+    return Span(trace, f"{system} query", 'query', parent.span_id if parent else None, {
+        "db.system": system,
+        "db.target": target,
+        "db.statement": " ".join(statement.split())[:MAX_STATEMENT_LENGTH],
+        "rows": 0,
+        "bytes": 0,
+        "query_id": None,
+    })
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit that runs `fn` in a copy of the caller's context, so it joins the caller's trace."""
+    context = contextvars.copy_context()
+    return executor.submit(context.run, fn, *args, **kwargs)
@@ -0,0 +1,320 @@
+"""
+Headless validation runner for scheduled (cron/orchestrator) use.
+
+Runs the same checks as the app's "Generate Full Summary Report" for one or
+more (source database.schema, Snowflake database.schema) pairs, writes
+machine-readable results plus the Excel report, and exits non-zero when any
+table does not match.
+
+Usage (from the repository root, credentials as for the app):
+
+    python -m scripts.validate \\
+        --pair migration_test_db.test_schema=MIGRATION_TEST_DB.TEST_SCHEMA \\
+        --workers 8 --output-dir reports --format json parquet xlsx
+
+Pairs can also be listed in a JSON or CSV file (--pairs-file) with the keys
+source_database, source_schema, sf_database and sf_schema (pg_database and
+pg_schema are accepted for source_database and source_schema).
+
+The source is PostgreSQL unless --source names another registered dialect
+(see scripts/dialects.py), e.g. --source sqlserver; source_database and
+source_schema name the database and schema on that source.
+
+With --incremental, per-table results are kept in a local SQLite store and
+tables whose catalog change markers (and optional --watermark-column) are
+unchanged since the last run are reported from the store without being
+queried again.
+
+With --job-dir, the run is checkpointed to <dir>/checkpoint.jsonl as each
+table finishes (results are written to the same directory unless
+--output-dir is given). Running again with the same --job-dir resumes: tables
+already in the checkpoint are reported from it instead of being checked
+again. scripts/jobs.py starts such runs as detached background jobs.
+
+With --trace-output, every query (SQL text, latency, rows, bytes, Snowflake
+query id) and every check is timed and written as an OpenTelemetry OTLP/JSON
+trace.
+
+Exit status: 0 if everything matches, 1 on any mismatch or failed table,
+2 on invalid arguments.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from config.snowflake_config import get_snowflake_pool
+from scripts import data_fetcher, comparator, summary_report, tracing
+from scripts.dialects import get_dialect, source_types
+from scripts.jobs import JobCheckpoint, CHECKPOINT_FILE
+from scripts.report_writer import ExcelReportWriter, ResultsFileWriter
+from scripts.results_store import ResultsStore, DEFAULT_PATH as DEFAULT_STORE_PATH
+
+PAIR_KEYS = ("source_database", "source_schema", "sf_database", "sf_schema")
+# Pair keys of pairs files written when PostgreSQL was the only source
+LEGACY_PAIR_KEYS = {"pg_database": "source_database", "pg_schema": "source_schema"}
+OUTPUT_FORMATS = ("json", "parquet", "csv", "xlsx")
+
+
+def parse_pair(text):
+    """Parses 'source_database.source_schema=SF_DATABASE.SF_SCHEMA'."""
+    try:
+        source, target = text.split("=", 1)
+        source_database, source_schema = source.split(".", 1)
+        sf_database, sf_schema = target.split(".", 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid pair '{text}'. Expected source_database.source_schema=SF_DATABASE.SF_SCHEMA")
+    return dict(zip(PAIR_KEYS, (source_database, source_schema, sf_database, sf_schema)))
+
+
+def load_pairs_file(path):
+    if path.lower().endswith(".json"):
+        with open(path) as f:
+            pairs = json.load(f)
+    else:
+        with open(path, newline="") as f:
+            pairs = list(csv.DictReader(f))
+    pairs = [{LEGACY_PAIR_KEYS.get(key, key): value for key, value in pair.items()} for pair in pairs]
+    for pair in pairs:
+        missing = [key for key in PAIR_KEYS if not pair.get(key)]
+        if missing:
+            raise ValueError(f"Pair {pair} in {path} is missing {', '.join(missing)}")
+    return [{key: pair[key] for key in PAIR_KEYS} for pair in pairs]
+
+
+def pair_label(pair):
+    return f"{pair['source_database']}.{pair['source_schema']} -> {pair['sf_database']}.{pair['sf_schema']}"
+
+
+def validate_pair(pair, on_result=None, checkpoint=None, source='postgresql', **executor_options):
+    """
+    Runs the summary checks for every table of one schema pair.
+
+    Parameters:
+    - pair (dict): source_database, source_schema, sf_database and sf_schema.
+    - on_result (callable): Optional. Called with each table result as it completes.
+    - checkpoint (JobCheckpoint): Optional. Finished tables are recorded in
+      it, and tables it already holds are not checked again; their results
+      are passed on with 'resumed' set to True.
+    - source (str): Source database type, one of dialects.source_types().
+    - executor_options: Passed to summary_report.ReportExecutor
+      (workers_per_database, include_checksums, exact_row_counts, ...).
+
+    Returns a dict with 'pair', 'source', 'source_only', 'target_only' and
+    'results' (the per-table result dicts).
+    """
+    pool_source = get_dialect(source).get_pool(pair["source_database"])
+    pool_target = get_snowflake_pool(pair["sf_database"])
+
+    with pool_source.connection() as conn:
+        tables_source = data_fetcher.get_table_list(conn, source, pair["source_schema"], use_cache=False)
+    with pool_target.connection() as conn:
+        tables_target = data_fetcher.get_table_list(conn, 'snowflake', pair["sf_schema"], use_cache=False)
+    common_tables, source_only, target_only = comparator.compare_table_lists(tables_source, tables_target)
+
+    results = []
+    to_check = common_tables
+    if checkpoint is not None:
+        label = pair_label(pair)
+        checkpoint.record("pair_started", pair=label, tables=len(common_tables))
+        completed = checkpoint.completed_tables(label)
+        to_check = [table for table in common_tables if table.upper() not in completed]
+        for table in common_tables:
+            result = completed.get(table.upper())
+            if result is not None:
+                result["table"] = table
+                result["resumed"] = True
+                results.append(result)
+                if on_result:
+                    on_result(result)
+
+    with summary_report.ReportExecutor(pool_source, pool_target, pair["source_schema"], pair["sf_schema"], source=source,
+                                       **executor_options) as executor:
+        for result in executor.iter_results(to_check):
+            if checkpoint is not None:
+                checkpoint.record_table(pair_label(pair), result)
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    if checkpoint is not None:
+        checkpoint.record("pair_finished", pair=pair_label(pair))
+
+    return {"pair": pair, "source": source, "source_only": source_only, "target_only": target_only, "results": results}
+
+
+def report_matches(report):
+    return not report["source_only"] and not report["target_only"] and all(
+        summary_report.is_table_match(result) for result in report["results"]
+    )
+
+
+def report_file_stem(pair):
+    return f"{pair['source_database']}_{pair['source_schema']}_vs_{pair['sf_database']}_{pair['sf_schema']}_summary"
+
+
+def write_json(reports, path):
+    """Writes the run's results, including per-column null comparisons and schema drift, as one JSON document."""
+    document = []
+    for report in reports:
+        tables = []
+        for result in report["results"]:
+            table = summary_report.result_to_record(result)
+            if "null_comparison" in result:
+                table["null_comparison"] = result["null_comparison"].to_dict(orient="records")
+            if "schema_drift" in result:
+                table["schema_drift"] = result["schema_drift"]
+            tables.append(table)
+        document.append(dict(report["pair"], source=report["source"], match=report_matches(report), source_only=report["source_only"],
+                             target_only=report["target_only"], tables=tables))
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, default=str)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m scripts.validate", description="Validate source database to Snowflake schema migrations.")
+    parser.add_argument("--source", choices=source_types(), default="postgresql",
+                        help="Source database type (default: postgresql)")
+    parser.add_argument("--pair", action="append", type=parse_pair, default=[],
+                        help="source_database.source_schema=SF_DATABASE.SF_SCHEMA (repeatable)")
+    parser.add_argument("--pairs-file", help="JSON or CSV file with source_database, source_schema, sf_database, sf_schema")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent queries per database (default: 4)")
+    parser.add_argument("--output-dir", help="Directory for result files (default: the --job-dir, else reports)")
+    parser.add_argument("--format", nargs="+", choices=OUTPUT_FORMATS, default=["json", "xlsx"], dest="formats",
+                        help="Result formats to write (default: json xlsx)")
+    parser.add_argument("--checksums", action="store_true", help="Also run full-content checksums")
+    parser.add_argument("--estimated-row-counts", action="store_true", help="Use source catalog estimates instead of exact counts")
+    parser.add_argument("--sample-quality", action="store_true", help="Null/duplicate checks on samples instead of full tables")
+    parser.add_argument("--sample-method", choices=data_fetcher.SAMPLE_METHODS, default="limit")
+    parser.add_argument("--sample-confidence", type=float, help="Size samples for this confidence level (e.g. 0.95) instead of fixed rows")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip tables unchanged since their last stored result (catalog change markers)")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"Results store for --incremental (default: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--watermark-column", help="Column such as updated_at whose MAX also marks a table as changed")
+    parser.add_argument("--trace-output", help="Write query and check timings to this file as OTLP/JSON")
+    parser.add_argument("--job-dir", help="Checkpoint finished tables here and resume from an earlier checkpoint")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    pairs = list(args.pair)
+    if args.pairs_file:
+        try:
+            pairs.extend(load_pairs_file(args.pairs_file))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    if not pairs:
+        parser.error("at least one --pair or --pairs-file is required")
+
+    executor_options = {
+        "workers_per_database": args.workers,
+        "include_checksums": args.checksums,
+        "exact_row_counts": not args.estimated_row_counts,
+        "profile_quality": not args.sample_quality,
+        "sample_method": args.sample_method,
+        "sample_confidence": args.sample_confidence,
+        "watermark_column": args.watermark_column,
+    }
+    store = ResultsStore(args.store) if args.incremental else None
+    output_dir = args.output_dir or args.job_dir or "reports"
+
+    checkpoint = None
+    if args.job_dir:
+        checkpoint = JobCheckpoint(os.path.join(args.job_dir, CHECKPOINT_FILE))
+        checkpoint.record("run_started", pid=os.getpid())
+
+    # CSV/Parquet results and the Excel sheets are written as each table
+    # finishes, so memory stays flat and a crashed run keeps its progress
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    results_writers = []
+    for file_format in ("csv", "parquet"):
+        if file_format in args.formats:
+            path = os.path.join(output_dir, f"validation_results.{file_format}")
+            results_writers.append(ResultsFileWriter(path, file_format, extra={"source": args.source}))
+            paths.append(path)
+
+    trace = tracing.Trace("validate") if args.trace_output else None
+    trace_token = tracing.activate(trace) if trace else None
+
+    reports = []
+    try:
+        for pair in pairs:
+            label = pair_label(pair)
+            print(f"Validating {label}", file=sys.stderr)
+            excel_writer = None
+            if "xlsx" in args.formats:
+                path = os.path.join(output_dir, report_file_stem(pair) + ".xlsx")
+                excel_writer = ExcelReportWriter(path, source=args.source)
+                paths.append(path)
+
+            def on_result(result, label=label, pair=pair, excel_writer=excel_writer):
+                status = "ERROR" if "error" in result else ("OK" if summary_report.is_table_match(result) else "MISMATCH")
+                if result.get("reused"):
+                    status += " (unchanged, not re-checked)"
+                elif result.get("resumed"):
+                    status += " (from checkpoint)"
+                print(f"  [{label}] {result['table']}: {status}", file=sys.stderr)
+                with tracing.span("write_results", table=result["table"]):
+                    for writer in results_writers:
+                        writer.write_table(result, extra=pair)
+                    if excel_writer:
+                        excel_writer.write_table(result)
+
+            try:
+                with tracing.span("validate_pair", pair=label):
+                    report = validate_pair(pair, on_result=on_result, checkpoint=checkpoint, source=args.source,
+                                           store=store, store_key=label, **executor_options)
+            except Exception as e:
+                print(f"  [{label}] failed: {e}", file=sys.stderr)
+                failure = {"table": None, "error": str(e)}
+                for writer in results_writers:
+                    writer.write_table(failure, extra=pair)
+                report = {"pair": pair, "source": args.source, "source_only": [], "target_only": [], "results": [failure]}
+            finally:
+                if excel_writer:
+                    excel_writer.close()
+            for table in report["source_only"]:
+                print(f"  [{label}] {table}: MISSING IN SNOWFLAKE", file=sys.stderr)
+            for table in report["target_only"]:
+                print(f"  [{label}] {table}: MISSING IN {get_dialect(args.source).label.upper()}", file=sys.stderr)
+            reports.append(report)
+    finally:
+        for writer in results_writers:
+            writer.close()
+        if trace:
+            tracing.deactivate(trace_token)
+            with open(args.trace_output, "w") as f:
+                json.dump(trace.to_otlp(), f)
+            paths.append(args.trace_output)
+
+    if "json" in args.formats:
+        path = os.path.join(output_dir, "validation_results.json")
+        write_json(reports, path)
+        paths.append(path)
+
+    for path in paths:
+        print(f"Wrote {path}", file=sys.stderr)
+
+    exit_code = 0 if all(report_matches(report) for report in reports) else 1
+    if checkpoint is not None:
+        failures = sum("error" in result for report in reports for result in report["results"])
+        if failures:
+            # Failed tables are not checkpointed, so resuming the job retries just those
+            checkpoint.record("run_incomplete", failures=failures)
+        else:
+            mismatches = sum(
+                len(report["source_only"]) + len(report["target_only"])
+                + sum(not summary_report.is_table_match(result) for result in report["results"])
+                for report in reports
+            )
+            checkpoint.record("run_finished", exit_code=exit_code, mismatches=mismatches)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
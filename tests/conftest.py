@@ -0,0 +1,122 @@
+"""
+Fixtures for the comparison tests.
+
+The source side is a PostgreSQL server, configured as for the app
+(credentials/.env.source or PG_HOST, PG_USER, PG_PASSWORD, PG_PORT); tests
+create a scratch schema in PG_TEST_DATABASE (default: postgres) and drop it
+afterwards, and are skipped when the server cannot be reached. The target is
+the local Snowflake stand-in (config/local_snowflake.py) in a temporary
+directory, so no Snowflake account is needed.
+
+Run from the repository root with:
+
+    python -m pytest -q
+"""
+import os
+import uuid
+
+import pytest
+
+TARGET_DATABASE = "PYTEST_DB"
+
+# Rows of the seeded drift tables; one row in DRIFT_EVERY is changed, one
+# deleted and one copied to a key above generate_data.EXTRA_ROW_OFFSET
+DRIFT_ROWS = 20000
+DRIFT_EVERY = 1000
+
+
+@pytest.fixture(scope="session", autouse=True)
+def local_snowflake(tmp_path_factory):
+    os.environ["SNOWFLAKE_BACKEND"] = "local"
+    os.environ["SNOWFLAKE_LOCAL_PATH"] = str(tmp_path_factory.mktemp("local_snowflake"))
+
+
+def require_database_drivers():
+    """Skips the calling test module when a database driver is not installed."""
+    for module in ("duckdb", "psycopg2"):
+        pytest.importorskip(module)
+
+
+@pytest.fixture(scope="session")
+def source_database():
+    from config.postgresql_config import get_postgresql_connection
+
+    database = os.getenv("PG_TEST_DATABASE", "postgres")
+    try:
+        get_postgresql_connection(database).close()
+    except Exception as e:
+        pytest.skip(f"PostgreSQL is not available: {e}")
+    return database
+
+
+def execute(conn, *statements):
+    """Runs statements on a source or target connection and commits."""
+    cur = conn.cursor()
+    try:
+        for statement in statements:
+            cur.execute(statement)
+    finally:
+        cur.close()
+    conn.commit()
+
+
+class Databases:
+    """Pools and scratch schemas of both sides, see the `databases` fixture."""
+
+    def __init__(self, source_database, schema):
+        from config.postgresql_config import get_postgresql_pool
+        from config.snowflake_config import get_snowflake_pool
+
+        self.schema = schema
+        self.source_schema = schema.lower()
+        self.target_schema = schema.upper()
+        self.pool_source = get_postgresql_pool(source_database)
+        self.pool_target = get_snowflake_pool(TARGET_DATABASE)
+
+    def execute_source(self, *statements):
+        with self.pool_source.connection() as conn:
+            execute(conn, *statements)
+
+    def execute_target(self, *statements):
+        with self.pool_target.connection() as conn:
+            execute(conn, f"USE SCHEMA {self.target_schema}", *statements)
+
+
+@pytest.fixture(scope="module")
+def databases(source_database):
+    """
+    An empty scratch schema of the same name on both sides, dropped when the
+    module's tests are done.
+    """
+    schema = f"pytest_{uuid.uuid4().hex[:8]}"
+    db = Databases(source_database, schema)
+    with db.pool_source.connection() as conn:
+        execute(conn, f"CREATE SCHEMA {db.source_schema}")
+    with db.pool_target.connection() as conn:
+        execute(conn, f"CREATE SCHEMA {db.target_schema}")
+    try:
+        yield db
+    finally:
+        with db.pool_source.connection() as conn:
+            execute(conn, f"DROP SCHEMA {db.source_schema} CASCADE")
+
+
+@pytest.fixture(scope="module")
+def drift_databases(databases):
+    """
+    The generate_data tables (TRANSACTIONS of DRIFT_ROWS rows) on both sides,
+    with generate_data's drift applied to the target.
+    """
+    from benchmarks import generate_data
+    from config.snowflake_config import get_snowflake_connection
+
+    plan = generate_data.plan_tables(DRIFT_ROWS)
+    with databases.pool_source.connection() as conn:
+        generate_data.generate(conn, 'postgresql', databases.schema, plan)
+    conn = get_snowflake_connection(TARGET_DATABASE)
+    try:
+        generate_data.generate(conn, 'snowflake', databases.schema, plan)
+    finally:
+        conn.close()
+    databases.execute_target(*generate_data.drift_statements(plan, 1 / DRIFT_EVERY))
+    return databases
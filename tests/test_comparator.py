@@ -0,0 +1,113 @@
+import pytest
+
+from tests.conftest import DRIFT_ROWS, DRIFT_EVERY, require_database_drivers
+
+require_database_drivers()
+
+from benchmarks.generate_data import EXTRA_ROW_OFFSET
+from scripts import comparator
+
+OUTLIER = 10 ** 12
+
+
+@pytest.fixture(scope="module")
+def skewed_databases(databases):
+    # 3000 dense keys and a few outliers far above them; the target has one
+    # changed, one deleted and one extra row
+    rows = [(i, i * 1.5) for i in range(1, 3001)] + [(OUTLIER + 1, 1), (OUTLIER + 2, 2)]
+    target_rows = [(i, 99 if i == 7 else amount) for i, amount in rows if i != 1234] + [(OUTLIER + 3, 3)]
+    databases.execute_source(
+        f"CREATE TABLE {databases.source_schema}.skewed (id BIGINT PRIMARY KEY, amount NUMERIC(12, 2))",
+        f"INSERT INTO {databases.source_schema}.skewed VALUES {', '.join(f'({i}, {a})' for i, a in rows)}",
+    )
+    databases.execute_target(
+        "CREATE TABLE SKEWED (ID NUMBER(19, 0) PRIMARY KEY, AMOUNT NUMBER(12, 2))",
+        f"INSERT INTO SKEWED VALUES {', '.join(f'({i}, {a})' for i, a in target_rows)}",
+    )
+    return databases
+
+
+def test_find_mismatched_rows_range_mode_with_outlier_keys(skewed_databases):
+    # Equal-width ranges leave all dense keys in one bucket for level after level
+    db = skewed_databases
+    expected = {'7': 'changed', '1234': 'missing_in_target', str(OUTLIER + 3): 'extra_in_target'}
+    with db.pool_source.connection() as conn_source, db.pool_target.connection() as conn_target:
+        for mode in ('hash', 'range'):
+            result = comparator.find_mismatched_rows(conn_source, conn_target, 'skewed', db.source_schema, db.target_schema,
+                                                     key_columns=['id'], mode=mode, max_leaf_rows=100)
+            assert result["complete"], mode
+            assert dict(result["differences"][["key", "status"]].itertuples(index=False)) == expected, mode
+
+
+def _expected_transaction_differences():
+    ids = range(1, DRIFT_ROWS + 1)
+    expected = {str(i): 'changed' for i in ids if i % DRIFT_EVERY == 0}
+    expected.update({str(i): 'missing_in_target' for i in ids if i % DRIFT_EVERY == 1})
+    expected.update({str(i + EXTRA_ROW_OFFSET): 'extra_in_target' for i in ids if i % DRIFT_EVERY == 5})
+    return expected
+
+
+def _as_key_text(differences):
+    # merge_compare_tables reports keys as values, the other paths as text
+    return {str(key): status for key, status in differences[["key", "status"]].itertuples(index=False)}
+
+
+def test_diff_paths_agree_on_drift(drift_databases):
+    db = drift_databases
+    expected = _expected_transaction_differences()
+    counts = {status: list(expected.values()).count(status) for status in ('missing_in_target', 'extra_in_target', 'changed')}
+
+    with db.pool_source.connection() as conn_source, db.pool_target.connection() as conn_target:
+        merged = comparator.merge_compare_tables(conn_source, conn_target, 'transactions', db.source_schema, db.target_schema,
+                                                 batch_size=1000)
+        bucketed = comparator.find_mismatched_rows(conn_source, conn_target, 'transactions', db.source_schema, db.target_schema,
+                                                   key_columns=['transaction_id'], max_leaf_rows=100)
+    assert merged["counts"] == counts
+    assert _as_key_text(merged["differences"]) == expected
+    assert bucketed["complete"]
+    assert _as_key_text(bucketed["differences"]) == expected
+
+    for method in ('hash', 'key_range'):
+        parallel = comparator.parallel_compare_tables(db.pool_source, db.pool_target, 'transactions', db.source_schema,
+                                                      db.target_schema, chunks=7, method=method, workers_per_database=2)
+        assert parallel["counts"] == counts, method
+        assert parallel["chunks"] == 7, method
+        assert _as_key_text(parallel["differences"]) == expected, method
+
+
+def test_compare_column_values_in_chunks(skewed_databases):
+    db = skewed_databases
+    with db.pool_source.connection() as conn_source, db.pool_target.connection() as conn_target:
+        results = [
+            comparator.compare_column_values(conn_source, conn_target, 'skewed', ['id'], db.source_schema, db.target_schema,
+                                             chunks=chunks)
+            for chunks in (1, 5)
+        ]
+    for result in results:
+        assert result["compared_rows"] == 3001
+        assert result["missing_in_target"] == 1
+        assert result["extra_in_target"] == 1
+        columns = result["columns"].set_index("Column Name")
+        assert columns.loc["AMOUNT", "Mismatches"] == 1
+        assert columns.loc["AMOUNT", "Example Keys"] == ['7']
+
+
+def test_merge_compare_tables_with_null_unique_keys(databases):
+    # Unique constraints, unlike primary keys, allow NULL key values
+    db = databases
+    db.execute_source(
+        f"CREATE TABLE {db.source_schema}.codes (region VARCHAR(10), code VARCHAR(10), amount INTEGER, UNIQUE (region, code))",
+        f"INSERT INTO {db.source_schema}.codes VALUES ('eu', 'a', 1), ('eu', NULL, 2), ('us', 'a', 3), ('us', 'b', 4)",
+    )
+    db.execute_target(
+        "CREATE TABLE CODES (REGION VARCHAR(10), CODE VARCHAR(10), AMOUNT NUMBER(10, 0), UNIQUE (REGION, CODE))",
+        "INSERT INTO CODES VALUES ('eu', 'a', 1), ('eu', NULL, 2), ('us', 'a', 30), ('us', NULL, 5)",
+    )
+    with db.pool_source.connection() as conn_source, db.pool_target.connection() as conn_target:
+        differences = list(comparator.iter_key_differences(conn_source, conn_target, 'codes', db.source_schema, db.target_schema))
+    # Key values come in common column order: (code, region)
+    assert differences == [
+        (('a', 'us'), 'changed'),
+        (('b', 'us'), 'missing_in_target'),
+        ((None, 'us'), 'extra_in_target'),
+    ]
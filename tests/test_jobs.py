@@ -0,0 +1,70 @@
+import json
+import os
+
+import pandas as pd
+
+from tests.conftest import require_database_drivers
+
+require_database_drivers()
+
+from scripts import comparator, jobs
+
+
+def test_checkpoint_ignores_partial_last_line(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = jobs.JobCheckpoint(path)
+    checkpoint.record("run_started")
+    checkpoint.record_chunk("scope", 0, {"changed": 1}, {"changed": ["7"]})
+    with open(path, "a") as f:
+        f.write('{"event": "chunk", "scope": "scope", "chu')
+
+    resumed = jobs.JobCheckpoint(path)
+    assert resumed.completed_chunks("scope") == {0: ({"changed": 1}, {"changed": ["7"]})}
+    resumed.record_chunk("scope", 1, {"changed": 0}, {"changed": []})
+    assert set(jobs.JobCheckpoint(path).completed_chunks("scope")) == {0, 1}
+
+
+def _chunk_events(path):
+    return [event for event in jobs.read_events(path) if event["event"] == "chunk"]
+
+
+def test_parallel_compare_tables_resumes_from_checkpoint(drift_databases, tmp_path):
+    db = drift_databases
+
+    def compare(checkpoint):
+        return comparator.parallel_compare_tables(db.pool_source, db.pool_target, 'transactions', db.source_schema, db.target_schema,
+                                                  chunks=6, workers_per_database=2, checkpoint=checkpoint)
+
+    full_path = str(tmp_path / "full.jsonl")
+    full = compare(jobs.JobCheckpoint(full_path))
+    chunk_events = _chunk_events(full_path)
+    assert sorted(event["chunk"] for event in chunk_events) == list(range(6))
+
+    # An interrupted run: two chunks were recorded, the third was being written
+    path = str(tmp_path / "interrupted.jsonl")
+    with open(path, "w") as f:
+        for event in chunk_events[:2]:
+            f.write(json.dumps(event) + "\n")
+        f.write(json.dumps(chunk_events[2])[:20])
+    resumed = compare(jobs.JobCheckpoint(path))
+
+    assert resumed["counts"] == full["counts"]
+    assert resumed["chunks"] == full["chunks"]
+    pd.testing.assert_frame_equal(resumed["differences"].sort_values("key", ignore_index=True),
+                                  full["differences"].sort_values("key", ignore_index=True))
+    recorded = [event["chunk"] for event in _chunk_events(path)]
+    assert sorted(recorded) == list(range(6))
+    assert len(recorded) == 6
+
+    # Chunks of another chunking are not reused
+    other = comparator.parallel_compare_tables(db.pool_source, db.pool_target, 'transactions', db.source_schema, db.target_schema,
+                                               chunks=4, checkpoint=jobs.JobCheckpoint(path))
+    assert other["counts"] == full["counts"]
+    assert len(_chunk_events(path)) == 10
+
+
+def test_dead_worker_with_reused_pid_is_not_running():
+    started = jobs._process_start_time(os.getpid())
+    assert jobs._is_running(os.getpid(), started)
+    if started is not None:
+        assert not jobs._is_running(os.getpid(), started - 3600)
@@ -0,0 +1,79 @@
+import pandas as pd
+
+from tests.conftest import require_database_drivers
+
+require_database_drivers()
+
+from scripts import comparator
+
+SCHEMA_COLUMNS = ["table_name", "column_name", "data_type", "ordinal_position", "character_maximum_length",
+                  "numeric_precision", "numeric_scale", "is_nullable", "column_default"]
+
+
+def _columns(rows):
+    # Shaped like data_fetcher.get_schema_columns
+    return pd.DataFrame(rows, columns=SCHEMA_COLUMNS)
+
+
+def _drift_kinds(result):
+    return {(row.table, row.column, row.kind): (row.source, row.target) for row in result["drift"].itertuples(index=False)}
+
+
+TARGET_ORDERS = _columns([
+    ("ORDERS", "ID", "NUMBER", 1, None, 38, 0, "NO", "ORDERS_ID_SEQ.NEXTVAL"),
+    ("ORDERS", "CLIENT_NAME", "TEXT", 2, 100, None, None, "YES", None),
+    ("ORDERS", "STATUS", "TEXT", 3, 20, None, None, "NO", "'new'"),
+    ("ORDERS", "CREATED_AT", "TIMESTAMP_NTZ", 4, None, None, None, "YES", "CURRENT_TIMESTAMP()"),
+    ("ORDERS", "AMOUNT", "NUMBER", 5, None, 12, 2, "YES", "1"),
+])
+
+
+def test_compare_schema_columns_postgresql_renames_and_defaults():
+    source = _columns([
+        ("orders", "id", "INTEGER", 1, None, 32, 0, "NO", "nextval('orders_id_seq'::regclass)"),
+        ("orders", "customer_name", "CHARACTER VARYING", 2, 100, None, None, "YES", None),
+        ("orders", "status", "CHARACTER VARYING", 3, 20, None, None, "NO", "'new'::character varying"),
+        ("orders", "created_at", "TIMESTAMP WITHOUT TIME ZONE", 4, None, None, None, "YES", "now()"),
+        ("orders", "amount", "NUMERIC", 5, None, 12, 2, "YES", "0"),
+    ])
+    result = comparator.compare_schema_columns(source, TARGET_ORDERS)
+
+    # Sequence, cast and current timestamp defaults are spelled differently
+    # but equivalent; only the changed amount default is reported
+    assert _drift_kinds(result) == {
+        ("orders", "customer_name", "renamed"): ("customer_name", "CLIENT_NAME"),
+        ("orders", "amount", "default_changed"): ("0", "1"),
+    }
+    tables = result["tables"].set_index("table")
+    assert not tables.loc["orders", "match"]
+    assert tables.loc["orders", "errors"] == 1 and tables.loc["orders", "warnings"] == 1
+
+
+def test_compare_schema_columns_sqlserver_defaults():
+    source = _columns([
+        ("Orders", "Id", "INT", 1, None, 10, 0, "NO", None),
+        ("Orders", "CustomerName", "NVARCHAR", 2, 100, None, None, "YES", None),
+        ("Orders", "Status", "VARCHAR", 3, 20, None, None, "NO", "('new')"),
+        ("Orders", "Created_At", "DATETIME2", 4, None, None, None, "YES", "(getdate())"),
+        ("Orders", "Amount", "DECIMAL", 5, None, 12, 2, "YES", "((1))"),
+    ])
+    target = TARGET_ORDERS.assign(column_default=TARGET_ORDERS["column_default"].where(TARGET_ORDERS["column_name"] != "ID"))
+    result = comparator.compare_schema_columns(source, target, source='sqlserver')
+
+    assert _drift_kinds(result) == {
+        ("Orders", "CustomerName", "renamed"): ("CustomerName", "CLIENT_NAME"),
+    }
+
+
+def test_compare_schema_columns_incompatible_column_is_not_a_rename():
+    source = _columns([
+        ("orders", "id", "INTEGER", 1, None, 32, 0, "NO", None),
+        ("orders", "customer_name", "DATE", 2, None, None, None, "YES", None),
+    ])
+    target = TARGET_ORDERS[TARGET_ORDERS["ordinal_position"] <= 2].assign(column_default=None)
+    result = comparator.compare_schema_columns(source, target)
+
+    assert set(_drift_kinds(result)) == {
+        ("orders", "customer_name", "missing_in_target"),
+        ("orders", "CLIENT_NAME", "extra_in_target"),
+    }
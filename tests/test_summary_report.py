@@ -0,0 +1,36 @@
+import pandas as pd
+
+from tests.conftest import require_database_drivers
+
+require_database_drivers()
+
+from scripts import comparator, summary_report
+
+
+def _result(null_difference, nulls_aligned):
+    return {
+        "table": "orders",
+        "row_count_match": True,
+        "column_match": True,
+        "content_match": None,
+        "null_comparison": pd.DataFrame({"Column Name": ["STATUS"], "Difference": [null_difference]}),
+        "nulls_aligned": nulls_aligned,
+    }
+
+
+def test_null_difference_decides_match_only_on_aligned_rows():
+    assert summary_report.is_table_match(_result(0, True))
+    assert not summary_report.is_table_match(_result(1, True))
+    # Independent samples of identical tables differ in their null percentages
+    assert summary_report.is_table_match(_result(1, False))
+
+
+def test_reports_name_the_source_database():
+    nulls = pd.Series({"status": 10.0})
+    null_comparison = comparator.compare_null_percentages(nulls, nulls, source='sqlserver')
+    assert list(null_comparison.columns) == ["Column Name", "SQL Server (%)", "Snowflake (%)", "Difference"]
+
+    result = dict(_result(0, True), duplicates_source=0, duplicates_target=0, null_comparison=null_comparison)
+    checks = summary_report.build_summary_checks(result, source='sqlserver')
+    assert "Duplicate Rows (SQL Server)" in checks["Check"].tolist()
+    assert not checks["Check"].str.contains("PostgreSQL").any()